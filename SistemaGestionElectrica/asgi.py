@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SistemaGestionElectrica.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# La ingesta de lecturas de los head-end se atiende de forma asíncrona antes
+# del stack de Django (ver sistemaGestion/ingesta.py)
+from sistemaGestion.ingesta import AplicacionIngesta  # noqa: E402  (requiere Django inicializado)
+
+application = AplicacionIngesta(django_application)
@@ -51,8 +51,87 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'sistemaGestion.middleware.PresupuestoConsultasMiddleware',
 ]
 
+# Presupuesto máximo de consultas SQL por vista (nombre de la URL en sistemaGestion/urls.py)
+# Las vistas que lo superen se registran en el logger 'sistemaGestion.consultas'
+# Las que no aparecen usan middleware.PRESUPUESTO_POR_DEFECTO (10)
+PRESUPUESTO_CONSULTAS = {
+    'dashboard': 6,
+    'lista_clientes': 4,
+    'lista_contratos': 4,
+    'lista_medidores': 4,
+    'lista_lecturas': 6,
+    'lista_boletas': 5,
+    'lista_pagos': 4,
+    'lista_tarifas': 4,
+    'lista_usuarios': 4,
+    'lista_notificaciones': 4,
+    # Crece con el tamaño del archivo (unas 5 consultas por lote de 5000 filas)
+    'importar_lecturas': 500,
+    'conciliar_pagos': 500,
+}
+# En modo estricto se lanza una excepción en lugar de registrar una advertencia
+PRESUPUESTO_CONSULTAS_ESTRICTO = False
+
+# Ingesta asíncrona de lecturas desde los head-end (ASGI, ver sistemaGestion/ingesta.py)
+# Tokens por variable de entorno: INGESTA_TOKENS="headend1:token1,headend2:token2"
+INGESTA_LECTURAS = {
+    'TOKENS': dict(
+        par.split(':', 1) for par in os.environ.get('INGESTA_TOKENS', '').split(',') if ':' in par
+    ),
+    'CAPACIDAD': 50000,         # filas en memoria; sobre esto se responde 503
+    'TAMANO_LOTE': 5000,        # filas por escritura en la base de datos
+    'INTERVALO_SEGUNDOS': 1.0,  # espera máxima antes de guardar un lote incompleto
+    'MAXIMO_INTENTOS': 5,       # un lote que falla más veces se descarta al archivo siguiente
+    'ARCHIVO_DESCARTES': BASE_DIR / 'ingesta_descartes.jsonl',
+}
+
+# Caché de Django compartida por todos los workers (ver sistemaGestion/estadisticas.py):
+# la invalidación que hacen las señales en un proceso debe verse en los demás, lo que no
+# ocurre con la caché en memoria por proceso (LocMemCache, la por defecto).
+# La tabla la crea la migración 0021 (o: python manage.py createcachetable)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'sistemaGestion_cache',
+    }
+}
+
+# Caché en disco de los PDF de boletas (ver sistemaGestion/cache_pdf.py)
+# Con DIRECTORIO = None se desactiva y cada descarga vuelve a generar el PDF
+CACHE_PDF_BOLETAS = {
+    'DIRECTORIO': BASE_DIR / 'cache_pdf',
+    'TAMANO_MAXIMO_MB': 500,  # sobre esto se borran los PDF menos descargados
+    'PODAR_CADA_ESCRITURAS': 100,  # además del worker, cada proceso revisa el tamaño cada N PDF guardados
+}
+
+# Generación de PDF en segundo plano (ver sistemaGestion/trabajos_pdf.py)
+# Requiere el worker: python manage.py procesar_trabajos_pdf
+# Con ASINCRONO = False el PDF se genera dentro del request
+TRABAJOS_PDF = {
+    'ASINCRONO': True,
+    'INTERVALO_SEGUNDOS': 1.0,  # espera del worker con la cola vacía
+    'MINUTOS_ABANDONO': 10,     # trabajos 'procesando' por más tiempo vuelven a la cola
+    'HORAS_RETENCION': 24,      # trabajos terminados que se conservan
+}
+
+# Exportación columnar por mes para análisis (ver sistemaGestion/exportacion_columnar.py)
+# Se ejecuta con: python manage.py exportar_columnar (Parquet si está pyarrow, si no NumPy .npz)
+EXPORTACION_COLUMNAR = {
+    'DIRECTORIO': BASE_DIR / 'analitica',
+    'TAMANO_LOTE': 20000,       # filas por consulta
+}
+
+# Arranque en frío de workers y comandos (ver sistemaGestion/arranque.py)
+# Se verifica con: python manage.py verificar_arranque
+ARRANQUE = {
+    'PRESUPUESTO_MS': 1500,     # tiempo máximo para cargar WSGI + URL en un proceso nuevo
+    # Dependencias pesadas que se importan al usarse, nunca al arrancar
+    'MODULOS_DIFERIDOS': ('xhtml2pdf', 'reportlab', 'numpy', 'pyarrow', 'PIL', 'html5lib'),
+}
+
 ROOT_URLCONF = 'SistemaGestionElectrica.urls'
 
 #se indica la carpeta de templates
@@ -134,3 +213,19 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sistemaGestion.consultas': {'handlers': ['console'], 'level': 'WARNING'},
+        'sistemaGestion.ingesta': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
@@ -3,7 +3,8 @@ from django.contrib import messages
 from datetime import date
 from .models import (
     Cliente, Contrato, Tarifa, Tarifa_has_Contrato, Medidor, Lectura, 
-    Boleta, Pago, NotificacionLectura, NotificacionPago, Usuario
+    Boleta, Pago, NotificacionLectura, NotificacionPago, Usuario, ContadorDashboard,
+    LecturaIntervalo
 )
 
 # ==========================================================
@@ -32,6 +33,7 @@ class ContratoAdmin(admin.ModelAdmin):
     list_filter = ('estado', 'fecha_inicio', 'cliente')  # Filtrar por cliente
     search_fields = ('numero_contrato', 'cliente__nombre', 'cliente__numero_cliente')  # Buscar por datos del cliente
     ordering = ('-fecha_inicio',)
+    list_select_related = ('cliente',)
     
     fieldsets = (
         ('Información del Contrato', {'fields': ('numero_contrato', 'cliente', 'estado')}),
@@ -77,6 +79,7 @@ class TarifaHasContratoAdmin(admin.ModelAdmin):
         'tarifa__tipo_cliente',
     )
     ordering = ('-fecha_asignacion',)
+    list_select_related = ('contrato__cliente', 'tarifa')
     
     fieldsets = (
         ('Asignación de Tarifa', {'fields': ('contrato', 'tarifa')}),
@@ -117,6 +120,7 @@ class MedidorAdmin(admin.ModelAdmin):
         'contrato__cliente__numero_cliente',   # Buscar por número de cliente
     )
     ordering = ('numero_medidor',)
+    list_select_related = ('contrato__cliente',)
     
     fieldsets = (
         ('Identificación del Medidor', {'fields': ('numero_medidor', 'contrato', 'ubicacion')}),
@@ -157,6 +161,7 @@ class LecturaAdmin(admin.ModelAdmin):
         'tipo_lectura',
     )
     ordering = ('-fecha_lectura',)
+    list_select_related = ('medidor__contrato__cliente',)
     
     fieldsets = (
         ('Relación', {'fields': ('medidor',)}),
@@ -203,6 +208,7 @@ class BoletaAdmin(admin.ModelAdmin):
         'consumo_energetico',
     )
     ordering = ('-fecha_emision',)
+    list_select_related = ('lectura__medidor__contrato__cliente',)
     
     fieldsets = (
         ('Relación', {'fields': ('lectura',)}),
@@ -230,19 +236,20 @@ class BoletaAdmin(admin.ModelAdmin):
     get_cliente.admin_order_field = 'lectura__medidor__contrato__cliente__nombre'
     
     def get_total_pagado(self, obj):
-        """Muestra el total pagado en la lista"""
-        total = obj.calcular_total_pagado()
-        return f"${total:,}"
+        """Muestra el total pagado en la lista (columna desnormalizada, sin consultas extra)"""
+        return f"${obj.total_pagado:,}"
     get_total_pagado.short_description = 'Total Pagado'
+    get_total_pagado.admin_order_field = 'total_pagado'
     
     def get_saldo_pendiente(self, obj):
-        """Muestra el saldo pendiente en la lista"""
-        saldo = obj.calcular_saldo_pendiente()
+        """Muestra el saldo pendiente en la lista (columna desnormalizada, sin consultas extra)"""
+        saldo = obj.saldo_pendiente
         if saldo > 0:
             return f"${saldo:,}"
         else:
             return "$0"
     get_saldo_pendiente.short_description = 'Saldo Pendiente'
+    get_saldo_pendiente.admin_order_field = 'saldo_pendiente'
     
     def get_total_pagado_readonly(self, obj):
         """Muestra el total pagado en el formulario de detalle"""
@@ -283,6 +290,7 @@ class PagoAdmin(admin.ModelAdmin):
         'boleta__lectura__medidor__contrato__cliente__numero_cliente',
     )
     ordering = ('-fecha_pago',)
+    list_select_related = ('boleta__lectura__medidor__contrato__cliente',)  # Cliente, monto y saldo en la misma consulta
     
     fieldsets = (
         ('Selección de Boleta', {
@@ -330,7 +338,7 @@ class PagoAdmin(admin.ModelAdmin):
         """Muestra el saldo restante después de este pago"""
         try:
             if obj.boleta:
-                saldo = obj.boleta.calcular_saldo_pendiente()
+                saldo = obj.boleta.saldo_pendiente
                 if saldo > 0:
                     return f"${saldo:,}"
                 else:
@@ -348,8 +356,8 @@ class PagoAdmin(admin.ModelAdmin):
             Boleta ID: {obj.boleta.id}
             Cliente: {obj.boleta.get_cliente().nombre if obj.boleta.get_cliente() else 'N/A'}
             Monto Total: ${obj.boleta.monto_total:,}
-            Total Pagado: ${obj.boleta.calcular_total_pagado():,}
-            Saldo Pendiente: ${obj.boleta.calcular_saldo_pendiente():,}
+            Total Pagado: ${obj.boleta.total_pagado:,}
+            Saldo Pendiente: ${obj.boleta.saldo_pendiente:,}
             Estado: {obj.boleta.estado}
             """
                 return info.strip()
@@ -398,6 +406,7 @@ class NotificacionLecturaAdmin(admin.ModelAdmin):
         'lectura__medidor__contrato__cliente__numero_cliente',
     )
     ordering = ('-fecha_notificacion',)
+    list_select_related = ('lectura__medidor__contrato__cliente',)
     
     fieldsets = (
         ('Relación', {'fields': ('lectura',)}),
@@ -436,6 +445,7 @@ class NotificacionPagoAdmin(admin.ModelAdmin):
         'pago__boleta__lectura__medidor__contrato__cliente__numero_cliente',
     )
     ordering = ('-fecha_notificacion',)
+    list_select_related = ('pago__boleta__lectura__medidor__contrato__cliente',)
     
     fieldsets = (
         ('Relación', {'fields': ('pago',)}),
@@ -458,6 +468,32 @@ class NotificacionPagoAdmin(admin.ModelAdmin):
         return obj.deuda_pendiente[:50] + "..." if len(obj.deuda_pendiente) > 50 else obj.deuda_pendiente
     deuda_pendiente_corta.short_description = 'Deuda'
 
+# ==========================================================
+# CONFIGURACIÓN DEL ADMIN - CONTADORES DEL DASHBOARD
+# ==========================================================
+class ContadorDashboardAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'valor', 'actualizado')
+    readonly_fields = ('nombre', 'valor', 'actualizado')
+    ordering = ('nombre',)
+
+# ==========================================================
+# CONFIGURACIÓN DEL ADMIN - INTERVALOS (CURVA DE CARGA)
+# ==========================================================
+class LecturaIntervaloAdmin(admin.ModelAdmin):
+    # El blob de valores no se muestra ni se edita desde el admin
+    list_display = ('fecha', 'medidor', 'intervalos_registrados', 'get_consumo_kwh')
+    list_filter = ('fecha',)
+    search_fields = ('medidor__numero_medidor',)
+    ordering = ('-fecha',)
+    list_select_related = ('medidor__contrato__cliente',)
+    fields = ('medidor', 'fecha', 'intervalos_registrados', 'consumo_wh')
+    readonly_fields = ('medidor', 'fecha', 'intervalos_registrados', 'consumo_wh')
+
+    def get_consumo_kwh(self, obj):
+        return round(obj.consumo_wh / 1000, 3)
+    get_consumo_kwh.short_description = 'Consumo (kWh)'
+    get_consumo_kwh.admin_order_field = 'consumo_wh'
+
 # ==========================================================
 # REGISTRO DE MODELOS EN EL ADMIN
 # ==========================================================
@@ -471,4 +507,6 @@ admin.site.register(Boleta, BoletaAdmin)
 admin.site.register(Pago, PagoAdmin)
 admin.site.register(Usuario, UsuarioAdmin)
 admin.site.register(NotificacionLectura, NotificacionLecturaAdmin)
-admin.site.register(NotificacionPago, NotificacionPagoAdmin)
\ No newline at end of file
+admin.site.register(NotificacionPago, NotificacionPagoAdmin)
+admin.site.register(ContadorDashboard, ContadorDashboardAdmin)
+admin.site.register(LecturaIntervalo, LecturaIntervaloAdmin)
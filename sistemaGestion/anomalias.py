@@ -0,0 +1,250 @@
+"""
+DETECCIÓN DE ANOMALÍAS DE CONSUMO
+=================================
+
+Revisa el historial de lecturas de todos los medidores y genera
+NotificacionLectura automáticas (con tipo_anomalia y detalle_anomalia) para:
+
+- pico: consumo muy sobre lo habitual del medidor. Se usa un puntaje z
+  robusto, (consumo - mediana) / (1.4826 · MAD), que no se deja arrastrar por
+  los mismos picos como lo haría la media. Si el medidor tiene el mismo mes
+  en otros años (base estacional), el consumo también debe superar esa base:
+  así el alza habitual de invierno no se informa como pico.
+- consumo_cero: RACHA_CERO_MINIMA lecturas seguidas con 0 kWh (medidor
+  detenido o sin conexión). Se notifica la lectura que completa la racha.
+- registro_retrocede: lectura_actual menor que la anterior (vuelta de
+  contador o cambio de medidor; el consumo derivado puede no ser el real).
+
+Las lecturas se cargan con UNA consulta por bloque de medidores en arreglos
+NumPy (una posición por lectura, ordenadas por medidor y fecha), y las
+estadísticas de todos los medidores del bloque se calculan a la vez: las
+medianas por grupo salen de un único ordenamiento (lexsort) en lugar de un
+ciclo por medidor.
+
+Solo se notifican las lecturas recientes (últimos `dias` días); el resto del
+historial sirve de referencia. Volver a ejecutarlo no duplica alertas: hay a
+lo más una notificación de cada tipo por lectura. Se usa desde el comando
+`detectar_anomalias`.
+"""
+
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from .models import Lectura, Medidor, NotificacionLectura
+
+
+TAMANO_LOTE_MEDIDORES = 5000
+MESES_HISTORIAL = 24
+DIAS_A_NOTIFICAR = 60
+UMBRAL_PUNTAJE = 3.5         # puntaje z robusto sobre el cual se considera pico
+MINIMO_HISTORIAL = 6         # lecturas del medidor necesarias para evaluar picos
+MINIMO_ESTACIONAL = 2        # lecturas del mismo mes (incluida la evaluada) para usar la base estacional
+RACHA_CERO_MINIMA = 3
+
+ESCALA_MAD = 1.4826          # MAD → desviación estándar en datos normales
+ESCALA_DESVIACION_MEDIA = 1.2533  # desviación absoluta media → desviación estándar (si MAD = 0)
+
+
+def medianas_por_grupo(grupos, valores, cantidad_grupos):
+    """
+    Mediana de `valores` para cada grupo 0..cantidad_grupos-1 (todos con al
+    menos un elemento), con un solo ordenamiento.
+    """
+    ordenados = valores[np.lexsort((valores, grupos))]
+    cantidades = np.bincount(grupos, minlength=cantidad_grupos)
+    inicios = np.cumsum(cantidades) - cantidades
+    return (ordenados[inicios + (cantidades - 1) // 2] + ordenados[inicios + cantidades // 2]) / 2
+
+
+def _puntaje(diferencia, escala):
+    puntaje = np.zeros_like(diferencia)
+    np.divide(diferencia, escala, out=puntaje, where=escala > 0)
+    return puntaje
+
+
+def analizar(medidores, meses, consumos, registros, umbral=UMBRAL_PUNTAJE):
+    """
+    Evalúa todas las lecturas de un bloque. Los arreglos tienen una posición
+    por lectura, ordenados por medidor y fecha.
+
+    retorna:
+        dict de arreglos: pico, consumo_cero, registro_retrocede (booleanos),
+        mediana, escala, puntaje, base_estacional, puntaje_estacional,
+        cantidad_historial, largo_racha, inicio_racha (posición)
+    """
+    consumos = consumos.astype(np.float64)
+    cantidad = len(consumos)
+    posiciones = np.arange(cantidad)
+    nuevo_medidor = np.r_[True, medidores[1:] != medidores[:-1]]
+
+    # Mediana y MAD de cada medidor
+    _, grupo, cantidad_por_medidor = np.unique(medidores, return_inverse=True, return_counts=True)
+    cantidad_medidores = len(cantidad_por_medidor)
+    mediana = medianas_por_grupo(grupo, consumos, cantidad_medidores)[grupo]
+    desvio = np.abs(consumos - mediana)
+    mad = medianas_por_grupo(grupo, desvio, cantidad_medidores)
+    # Con más de la mitad de las lecturas iguales el MAD es 0: se usa la desviación absoluta media
+    desviacion_media = np.bincount(grupo, weights=desvio, minlength=cantidad_medidores) / cantidad_por_medidor
+    escala = np.where(mad > 0, ESCALA_MAD * mad, ESCALA_DESVIACION_MEDIA * desviacion_media)[grupo]
+    puntaje = _puntaje(consumos - mediana, escala)
+
+    # Base estacional: mediana del mismo mes del año en el historial del medidor.
+    # Con solo dos lecturas de ese mes la mediana incluiría el propio pico: se usa la otra
+    _, grupo_mes, cantidad_por_mes = np.unique(medidores * 12 + meses - 1, return_inverse=True, return_counts=True)
+    cantidad_mes = cantidad_por_mes[grupo_mes]
+    suma_mes = np.bincount(grupo_mes, weights=consumos)[grupo_mes]
+    base_estacional = np.where(
+        cantidad_mes == 2,
+        suma_mes - consumos,
+        medianas_por_grupo(grupo_mes, consumos, len(cantidad_por_mes))[grupo_mes],
+    )
+    con_base_estacional = cantidad_mes >= MINIMO_ESTACIONAL
+    puntaje_estacional = _puntaje(consumos - base_estacional, escala)
+
+    cantidad_historial = cantidad_por_medidor[grupo]
+    pico = (
+        (cantidad_historial >= MINIMO_HISTORIAL)
+        & (puntaje > umbral)
+        & (~con_base_estacional | (puntaje_estacional > umbral))
+    )
+
+    # Rachas de consumo cero: posición de cada lectura dentro de su racha
+    cero = consumos == 0
+    inicia_racha = cero & (nuevo_medidor | ~np.r_[False, cero[:-1]])
+    inicio_racha = np.maximum.accumulate(np.where(inicia_racha, posiciones, 0))
+    numero_racha = np.cumsum(inicia_racha)
+    largo_racha = np.bincount(numero_racha, weights=cero)[numero_racha].astype(np.int64)
+    consumo_cero = cero & (posiciones - inicio_racha + 1 == RACHA_CERO_MINIMA)
+
+    registro_retrocede = ~nuevo_medidor & (registros < np.r_[registros[:1], registros[:-1]])
+
+    return {
+        'pico': pico,
+        'consumo_cero': consumo_cero,
+        'registro_retrocede': registro_retrocede,
+        'mediana': mediana,
+        'escala': escala,
+        'puntaje': puntaje,
+        'base_estacional': np.where(con_base_estacional, base_estacional, np.nan),
+        'puntaje_estacional': puntaje_estacional,
+        'cantidad_historial': cantidad_historial,
+        'largo_racha': largo_racha,
+        'inicio_racha': inicio_racha,
+    }
+
+
+def _hallazgos(ids, fechas, consumos, registros, resultado, recientes):
+    """Genera (lectura_id, tipo, registro_consumo, detalle) para las lecturas recientes marcadas."""
+    for i in np.flatnonzero(resultado['pico'] & recientes):
+        mediana = float(resultado['mediana'][i])
+        base = resultado['base_estacional'][i]
+        detalle = {
+            'consumo': int(consumos[i]),
+            'mediana': round(mediana, 1),
+            'escala': round(float(resultado['escala'][i]), 1),
+            'puntaje': round(float(resultado['puntaje'][i]), 2),
+            'lecturas_historial': int(resultado['cantidad_historial'][i]),
+        }
+        texto = f"Consumo de {consumos[i]} kWh muy superior al habitual (mediana {mediana:.0f} kWh"
+        if not np.isnan(base):
+            detalle['base_estacional'] = round(float(base), 1)
+            detalle['puntaje_estacional'] = round(float(resultado['puntaje_estacional'][i]), 2)
+            texto += f", mismo mes otros años {base:.0f} kWh"
+        texto += f", puntaje {detalle['puntaje']:.1f})"
+        yield int(ids[i]), 'pico', texto, detalle
+
+    for i in np.flatnonzero(resultado['consumo_cero'] & recientes):
+        inicio = fechas[resultado['inicio_racha'][i]]
+        largo = int(resultado['largo_racha'][i])
+        yield int(ids[i]), 'consumo_cero', (
+            f"{largo} lecturas seguidas con consumo 0 kWh desde el {inicio:%d/%m/%Y}: "
+            f"revisar si el medidor está detenido o desconectado"
+        ), {'largo_racha': largo, 'desde': inicio.isoformat()}
+
+    for i in np.flatnonzero(resultado['registro_retrocede'] & recientes):
+        anterior, actual = int(registros[i - 1]), int(registros[i])
+        yield int(ids[i]), 'registro_retrocede', (
+            f"El registro del medidor bajó de {anterior} a {actual} kWh: "
+            f"posible vuelta de contador o cambio de medidor"
+        ), {'registro_anterior': anterior, 'registro_actual': actual, 'consumo_derivado': int(consumos[i])}
+
+
+def detectar_anomalias(medidor_ids=None, dias=DIAS_A_NOTIFICAR, meses_historial=MESES_HISTORIAL,
+                       umbral=UMBRAL_PUNTAJE, solo_verificar=False, tamano_lote=TAMANO_LOTE_MEDIDORES,
+                       progreso=None, hoy=None):
+    """
+    Analiza el historial de los medidores (o de todos) y crea las
+    notificaciones de las anomalías de los últimos `dias` días.
+
+    retorna:
+        dict: medidores, lecturas, pico, consumo_cero, registro_retrocede,
+              creadas, ya_notificadas, segundos
+    """
+    hoy = hoy or date.today()
+    inicio_historial = hoy - timedelta(days=meses_historial * 31)
+    desde_notificar = hoy - timedelta(days=dias)
+    resumen = {
+        'medidores': 0, 'lecturas': 0, 'pico': 0, 'consumo_cero': 0, 'registro_retrocede': 0,
+        'creadas': 0, 'ya_notificadas': 0,
+    }
+    inicio = time.monotonic()
+
+    medidores = Medidor.objects.order_by('pk').values_list('pk', flat=True)
+    if medidor_ids is not None:
+        medidores = medidores.filter(pk__in=medidor_ids)
+
+    ultimo_id = 0
+    while True:
+        bloque = list(medidores.filter(pk__gt=ultimo_id)[:tamano_lote])
+        if not bloque:
+            break
+        ultimo_id = bloque[-1]
+
+        filas = list(
+            Lectura.objects
+            .filter(medidor_id__in=bloque, fecha_lectura__gte=inicio_historial)
+            .order_by('medidor_id', 'fecha_lectura', 'pk')
+            .values_list('pk', 'medidor_id', 'fecha_lectura', 'consumo_energetico', 'lectura_actual')
+        )
+        if not filas:
+            continue
+        ids, medidor_col, fechas, consumo_col, registro_col = zip(*filas)
+        consumos = np.array(consumo_col, dtype=np.int64)
+        registros = np.array(registro_col, dtype=np.int64)
+        resultado = analizar(
+            np.array(medidor_col, dtype=np.int64),
+            np.array([fecha.month for fecha in fechas], dtype=np.int64),
+            consumos, registros, umbral,
+        )
+        recientes = np.array([fecha >= desde_notificar for fecha in fechas])
+        hallazgos = list(_hallazgos(ids, fechas, consumos, registros, resultado, recientes))
+
+        resumen['medidores'] += len(set(medidor_col))
+        resumen['lecturas'] += len(filas)
+        for _, tipo, _, _ in hallazgos:
+            resumen[tipo] += 1
+
+        if hallazgos:
+            existentes = set(
+                NotificacionLectura.objects
+                .filter(lectura_id__in={lectura_id for lectura_id, _, _, _ in hallazgos}, tipo_anomalia__isnull=False)
+                .values_list('lectura_id', 'tipo_anomalia')
+            )
+            nuevas = [
+                NotificacionLectura(lectura_id=lectura_id, tipo_anomalia=tipo, registro_consumo=texto[:500],
+                                    detalle_anomalia=detalle)
+                for lectura_id, tipo, texto, detalle in hallazgos
+                if (lectura_id, tipo) not in existentes
+            ]
+            resumen['ya_notificadas'] += len(hallazgos) - len(nuevas)
+            resumen['creadas'] += len(nuevas)
+            if nuevas and not solo_verificar:
+                # ignore_conflicts: otra ejecución simultánea pudo crear la misma alerta
+                NotificacionLectura.objects.bulk_create(nuevas, batch_size=1000, ignore_conflicts=True)
+        if progreso:
+            progreso(resumen)
+
+    resumen['segundos'] = time.monotonic() - inicio
+    return resumen
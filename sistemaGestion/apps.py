@@ -5,3 +5,6 @@ class SistemagestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sistemaGestion'
 
+    def ready(self):
+        # Registra las señales que mantienen los datos desnormalizados
+        from . import signals  # noqa: F401
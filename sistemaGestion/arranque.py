@@ -0,0 +1,157 @@
+"""
+TIEMPO DE ARRANQUE EN FRÍO
+==========================
+
+Cada worker web nuevo (al escalar o reiniciar) y cada comando de cron parte
+importando Django, la aplicación y todo lo que sus módulos importan. Las
+dependencias pesadas que solo se usan en algunas operaciones (xhtml2pdf y
+reportlab para los PDF, NumPy para anomalías e intervalos) se importan dentro
+de la función que las usa (ver pdf.html_a_pdf, intervalos.como_numpy) y no
+deben volver a cargarse al arrancar.
+
+Se usa desde el comando `verificar_arranque`, que lanza procesos Python
+nuevos que cargan la aplicación igual que el servidor (módulo de
+WSGI_APPLICATION + todas las URL) y:
+
+- mide el tiempo total de arranque (mediana de varias ejecuciones)
+- con `python -X importtime` arma el reporte de los módulos y paquetes que
+  más tiempo toman al importarse
+- falla si se cargó alguno de MODULOS_DIFERIDOS (indicando quién lo
+  importó) o si la mediana supera PRESUPUESTO_MS
+
+CONFIGURACIÓN (settings.ARRANQUE): PRESUPUESTO_MS, MODULOS_DIFERIDOS.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+
+CONFIGURACION_POR_DEFECTO = {
+    'PRESUPUESTO_MS': 1500,
+    'MODULOS_DIFERIDOS': ('xhtml2pdf', 'reportlab', 'numpy', 'pyarrow', 'PIL', 'html5lib'),
+}
+
+# Carga la aplicación como el servidor: WSGI (settings, apps, middleware) y el URLconf (vistas)
+SCRIPT_ARRANQUE = (
+    'import importlib, json, sys\n'
+    'importlib.import_module({modulo_wsgi!r})\n'
+    'from django.urls import get_resolver\n'
+    'get_resolver().url_patterns\n'
+    'print(json.dumps(sorted(sys.modules)))\n'
+)
+
+# Formato de -X importtime: "import time: <propio us> | <acumulado us> | <sangría><módulo>"
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def configuracion():
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'ARRANQUE', {})}
+
+
+def _ejecutar(importtime=False):
+    """
+    Arranca la aplicación en un proceso nuevo.
+
+    retorna:
+        (milisegundos, módulos cargados, salida de error)
+    """
+    modulo_wsgi = settings.WSGI_APPLICATION.rsplit('.', 1)[0]
+    comando = [sys.executable]
+    if importtime:
+        comando += ['-X', 'importtime']
+    comando += ['-c', SCRIPT_ARRANQUE.format(modulo_wsgi=modulo_wsgi)]
+    entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+
+    inicio = time.perf_counter()
+    proceso = subprocess.run(comando, cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True)
+    milisegundos = (time.perf_counter() - inicio) * 1000
+    if proceso.returncode != 0:
+        raise RuntimeError(f'La aplicación no arrancó:\n{proceso.stderr.strip()}')
+    return milisegundos, json.loads(proceso.stdout.strip().splitlines()[-1]), proceso.stderr
+
+
+def leer_importtime(texto):
+    """
+    Lista de (módulo, propio µs, acumulado µs, nivel de anidación) en el
+    orden en que -X importtime los informa (cada módulo después de los que importó).
+    """
+    registros = []
+    for linea in texto.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, modulo = coincidencia.groups()
+            registros.append((modulo, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+    return registros
+
+
+def importado_por(registros, modulo):
+    """Cadena de módulos desde el primero importado al arrancar hasta `modulo`."""
+    for posicion, (nombre, _, _, nivel) in enumerate(registros):
+        if nombre == modulo:
+            break
+    else:
+        return []
+    cadena = [modulo]
+    # El módulo que lo importó es el siguiente informado con un nivel menos
+    for nombre, _, _, nivel_padre in registros[posicion + 1:]:
+        if nivel_padre < nivel:
+            cadena.append(nombre)
+            nivel = nivel_padre
+    return cadena[::-1]
+
+
+def medir_arranque(repeticiones=5, cantidad=15):
+    """
+    Mide el arranque en frío de la aplicación.
+
+    parámetros:
+        repeticiones: procesos lanzados para medir el tiempo (sin -X importtime,
+            que agrega su propio costo)
+        cantidad: largo de los rankings de módulos y paquetes
+
+    retorna:
+        dict: ms_mediana, ms_minimo, ms_importaciones, modulos_cargados,
+              modulos (más lentos por tiempo propio), paquetes (tiempo propio
+              sumado por paquete raíz), diferidos_cargados {módulo: cadena de importación}
+    """
+    tiempos = sorted(_ejecutar()[0] for _ in range(repeticiones))
+    _, modulos, salida = _ejecutar(importtime=True)
+    registros = leer_importtime(salida)
+
+    paquetes = {}
+    for nombre, propio, _, _ in registros:
+        raiz = nombre.split('.', 1)[0]
+        paquetes[raiz] = paquetes.get(raiz, 0) + propio
+
+    diferidos = configuracion()['MODULOS_DIFERIDOS']
+    cargados = sorted({nombre.split('.', 1)[0] for nombre in modulos} & set(diferidos))
+    return {
+        'ms_mediana': tiempos[len(tiempos) // 2],
+        'ms_minimo': tiempos[0],
+        'ms_importaciones': sum(propio for _, propio, _, _ in registros) / 1000,
+        'modulos_cargados': len(modulos),
+        'modulos': [
+            (nombre, propio / 1000) for nombre, propio, _, _ in sorted(registros, key=lambda r: -r[1])[:cantidad]
+        ],
+        'paquetes': sorted(((raiz, us / 1000) for raiz, us in paquetes.items()), key=lambda p: -p[1])[:cantidad],
+        'diferidos_cargados': {modulo: importado_por(registros, modulo) for modulo in cargados},
+    }
+
+
+def verificar(resultado, presupuesto_ms=None):
+    """Lista de problemas del arranque medido (vacía si está dentro de lo esperado)."""
+    if presupuesto_ms is None:
+        presupuesto_ms = configuracion()['PRESUPUESTO_MS']
+    problemas = [
+        f"{modulo} se carga al arrancar ({' → '.join(cadena) or 'importado por el intérprete'})"
+        for modulo, cadena in resultado['diferidos_cargados'].items()
+    ]
+    if resultado['ms_mediana'] > presupuesto_ms:
+        problemas.append(f"el arranque toma {resultado['ms_mediana']:.0f} ms (presupuesto {presupuesto_ms} ms)")
+    return problemas
@@ -0,0 +1,318 @@
+"""
+SUITE DE BENCHMARK DE VISTAS
+============================
+
+Recorre todas las rutas GET de sistemaGestion/urls.py (listas con filtros
+típicos, detalles, formularios, PDF y dashboard) con el cliente de pruebas
+de Django y mide por endpoint:
+
+- latencia p50 / p95 (ms)
+- cantidad de consultas SQL (ver middleware.ContadorConsultas)
+- pico de memoria Python asignada durante el request (tracemalloc)
+
+Los resultados se guardan en JSON para comparar ejecuciones entre commits.
+Se usa desde el comando `benchmark_vistas`.
+
+SEGURIDAD: por defecto se mide en la base de datos de prueba de Django
+(test_<NAME>, creada con las migraciones y destruida al terminar), con datos
+sintéticos. Sobre la base de datos configurada (--bd-actual, pensado para una
+copia de producción) no se generan datos ni se miden las rutas GET que
+escriben. En ambos casos la sesión es de un Administrador temporal con
+contraseña aleatoria que se borra al terminar.
+"""
+
+import json
+import math
+import platform
+import secrets
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+
+from .middleware import ContadorConsultas
+from .models import (
+    Boleta, Cliente, Contrato, Lectura, Medidor, NotificacionLectura, NotificacionPago,
+    Pago, Tarifa, Usuario
+)
+from .urls import app_name, urlpatterns
+
+
+# Rutas que no se miden: requieren POST o cierran la sesión
+RUTAS_EXCLUIDAS = {'login', 'logout', 'marcar_notificacion_revisada', 'solicitar_pdf_boleta'}
+
+# Rutas GET que escriben en la base de datos (encolan trabajos PDF): no se miden con --bd-actual
+RUTAS_CON_ESCRITURA = {'pdf_boleta'}
+
+# Los formularios de alta y edición cargan todas las opciones de sus listas
+# desplegables y con muchos datos tardan minutos: se miden solo si se piden con `prefijos`
+PREFIJOS_FORMULARIO = ('crear_', 'editar_')
+
+# Segundos por endpoint: al superarlos no se repite el request ni se mide la memoria
+TIEMPO_MAXIMO_ENDPOINT = 30
+
+# Modelo del que se toma el id para las rutas con parámetro
+MODELO_POR_PARAMETRO = {
+    'cliente_id': Cliente,
+    'contrato_id': Contrato,
+    'medidor_id': Medidor,
+    'lectura_id': Lectura,
+    'boleta_id': Boleta,
+    'pago_id': Pago,
+    'tarifa_id': Tarifa,
+    'usuario_id': Usuario,
+}
+MODELO_NOTIFICACION = {'lectura': NotificacionLectura, 'pago': NotificacionPago}
+
+PREFIJO_USUARIO_BENCHMARK = 'benchmark_'
+
+
+def filtros_tipicos():
+    """
+    Combinaciones de filtros habituales de cada lista (además de la lista sin filtros).
+    Lecturas y pagos se paginan por cursor, por eso no llevan ?page=.
+    """
+    hoy = date.today()
+    medidor_id = Medidor.objects.order_by('id').values_list('id', flat=True).first()
+    return {
+        'lista_lecturas': [
+            {'periodo': 'mes'},
+            {'año': hoy.year, 'mes': hoy.month},
+            {'medidor': medidor_id or ''},
+        ],
+        'lista_boletas': [
+            {'estado': 'Pendiente'},
+            {'fecha_emision': hoy.replace(day=1).isoformat()},
+            {'monto_min': 10000, 'monto_max': 50000},
+            {'page': 50},
+        ],
+        'lista_pagos': [
+            {'metodo_pago': 'Efectivo'},
+            {'fecha_pago': hoy.replace(day=1).isoformat()},
+        ],
+        'lista_notificaciones': [
+            {'estado': 'pendiente'},
+            {'tipo': 'Pago'},
+            {'page': 20},
+        ],
+        'lista_clientes': [{'numero_cliente': 'CLI-00001'}, {'page': 50}],
+        'lista_contratos': [{'estado': 'Activo'}, {'page': 50}],
+        'lista_medidores': [{'estado_medidor': 'Activo'}, {'page': 50}],
+    }
+
+
+def _nombre_notificacion(nombre_url):
+    for tipo in MODELO_NOTIFICACION:
+        if f'notificacion_{tipo}' in nombre_url:
+            return tipo
+    return None
+
+
+def endpoints(prefijos=None, incluir_escrituras=True):
+    """
+    Retorna la lista de (etiqueta, url, parámetros) a medir, una por ruta GET
+    de la aplicación más una por cada combinación de filtros típica.
+    Con `prefijos` (ej: ('lista_', 'detalle_')) se miden solo esas rutas; sin
+    ellos se omiten los formularios (PREFIJOS_FORMULARIO).
+    """
+    filtros = filtros_tipicos()
+    ids = {
+        parametro: modelo.objects.order_by('id').values_list('id', flat=True).first()
+        for parametro, modelo in MODELO_POR_PARAMETRO.items()
+    }
+    resultado = []
+    vistos = set()
+    for patron in urlpatterns:
+        nombre = patron.name
+        if not nombre or nombre in RUTAS_EXCLUIDAS or nombre in vistos:
+            continue
+        if prefijos and not nombre.startswith(tuple(prefijos)):
+            continue
+        if not prefijos and nombre.startswith(PREFIJOS_FORMULARIO):
+            continue
+        if not incluir_escrituras and nombre in RUTAS_CON_ESCRITURA:
+            continue
+        vistos.add(nombre)
+
+        kwargs = {}
+        for parametro in patron.pattern.converters:
+            if parametro == 'notificacion_id':
+                modelo = MODELO_NOTIFICACION[_nombre_notificacion(nombre)]
+                kwargs[parametro] = modelo.objects.order_by('id').values_list('id', flat=True).first()
+            else:
+                kwargs[parametro] = ids.get(parametro)
+        if any(valor is None for valor in kwargs.values()):
+            continue  # No hay datos para esta ruta
+
+        url = reverse(f'{app_name}:{nombre}', kwargs=kwargs or None)
+        resultado.append((nombre, url, {}))
+        for consulta in filtros.get(nombre, []):
+            etiqueta = nombre + '?' + '&'.join(f'{clave}={valor}' for clave, valor in consulta.items())
+            resultado.append((etiqueta, url, consulta))
+    return resultado
+
+
+def percentil(valores, p):
+    """Percentil por el método del rango más cercano."""
+    ordenados = sorted(valores)
+    posicion = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[posicion]
+
+
+@contextmanager
+def base_de_datos_de_prueba():
+    """
+    Crea la base de datos de prueba (test_<NAME>, con las migraciones) y la
+    destruye al salir. Mientras tanto los PDF se guardan en un directorio
+    temporal, no en la caché real (los id de boleta se repiten).
+    """
+    configuracion_anterior = setup_databases(verbosity=0, interactive=False, aliases={'default'}, serialized_aliases=set())
+    try:
+        with tempfile.TemporaryDirectory() as directorio, override_settings(
+            CACHE_PDF_BOLETAS={**getattr(settings, 'CACHE_PDF_BOLETAS', {}), 'DIRECTORIO': directorio}
+        ):
+            yield
+    finally:
+        teardown_databases(configuracion_anterior, verbosity=0)
+
+
+@contextmanager
+def cliente_http():
+    """
+    Cliente de pruebas con sesión iniciada como un Administrador temporal
+    (nombre y contraseña aleatorios). Al salir se cierra la sesión y se borra el usuario.
+    """
+    usuario = Usuario.objects.create(
+        username=PREFIJO_USUARIO_BENCHMARK + secrets.token_hex(6),
+        password=secrets.token_urlsafe(32),
+        email='benchmark@localhost',
+        telefono='+56900000000',
+        rol='Administrador',
+    )
+    host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+    cliente = Client(HTTP_HOST=host)
+    try:
+        cliente.post(reverse(f'{app_name}:login'), {'username': usuario.username, 'password': usuario.password})
+        yield cliente
+    finally:
+        cliente.logout()
+        usuario.delete()
+
+
+def _solicitar(cliente, url, consulta):
+    """GET completo: las respuestas en streaming (exportaciones CSV) se leen hasta el final."""
+    response = cliente.get(url, consulta)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def medir_endpoint(cliente, url, consulta, repeticiones, tiempo_maximo=TIEMPO_MAXIMO_ENDPOINT):
+    """
+    Ejecuta el GET `repeticiones` veces y retorna las métricas del endpoint.
+    La memoria se mide en un request adicional, porque tracemalloc
+    distorsiona la latencia. Si el endpoint ya tomó más de `tiempo_maximo`
+    segundos se deja de repetir, no se mide la memoria y queda como truncado.
+    """
+    latencias = []
+    consultas = 0
+    estado = None
+    for _ in range(repeticiones):
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with contador.registrar():
+            response = _solicitar(cliente, url, consulta)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        consultas = max(consultas, contador.cantidad)
+        estado = response.status_code
+        if sum(latencias) > tiempo_maximo * 1000:
+            break
+
+    truncado = len(latencias) < repeticiones or sum(latencias) > tiempo_maximo * 1000
+    pico_memoria = None
+    if not truncado:
+        tracemalloc.start()
+        try:
+            _solicitar(cliente, url, consulta)
+            pico_memoria = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        'url': url,
+        'parametros': consulta,
+        'estado_http': estado,
+        'p50_ms': round(statistics.median(latencias), 2),
+        'p95_ms': round(percentil(latencias, 95), 2),
+        'consultas': consultas,
+        'memoria_pico_kb': round(pico_memoria / 1024, 1) if pico_memoria is not None else None,
+        'truncado': truncado,
+    }
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar_benchmark(repeticiones=5, etiqueta_escala=None, progreso=None, prefijos=None,
+                       bd_prueba=True, tiempo_maximo=TIEMPO_MAXIMO_ENDPOINT):
+    """
+    Mide todos los endpoints y retorna el diccionario de resultados.
+    Con bd_prueba=False (base de datos real) se omiten RUTAS_CON_ESCRITURA.
+    """
+    resultados = {}
+    with cliente_http() as cliente:
+        for etiqueta, url, consulta in endpoints(prefijos, incluir_escrituras=bd_prueba):
+            resultados[etiqueta] = medir_endpoint(cliente, url, consulta, repeticiones, tiempo_maximo)
+            if progreso:
+                progreso(etiqueta, resultados[etiqueta])
+    return {
+        'commit': commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'motor_bd': settings.DATABASES['default']['ENGINE'],
+        'escala': etiqueta_escala,
+        'bd_prueba': bd_prueba,
+        'filas': {
+            'lecturas': Lectura.objects.count(),
+            'boletas': Boleta.objects.count(),
+            'pagos': Pago.objects.count(),
+        },
+        'repeticiones': repeticiones,
+        'endpoints': resultados,
+    }
+
+
+def comparar(anterior, actual):
+    """
+    Compara dos ejecuciones (mismo formato JSON) y retorna una lista de
+    (endpoint, p95 anterior, p95 actual, variación %, consultas anterior, consultas actual).
+    """
+    filas = []
+    for etiqueta, metricas in actual['endpoints'].items():
+        previo = anterior['endpoints'].get(etiqueta)
+        if not previo:
+            continue
+        variacion = ((metricas['p95_ms'] - previo['p95_ms']) / previo['p95_ms'] * 100) if previo['p95_ms'] else 0.0
+        filas.append((etiqueta, previo['p95_ms'], metricas['p95_ms'], variacion,
+                      previo['consultas'], metricas['consultas']))
+    return filas
+
+
+def guardar_json(datos, ruta):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
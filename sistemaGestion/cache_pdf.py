@@ -0,0 +1,217 @@
+"""
+CACHÉ EN DISCO DE LOS PDF DE BOLETAS
+====================================
+
+Una boleta se descarga muchas veces (cliente, call center) y cada descarga
+volvía a ejecutar xhtml2pdf. Los PDF generados se guardan en disco y una
+descarga repetida solo lee el archivo.
+
+CLAVE: id de la boleta + versión, un hash (SHA-256) de todo lo que se dibuja
+en el PDF: campos de la boleta, lectura, medidor, contrato, cliente, tarifa,
+pagos y el template. Si cualquiera cambia, la versión cambia y el PDF se
+vuelve a generar; no hace falta recordar qué modificaciones afectan a cuál
+boleta. La fecha de generación impresa es la de la primera descarga.
+
+ESTRUCTURA: <DIRECTORIO>/<boleta_id>/<version>.pdf
+
+- Los archivos se escriben con otro nombre y se renombran (os.replace): una
+  lectura concurrente nunca ve un PDF a medias
+- Al guardar una versión nueva se borran las anteriores de la misma boleta
+- Al registrar o eliminar un pago (signals.py, conciliacion.py) se borran
+  los PDF de su boleta
+- LRU: cada acierto actualiza la fecha de modificación del archivo; si el
+  directorio supera TAMANO_MAXIMO_MB se borran los menos usados hasta quedar
+  en el 90 % del límite. Revisar el tamaño recorre todas las carpetas, así que
+  no se hace en cada guardado: lo hace el ciclo de mantenimiento del worker
+  (trabajos_pdf.trabajar) y cada proceso cada PODAR_CADA_ESCRITURAS PDF
+  guardados; entre revisiones la caché puede pasar un poco el límite
+
+CONFIGURACIÓN (settings.CACHE_PDF_BOLETAS): DIRECTORIO, TAMANO_MAXIMO_MB,
+PODAR_CADA_ESCRITURAS.
+Con DIRECTORIO vacío (None) la caché queda desactivada.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.template.loader import get_template
+
+
+CONFIGURACION_POR_DEFECTO = {
+    'DIRECTORIO': None,
+    'TAMANO_MAXIMO_MB': 500,
+    'PODAR_CADA_ESCRITURAS': 100,
+}
+FRACCION_TRAS_PODAR = 0.9
+
+# PDF guardados por este proceso desde la última poda
+_escrituras = 0
+
+# Campos de cada objeto del contexto que se dibujan en reportes/boleta_pdf.html
+CAMPOS_VERSION = {
+    'boleta': ('id', 'fecha_emision', 'fecha_vencimiento', 'monto_total', 'consumo_energetico',
+               'estado', 'total_pagado', 'saldo_pendiente'),
+    'lectura': ('fecha_lectura', 'lectura_actual', 'tipo_lectura'),
+    'medidor': ('numero_medidor', 'ubicacion'),
+    'contrato': ('numero_contrato',),
+    'cliente': ('nombre', 'numero_cliente', 'email', 'telefono'),
+    'tarifa': ('tipo_tarifa', 'tipo_cliente', 'precio'),
+}
+CAMPOS_PAGO = ('id', 'fecha_pago', 'metodo_pago', 'numero_referencia', 'monto_pagado')
+
+
+def configuracion():
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'CACHE_PDF_BOLETAS', {})}
+
+
+def _directorio():
+    directorio = configuracion()['DIRECTORIO']
+    return os.fspath(directorio) if directorio else None
+
+
+def _firma_template(nombre_template):
+    """Ruta y fecha de modificación del template: editarlo cambia la versión."""
+    origen = get_template(nombre_template).origin.name
+    try:
+        return [origen, os.path.getmtime(origen)]
+    except (OSError, TypeError):
+        return [origen]
+
+
+def version_boleta(contexto, nombre_template):
+    """Hash de los datos del contexto que aparecen en el PDF (ver CAMPOS_VERSION)."""
+    datos = {
+        clave: [getattr(contexto[clave], campo) for campo in campos] if contexto.get(clave) else None
+        for clave, campos in CAMPOS_VERSION.items()
+    }
+    datos['pagos'] = [[getattr(pago, campo) for campo in CAMPOS_PAGO] for pago in contexto['pagos']]
+    datos['template'] = _firma_template(nombre_template)
+    serializado = json.dumps(datos, default=str, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(serializado).hexdigest()[:32]
+
+
+def habilitada():
+    """False si la caché está desactivada (DIRECTORIO vacío)."""
+    return bool(_directorio())
+
+
+def _ruta(boleta_id, version):
+    return os.path.join(_directorio(), str(boleta_id), f'{version}.pdf')
+
+
+def obtener(boleta_id, version):
+    """Contenido del PDF guardado para esa versión, o None si no está (o la caché está desactivada)."""
+    if not _directorio():
+        return None
+    ruta = _ruta(boleta_id, version)
+    try:
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        os.utime(ruta)  # Marca de uso para el LRU
+    except OSError:
+        return None
+    return contenido
+
+
+def existe(boleta_id, version):
+    """True si el PDF de esa versión está en la caché (sin leerlo)."""
+    return bool(_directorio()) and os.path.isfile(_ruta(boleta_id, version))
+
+
+def guardar(boleta_id, version, contenido):
+    """Guarda el PDF, borra las versiones anteriores de la boleta y cada PODAR_CADA_ESCRITURAS poda la caché."""
+    global _escrituras
+    if not _directorio():
+        return
+    ruta = _ruta(boleta_id, version)
+    carpeta = os.path.dirname(ruta)
+    os.makedirs(carpeta, exist_ok=True)
+    temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+    for nombre in os.listdir(carpeta):
+        if nombre != os.path.basename(ruta) and nombre.endswith('.pdf'):
+            _borrar(os.path.join(carpeta, nombre))
+
+    _escrituras += 1
+    if _escrituras >= configuracion()['PODAR_CADA_ESCRITURAS']:
+        _escrituras = 0
+        podar()
+
+
+def invalidar(boleta_ids):
+    """Borra los PDF guardados de las boletas indicadas."""
+    directorio = _directorio()
+    if not directorio:
+        return
+    for boleta_id in boleta_ids:
+        if boleta_id:
+            shutil.rmtree(os.path.join(directorio, str(boleta_id)), ignore_errors=True)
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass  # Otro proceso ya lo borró
+
+
+def _archivos():
+    """Lista de (última vez usado, tamaño, ruta) de los PDF en caché."""
+    archivos = []
+    with os.scandir(_directorio()) as carpetas:
+        for carpeta in carpetas:
+            if not carpeta.is_dir():
+                continue
+            with os.scandir(carpeta.path) as entradas:
+                for entrada in entradas:
+                    try:
+                        datos = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    archivos.append((datos.st_mtime, datos.st_size, entrada.path))
+    return archivos
+
+
+def uso():
+    """
+    retorna:
+        dict: archivos, bytes, tamano_maximo (bytes)
+    """
+    maximo = configuracion()['TAMANO_MAXIMO_MB'] * 1024 * 1024
+    if not _directorio() or not os.path.isdir(_directorio()):
+        return {'archivos': 0, 'bytes': 0, 'tamano_maximo': maximo}
+    archivos = _archivos()
+    return {'archivos': len(archivos), 'bytes': sum(tamano for _, tamano, _ in archivos), 'tamano_maximo': maximo}
+
+
+def podar(tamano_maximo=None):
+    """
+    Borra los PDF menos usados si la caché supera el tamaño máximo.
+
+    retorna:
+        int: Cantidad de archivos borrados
+    """
+    if not _directorio() or not os.path.isdir(_directorio()):
+        return 0
+    if tamano_maximo is None:
+        tamano_maximo = configuracion()['TAMANO_MAXIMO_MB'] * 1024 * 1024
+    archivos = _archivos()
+    total = sum(tamano for _, tamano, _ in archivos)
+    if total <= tamano_maximo:
+        return 0
+    objetivo = tamano_maximo * FRACCION_TRAS_PODAR
+    borrados = 0
+    for _, tamano, ruta in sorted(archivos):
+        if total <= objetivo:
+            break
+        _borrar(ruta)
+        total -= tamano
+        borrados += 1
+    return borrados
@@ -0,0 +1,121 @@
+"""
+BOLETAS VENCIDAS Y AVISOS DE COBRANZA
+=====================================
+
+Proceso programado (comando `marcar_vencidas`, una vez al día) que:
+
+1. Marca como 'Vencido' las boletas con saldo cuya fecha_vencimiento ya
+   pasó, con UN UPDATE sobre el rango de fecha_vencimiento (índice
+   boleta_vencimiento_idx). Las que ya estaban vencidas no se vuelven a escribir.
+2. Crea un aviso de cobranza (NotificacionPago con tipo_aviso='vencimiento')
+   por cada boleta vencida que aún no lo tiene. Las boletas se recorren una
+   sola vez, por lotes de id, con la deuda y el cliente en la misma consulta;
+   los avisos de cada lote se guardan con bulk_create. Si la boleta tiene
+   pagos parciales, el aviso queda asociado al último pago.
+
+Volver a ejecutarlo no duplica avisos: la restricción única (boleta,
+tipo_aviso) y el filtro de la consulta dejan a lo más un aviso por boleta.
+Cuando la boleta se paga, las señales de Pago la sacan de 'Vencido'
+(Boleta.recalcular_estados).
+"""
+
+import time
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+
+from .estadisticas import invalidar_estadisticas_boletas
+from .models import Boleta, NotificacionPago, Pago
+
+
+TAMANO_LOTE = 5000
+TIPO_AVISO = 'vencimiento'
+CAMPO_CLIENTE = 'lectura__medidor__contrato__cliente'
+
+
+def boletas_vencidas(hoy=None):
+    """Boletas con saldo cuya fecha de vencimiento es anterior a `hoy`."""
+    return Boleta.objects.filter(
+        fecha_vencimiento__lt=hoy or date.today(),
+        total_pagado__lt=F('monto_total'),
+    )
+
+
+def _texto_aviso(fila):
+    texto = (
+        f"Boleta {fila['pk']} vencida el {fila['fecha_vencimiento']:%d/%m/%Y}: "
+        f"saldo pendiente ${fila['saldo_pendiente']:,} de ${fila['monto_total']:,}"
+    )
+    if fila['cliente_nombre']:
+        texto += f" - Cliente {fila['cliente_nombre']} ({fila['cliente_numero']})"
+    return texto[:500]
+
+
+def marcar_vencidas(hoy=None, solo_verificar=False, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Marca las boletas vencidas y crea los avisos de cobranza que faltan.
+
+    parámetros:
+        solo_verificar: solo cuenta, sin modificar boletas ni crear avisos
+        progreso: función opcional que recibe el resumen parcial tras cada lote
+
+    retorna:
+        dict: marcadas, avisos_creados, segundos
+    """
+    hoy = hoy or date.today()
+    inicio = time.monotonic()
+    vencidas = boletas_vencidas(hoy)
+    por_marcar = vencidas.exclude(estado='Vencido')
+    resumen = {'marcadas': 0, 'avisos_creados': 0}
+
+    if solo_verificar:
+        resumen['marcadas'] = por_marcar.count()
+    else:
+        resumen['marcadas'] = por_marcar.update(estado='Vencido')
+        if resumen['marcadas']:
+            invalidar_estadisticas_boletas()
+
+    ultimo_pago = Pago.objects.filter(boleta=OuterRef('pk')).order_by('-fecha_pago', '-pk').values('pk')[:1]
+    sin_aviso = (
+        vencidas
+        .filter(~Exists(NotificacionPago.objects.filter(boleta=OuterRef('pk'), tipo_aviso=TIPO_AVISO)))
+        .annotate(
+            ultimo_pago_id=Subquery(ultimo_pago),
+            cliente_nombre=F(f'{CAMPO_CLIENTE}__nombre'),
+            cliente_numero=F(f'{CAMPO_CLIENTE}__numero_cliente'),
+        )
+        .order_by('pk')
+        .values('pk', 'fecha_vencimiento', 'monto_total', 'saldo_pendiente',
+                'ultimo_pago_id', 'cliente_nombre', 'cliente_numero')
+    )
+
+    ultimo_id = 0
+    while True:
+        lote = list(sin_aviso.filter(pk__gt=ultimo_id)[:tamano_lote])
+        if not lote:
+            break
+        ultimo_id = lote[-1]['pk']
+        if solo_verificar:
+            resumen['avisos_creados'] += len(lote)
+        else:
+            # ignore_conflicts: otra ejecución simultánea pudo crear el mismo aviso; como no
+            # informa qué filas omitió, los creados se cuentan antes y después del INSERT
+            avisos_del_lote = NotificacionPago.objects.filter(boleta_id__in=[fila['pk'] for fila in lote], tipo_aviso=TIPO_AVISO)
+            with transaction.atomic():
+                existentes = avisos_del_lote.count()
+                NotificacionPago.objects.bulk_create(
+                    [
+                        NotificacionPago(boleta_id=fila['pk'], pago_id=fila['ultimo_pago_id'],
+                                         tipo_aviso=TIPO_AVISO, deuda_pendiente=_texto_aviso(fila))
+                        for fila in lote
+                    ],
+                    batch_size=1000,
+                    ignore_conflicts=True,
+                )
+                resumen['avisos_creados'] += avisos_del_lote.count() - existentes
+        if progreso:
+            progreso(resumen)
+
+    resumen['segundos'] = time.monotonic() - inicio
+    return resumen
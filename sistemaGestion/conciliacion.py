@@ -0,0 +1,279 @@
+"""
+CONCILIACIÓN DE PAGOS BANCARIOS
+===============================
+
+Registra los pagos de la cartola diaria del banco o del procesador de pagos
+(CSV) y los asocia a sus boletas, en lugar de digitarlos uno a uno.
+
+COLUMNAS: numero_referencia, fecha_pago (AAAA-MM-DD), monto_pagado,
+          boleta (id: "123" o "BOL-123"; otro texto no se interpreta) o numero_cliente
+          (se abona a la boleta impaga más antigua del cliente),
+          metodo_pago (opcional, Transferencia por defecto)
+
+RESULTADO DE CADA FILA:
+- conciliado: pago registrado contra su boleta
+- exceso: pago registrado que supera el saldo de la boleta (pago en exceso)
+- sin_coincidencia: no se encontró la boleta ni una boleta impaga del cliente
+- duplicado: la referencia ya existe (en la base de datos o antes en el archivo)
+- rechazado: datos inválidos (mismas reglas que PagoForm)
+
+FLUJO:
+- Las referencias existentes se cargan UNA vez en un set; cada referencia se
+  compara contra él en memoria (no una consulta por pago como en PagoForm)
+- El archivo se procesa por lotes: las boletas y clientes de cada lote se
+  resuelven con una consulta cada uno y los saldos quedan en memoria, así
+  varios pagos de la misma boleta en el archivo se aplican en orden
+- Los pagos se guardan con bulk_create y, en la misma transacción, las boletas
+  afectadas se actualizan en SQL: total_pagado/saldo_pendiente
+  (Boleta.recalcular_totales) y estado (Boleta.recalcular_estados)
+- Un CSV mal formado detiene el proceso con ErrorImportacion (igual que en
+  importacion.py); los lotes anteriores ya quedaron registrados y reenviar la
+  cartola corregida los informa como duplicados
+"""
+
+import re
+import time
+from datetime import date
+from itertools import islice
+
+from django.db import transaction
+
+from . import cache_pdf
+from .contadores import incrementar_contador
+from .estadisticas import invalidar_estadisticas_boletas
+from .importacion import ErrorImportacion, abrir_csv, filas_csv
+from .models import Boleta, Pago
+
+
+TAMANO_LOTE = 5000
+METODO_POR_DEFECTO = 'Transferencia'
+RESULTADOS = ('conciliado', 'exceso', 'sin_coincidencia', 'duplicado', 'rechazado')
+
+# Id de boleta completo, con o sin prefijo. No se buscan dígitos dentro de un texto
+# libre: "Pago 2025-10" no es la boleta 10
+FORMATO_BOLETA = re.compile(r'(?:BOL-)?(\d+)', re.IGNORECASE)
+
+LARGO_REFERENCIA = Pago._meta.get_field('numero_referencia').max_length
+CAMPO_CLIENTE = 'lectura__medidor__contrato__cliente__numero_cliente'
+
+# Acepta el valor o la etiqueta de cada método (ej: 'Tarjeta de Débito')
+METODOS_PAGO = {
+    texto.lower(): valor
+    for valor, etiqueta in Pago.METODOPAGO_CHOICES
+    for texto in (valor, etiqueta)
+}
+
+
+def leer_filas(archivo):
+    """Generador de (número de línea, fila) de la cartola CSV."""
+    lector = abrir_csv(archivo)
+    columnas = lector.fieldnames or []
+    faltantes = [columna for columna in ('numero_referencia', 'fecha_pago', 'monto_pagado') if columna not in columnas]
+    if 'boleta' not in columnas and 'numero_cliente' not in columnas:
+        faltantes.append('boleta o numero_cliente')
+    if faltantes:
+        raise ErrorImportacion(f"Faltan columnas en el encabezado: {', '.join(faltantes)}")
+    yield from filas_csv(lector)
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def _id_boleta(valor):
+    coincidencia = FORMATO_BOLETA.fullmatch(_texto(valor))
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+class Conciliador:
+    """
+    Estado de una conciliación: referencias ya usadas y saldos en memoria de
+    las boletas tocadas, para aplicar los pagos del archivo en orden.
+    """
+
+    def __init__(self, metodo_por_defecto=METODO_POR_DEFECTO, hoy=None):
+        self.metodo_por_defecto = metodo_por_defecto
+        self.hoy = hoy or date.today()
+        self.referencias = set(Pago.objects.values_list('numero_referencia', flat=True).iterator(chunk_size=10000))
+        self.saldos = {}             # boleta_id → saldo pendiente
+        self.impagas_cliente = {}    # numero_cliente → [boleta_id, ...] de la más antigua a la más nueva
+
+    def _cargar_boletas(self, ids):
+        faltantes = {boleta_id for boleta_id in ids if boleta_id not in self.saldos}
+        if faltantes:
+            self.saldos.update(Boleta.objects.filter(pk__in=faltantes).values_list('pk', 'saldo_pendiente'))
+
+    def _cargar_clientes(self, numeros):
+        faltantes = {numero for numero in numeros if numero not in self.impagas_cliente}
+        if not faltantes:
+            return
+        for numero in faltantes:
+            self.impagas_cliente[numero] = []
+        filas = (
+            Boleta.objects
+            .filter(**{f'{CAMPO_CLIENTE}__in': faltantes}, saldo_pendiente__gt=0)
+            .order_by('fecha_emision', 'pk')
+            .values_list(CAMPO_CLIENTE, 'pk', 'saldo_pendiente')
+        )
+        for numero, boleta_id, saldo in filas:
+            self.impagas_cliente[numero].append(boleta_id)
+            self.saldos.setdefault(boleta_id, saldo)
+
+    def _boleta_del_cliente(self, numero):
+        """Boleta impaga más antigua del cliente según los saldos en memoria."""
+        pendientes = self.impagas_cliente.get(numero, [])
+        while pendientes and self.saldos[pendientes[0]] <= 0:
+            pendientes.pop(0)
+        return pendientes[0] if pendientes else None
+
+    def conciliar_lote(self, filas):
+        """
+        Clasifica un lote de (número de línea, fila) y arma los pagos a crear.
+
+        retorna:
+            (pagos sin guardar, lista de dict de reporte por fila)
+        """
+        datos = [fila for _, fila in filas]
+        self._cargar_boletas({_id_boleta(fila.get('boleta')) for fila in datos} - {None})
+        self._cargar_clientes({_texto(fila.get('numero_cliente')) for fila in datos if not _texto(fila.get('boleta'))} - {''})
+
+        pagos = []
+        reporte = []
+        for numero_linea, fila in filas:
+            referencia = _texto(fila.get('numero_referencia'))
+            entrada = {'linea': numero_linea, 'numero_referencia': referencia, 'boleta': None,
+                       'monto_pagado': None, 'resultado': 'rechazado', 'detalle': ''}
+            reporte.append(entrada)
+
+            errores = []
+            try:
+                fecha_pago = date.fromisoformat(_texto(fila.get('fecha_pago')))
+            except ValueError:
+                fecha_pago = None
+                errores.append('Fecha de pago inválida (use AAAA-MM-DD).')
+            if fecha_pago and fecha_pago > self.hoy:
+                errores.append('La fecha de pago no puede ser futura.')
+            try:
+                monto = int(_texto(fila.get('monto_pagado')))
+            except ValueError:
+                monto = None
+            if monto is None or monto <= 0:
+                errores.append('El monto pagado debe ser un entero mayor a cero.')
+            if not referencia:
+                errores.append('Falta numero_referencia.')
+            elif len(referencia) > LARGO_REFERENCIA:
+                errores.append(f'El número de referencia supera {LARGO_REFERENCIA} caracteres.')
+            texto_metodo = _texto(fila.get('metodo_pago'))
+            metodo = METODOS_PAGO.get(texto_metodo.lower()) if texto_metodo else self.metodo_por_defecto
+            if metodo is None:
+                errores.append(f'Método de pago inválido: {texto_metodo}')
+            if errores:
+                entrada['detalle'] = ' '.join(errores)
+                continue
+            entrada['monto_pagado'] = monto
+
+            if referencia in self.referencias:
+                entrada['resultado'] = 'duplicado'
+                entrada['detalle'] = 'Ya existe un pago con este número de referencia.'
+                continue
+
+            texto_boleta = _texto(fila.get('boleta'))
+            if texto_boleta:
+                boleta_id = _id_boleta(texto_boleta)
+                if boleta_id is None:
+                    entrada['resultado'] = 'sin_coincidencia'
+                    entrada['detalle'] = f'"{texto_boleta}" no es un número de boleta (use 123 o BOL-123).'
+                    continue
+                if boleta_id not in self.saldos:
+                    entrada['resultado'] = 'sin_coincidencia'
+                    entrada['detalle'] = f'La boleta {texto_boleta} no existe.'
+                    continue
+            else:
+                numero_cliente = _texto(fila.get('numero_cliente'))
+                boleta_id = self._boleta_del_cliente(numero_cliente)
+                if boleta_id is None:
+                    entrada['resultado'] = 'sin_coincidencia'
+                    entrada['detalle'] = f'El cliente {numero_cliente or "(vacío)"} no tiene boletas con saldo pendiente.'
+                    continue
+
+            saldo = self.saldos[boleta_id]
+            self.saldos[boleta_id] = saldo - monto
+            self.referencias.add(referencia)
+            entrada['boleta'] = boleta_id
+            if monto > saldo:
+                entrada['resultado'] = 'exceso'
+                entrada['detalle'] = f'Pago en exceso de ${monto - max(saldo, 0):,} (saldo previo ${saldo:,}).'
+            else:
+                entrada['resultado'] = 'conciliado'
+            pagos.append(Pago(
+                boleta_id=boleta_id,
+                fecha_pago=fecha_pago,
+                monto_pagado=monto,
+                metodo_pago=metodo,
+                numero_referencia=referencia,
+                estado_pago='Pagado' if monto >= saldo else 'No pagado completamente',
+            ))
+        return pagos, reporte
+
+
+def guardar_pagos(pagos, tamano_lote=TAMANO_LOTE):
+    """
+    Crea los pagos y actualiza totales y estado de sus boletas en SQL
+    (bulk_create no emite las señales de Pago); borra los PDF en caché de
+    esas boletas.
+    """
+    if not pagos:
+        return
+    boleta_ids = {pago.boleta_id for pago in pagos}
+    with transaction.atomic():
+        Pago.objects.bulk_create(pagos, batch_size=tamano_lote)
+        Boleta.recalcular_totales(boleta_ids)
+        Boleta.recalcular_estados(boleta_ids)
+        incrementar_contador('pagos_realizados', sum(1 for pago in pagos if pago.estado_pago == 'Pagado'))
+    cache_pdf.invalidar(boleta_ids)
+
+
+def conciliar_pagos(archivo, tamano_lote=TAMANO_LOTE, metodo_por_defecto=METODO_POR_DEFECTO,
+                    solo_verificar=False, reportar=None, progreso=None):
+    """
+    Concilia la cartola CSV abierta en `archivo`.
+
+    parámetros:
+        solo_verificar: clasifica las filas sin registrar pagos
+        reportar: función opcional que recibe el dict de reporte de cada fila
+            (linea, numero_referencia, boleta, monto_pagado, resultado, detalle)
+        progreso: función opcional que recibe el resumen parcial tras cada lote
+
+    retorna:
+        dict: leidas, un contador por resultado (ver RESULTADOS),
+              monto_conciliado, boletas_afectadas, segundos
+    """
+    resumen = {'leidas': 0, **{resultado: 0 for resultado in RESULTADOS}, 'monto_conciliado': 0}
+    boletas_afectadas = set()
+    conciliador = Conciliador(metodo_por_defecto)
+    inicio = time.monotonic()
+    filas = leer_filas(archivo)
+
+    while True:
+        lote = list(islice(filas, tamano_lote))
+        if not lote:
+            break
+        pagos, reporte = conciliador.conciliar_lote(lote)
+        if not solo_verificar:
+            guardar_pagos(pagos, tamano_lote)
+
+        resumen['leidas'] += len(lote)
+        resumen['monto_conciliado'] += sum(pago.monto_pagado for pago in pagos)
+        boletas_afectadas.update(pago.boleta_id for pago in pagos)
+        for entrada in reporte:
+            resumen[entrada['resultado']] += 1
+            if reportar:
+                reportar(entrada)
+        if progreso:
+            progreso(resumen)
+
+    if boletas_afectadas and not solo_verificar:
+        invalidar_estadisticas_boletas()
+    resumen['boletas_afectadas'] = len(boletas_afectadas)
+    resumen['segundos'] = time.monotonic() - inicio
+    return resumen
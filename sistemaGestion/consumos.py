@@ -0,0 +1,134 @@
+"""
+DERIVACIÓN DEL CONSUMO DE LAS LECTURAS
+======================================
+
+El consumo_energetico de una lectura es la diferencia entre su lectura_actual
+y la de la lectura anterior del mismo medidor (ver Lectura.consumo_entre para
+la vuelta de contador). Lectura.save() lo deriva al guardar de a una; este
+módulo cubre las escrituras masivas:
+
+- derivar_consumos_lote(): para lecturas nuevas antes de un bulk_create
+  (importación). El último registro de cada medidor se obtiene con UNA consulta.
+- recalcular_consumos(): recalcula el historial completo de los medidores con
+  la función de ventana LAG(lectura_actual) OVER (PARTITION BY medidor
+  ORDER BY fecha, id), por bloques de medidores y con bulk_update solo de las
+  filas que cambian. Se usa desde el comando `recalcular_consumos`.
+
+La primera lectura de cada medidor conserva el consumo registrado, porque no
+hay un valor anterior con el que compararla.
+"""
+
+import time
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Window
+from django.db.models.functions import Lag
+
+from .models import Boleta, Lectura, Medidor
+
+
+TAMANO_LOTE_MEDIDORES = 500
+
+
+def ultimos_registros(medidor_ids):
+    """
+    Retorna {medidor_id: (fecha_lectura, lectura_actual)} de la última lectura
+    guardada de cada medidor, con una sola consulta.
+    """
+    ultima = Lectura.objects.filter(medidor_id=OuterRef('pk')).order_by('-fecha_lectura', '-pk')
+    filas = (
+        Medidor.objects
+        .filter(pk__in=medidor_ids)
+        .annotate(
+            fecha_ultima=Subquery(ultima.values('fecha_lectura')[:1]),
+            registro_ultimo=Subquery(ultima.values('lectura_actual')[:1]),
+        )
+        .filter(fecha_ultima__isnull=False)
+        .order_by()
+        .values_list('pk', 'fecha_ultima', 'registro_ultimo')
+    )
+    return {medidor_id: (fecha, registro) for medidor_id, fecha, registro in filas}
+
+
+def derivar_consumos_lote(lecturas):
+    """
+    Asigna consumo_energetico a una lista de lecturas sin guardar, encadenando
+    cada una con la anterior del mismo medidor (en el lote o en la base de datos).
+
+    retorna:
+        set: medidores con lecturas anteriores a su última lectura guardada;
+             su historial debe recalcularse después de insertar
+    """
+    ultimos = ultimos_registros({lectura.medidor_id for lectura in lecturas})
+    fuera_de_orden = set()
+    ordenadas = sorted(lecturas, key=lambda lectura: (lectura.medidor_id, lectura.fecha_lectura))
+    for medidor_id, grupo in groupby(ordenadas, key=lambda lectura: lectura.medidor_id):
+        fecha_ultima, registro_anterior = ultimos.get(medidor_id, (None, None))
+        for lectura in grupo:
+            if fecha_ultima is not None and lectura.fecha_lectura < fecha_ultima:
+                fuera_de_orden.add(medidor_id)
+            consumo = Lectura.consumo_entre(registro_anterior, lectura.lectura_actual)
+            if consumo is not None:
+                lectura.consumo_energetico = consumo
+            elif lectura.consumo_energetico is None:
+                lectura.consumo_energetico = 0
+            registro_anterior = lectura.lectura_actual
+    return fuera_de_orden
+
+
+def recalcular_consumos(medidor_ids=None, solo_verificar=False, tamano_lote=TAMANO_LOTE_MEDIDORES, progreso=None):
+    """
+    Recalcula el consumo de todas las lecturas de los medidores indicados
+    (o de todos) a partir de la lectura anterior de cada uno.
+
+    retorna:
+        dict: revisadas, modificadas, con_boleta (lecturas modificadas que ya
+              tienen boleta emitida), segundos
+    """
+    resumen = {'revisadas': 0, 'modificadas': 0, 'con_boleta': 0}
+    inicio = time.monotonic()
+    medidores = Medidor.objects.order_by('pk').values_list('pk', flat=True)
+    if medidor_ids is not None:
+        medidores = medidores.filter(pk__in=medidor_ids)
+
+    ultimo_id = 0
+    while True:
+        bloque = list(medidores.filter(pk__gt=ultimo_id)[:tamano_lote])
+        if not bloque:
+            break
+        ultimo_id = bloque[-1]
+
+        filas = (
+            Lectura.objects
+            .filter(medidor_id__in=bloque)
+            .annotate(registro_anterior=Window(
+                Lag('lectura_actual'),
+                partition_by=[F('medidor_id')],
+                order_by=[F('fecha_lectura').asc(), F('pk').asc()],
+            ))
+            .order_by()
+            .values_list('pk', 'lectura_actual', 'registro_anterior', 'consumo_energetico')
+        )
+        cambios = []
+        for pk, registro, registro_anterior, consumo in filas.iterator(chunk_size=5000):
+            resumen['revisadas'] += 1
+            nuevo = Lectura.consumo_entre(registro_anterior, registro)
+            if nuevo is not None and nuevo != consumo:
+                cambios.append(Lectura(pk=pk, consumo_energetico=nuevo))
+
+        if cambios:
+            resumen['modificadas'] += len(cambios)
+            ids = [lectura.pk for lectura in cambios]
+            resumen['con_boleta'] += sum(
+                Boleta.objects.filter(lectura_id__in=ids[desde:desde + 5000]).count()
+                for desde in range(0, len(ids), 5000)
+            )
+            if not solo_verificar:
+                with transaction.atomic():
+                    Lectura.objects.bulk_update(cambios, ['consumo_energetico'], batch_size=1000)
+        if progreso:
+            progreso(resumen)
+
+    resumen['segundos'] = time.monotonic() - inicio
+    return resumen
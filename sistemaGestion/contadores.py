@@ -0,0 +1,67 @@
+"""
+CONTADORES DEL DASHBOARD
+========================
+
+Los KPIs del dashboard se guardan en la tabla ContadorDashboard y se leen
+con una sola consulta. Las señales (signals.py) los incrementan o
+decrementan en cada alta/baja; las escrituras masivas que no emiten señales
+llaman a incrementar_contador() directamente, y `reconciliar_contadores`
+los recalcula con COUNT(*) como respaldo periódico.
+"""
+
+from django.db.models import F
+
+from .models import Boleta, Cliente, ContadorDashboard, Contrato, Lectura, Medidor, Pago
+
+
+# nombre del contador → función que retorna el queryset a contar al reconciliar
+CONTADORES = {
+    'total_clientes': lambda: Cliente.objects.all(),
+    'total_contratos': lambda: Contrato.objects.all(),
+    'total_medidores': lambda: Medidor.objects.all(),
+    'lecturas_pendientes': lambda: Lectura.objects.all(),
+    'boletas_emitidas': lambda: Boleta.objects.all(),
+    'pagos_realizados': lambda: Pago.objects.filter(estado_pago='Pagado'),
+}
+
+# Contador asociado a cada modelo cuyas altas/bajas se cuentan directamente
+CONTADOR_POR_MODELO = {
+    Cliente: 'total_clientes',
+    Contrato: 'total_contratos',
+    Medidor: 'total_medidores',
+    Lectura: 'lecturas_pendientes',
+    Boleta: 'boletas_emitidas',
+}
+
+
+def reconciliar_contador(nombre):
+    """
+    Recalcula un contador con COUNT(*) y lo guarda. Retorna el valor.
+    """
+    valor = CONTADORES[nombre]().order_by().count()
+    ContadorDashboard.objects.update_or_create(nombre=nombre, defaults={'valor': valor})
+    return valor
+
+
+def incrementar_contador(nombre, cantidad=1):
+    """
+    Suma (o resta si la cantidad es negativa) al contador con un UPDATE atómico.
+    Si el contador aún no existe se inicializa reconciliándolo.
+    """
+    if not cantidad:
+        return
+    actualizados = ContadorDashboard.objects.filter(nombre=nombre).update(valor=F('valor') + cantidad)
+    if not actualizados:
+        reconciliar_contador(nombre)
+
+
+def leer_contadores():
+    """
+    Retorna un diccionario {nombre: valor} con todos los contadores usando
+    una sola consulta. Los que falten se inicializan una única vez.
+    """
+    valores = dict(ContadorDashboard.objects.filter(nombre__in=CONTADORES).values_list('nombre', 'valor'))
+    for nombre in CONTADORES:
+        if nombre not in valores:
+            valores[nombre] = reconciliar_contador(nombre)
+    return valores
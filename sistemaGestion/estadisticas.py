@@ -0,0 +1,53 @@
+"""
+ESTADÍSTICAS CACHEADAS
+======================
+
+Resúmenes que se muestran en las listas y se calculan con una sola consulta
+agregada. El resultado se guarda en la caché de Django y se invalida desde
+signals.py cuando cambian las boletas o los pagos.
+
+La caché debe ser compartida entre procesos (settings.CACHES usa la base de
+datos): con una caché en memoria por proceso, la invalidación solo llegaría
+al worker que atendió la escritura y los demás mostrarían totales antiguos
+hasta SEGUNDOS_CACHE.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .models import Boleta
+
+
+CLAVE_ESTADISTICAS_BOLETAS = 'sistemaGestion:estadisticas_boletas'
+# Red de seguridad para escrituras que no pasan por señales (bulk_create, update)
+SEGUNDOS_CACHE = 300
+
+
+def calcular_estadisticas_boletas():
+    """
+    Calcula el resumen de boletas con UNA consulta agregada.
+    """
+    resumen = Boleta.objects.order_by().aggregate(
+        total_servicios=Count('id'),
+        servicios_pagados=Count('id', filter=Q(estado='Pagado')),
+        gasto_total_presupuestado=Sum('monto_total'),
+        total_pagado=Sum('total_pagado'),
+    )
+    return {
+        'total_servicios': resumen['total_servicios'],
+        'servicios_pagados': resumen['servicios_pagados'],
+        'servicios_pendientes': resumen['total_servicios'] - resumen['servicios_pagados'],
+        'gasto_total_presupuestado': resumen['gasto_total_presupuestado'] or 0,
+        'total_pagado': resumen['total_pagado'] or 0,
+    }
+
+
+def estadisticas_boletas():
+    """
+    Retorna el resumen de boletas desde la caché, calculándolo si no existe.
+    """
+    return cache.get_or_set(CLAVE_ESTADISTICAS_BOLETAS, calcular_estadisticas_boletas, SEGUNDOS_CACHE)
+
+
+def invalidar_estadisticas_boletas():
+    cache.delete(CLAVE_ESTADISTICAS_BOLETAS)
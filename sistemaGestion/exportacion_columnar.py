@@ -0,0 +1,339 @@
+"""
+EXPORTACIÓN COLUMNAR PARA ANÁLISIS
+==================================
+
+Los análisis de consumo cargaban las lecturas completas en pandas con SQL
+directo contra la base de datos de producción. El comando
+`exportar_columnar` deja las lecturas, boletas y pagos en archivos
+columnares, uno por mes, que se analizan sin tocar la base de datos:
+
+    <DIRECTORIO>/manifest.json
+    <DIRECTORIO>/lecturas/2025-03.parquet    (o .npz)
+    <DIRECTORIO>/boletas/2025-03.parquet
+    <DIRECTORIO>/pagos/2025-03.parquet
+
+El mes de cada fila es el de fecha_lectura, fecha_emision o fecha_pago.
+
+FORMATOS:
+- parquet (si pyarrow está instalado): el medidor, el cliente y las columnas
+  de pocos valores (tipo, estado, método de pago) van como columnas de
+  diccionario. Se leen con pandas.read_parquet o pyarrow.dataset
+- npz (NumPy, si no hay pyarrow): un arreglo por columna. Las columnas de
+  diccionario se guardan como <columna>__codigos (int32, -1 = vacío) y
+  <columna>__diccionario (texto, ordenado); las fechas como datetime64[D]
+  (NaT = vacía) y los enteros vacíos como -1. Se leen con numpy.load
+
+INCREMENTAL: el manifest guarda por mes una huella (filas, id máximo y sumas
+de control) calculada con una consulta agregada por mes. Una nueva ejecución
+solo escribe los meses nuevos o cuya huella cambió (lecturas tardías, pagos
+que cambian boletas antiguas) y borra los meses que quedaron sin filas. Los
+cambios que no alteran la huella (ej: renombrar un medidor) se recogen con
+--completo. Los archivos y el manifest se escriben con otro nombre y se
+renombran: una ejecución interrumpida se retoma sin archivos a medias.
+
+CONFIGURACIÓN (settings.EXPORTACION_COLUMNAR): DIRECTORIO, TAMANO_LOTE.
+"""
+
+import json
+import os
+import uuid
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .exportacion import lotes_de_filas
+from .models import Boleta, Lectura, Pago
+
+
+CONFIGURACION_POR_DEFECTO = {
+    'DIRECTORIO': None,
+    'TAMANO_LOTE': 20000,  # filas por consulta
+}
+FORMATOS = ('parquet', 'npz')
+VERSION_MANIFEST = 1
+
+# Por tabla: modelo, campo de fecha que define el mes, sumas de control de la
+# huella y columnas (nombre, campo para values_list, tipo). Tipos: 'entero',
+# 'fecha', 'texto' o 'diccionario'. La primera columna siempre es el id.
+TABLAS = {
+    'lecturas': {
+        'modelo': Lectura,
+        'fecha': 'fecha_lectura',
+        'huella': {'consumo': Sum('consumo_energetico')},
+        'columnas': [
+            ('id', 'id', 'entero'),
+            ('medidor', 'medidor__numero_medidor', 'diccionario'),
+            ('cliente', 'medidor__contrato__cliente__numero_cliente', 'diccionario'),
+            ('fecha_lectura', 'fecha_lectura', 'fecha'),
+            ('lectura_actual', 'lectura_actual', 'entero'),
+            ('consumo_energetico', 'consumo_energetico', 'entero'),
+            ('tipo_lectura', 'tipo_lectura', 'diccionario'),
+        ],
+    },
+    'boletas': {
+        'modelo': Boleta,
+        'fecha': 'fecha_emision',
+        'huella': {'pagado': Sum('total_pagado'), 'vencidas': Count('id', filter=Q(estado='Vencido'))},
+        'columnas': [
+            ('id', 'id', 'entero'),
+            ('lectura_id', 'lectura_id', 'entero'),
+            ('medidor', 'lectura__medidor__numero_medidor', 'diccionario'),
+            ('cliente', 'lectura__medidor__contrato__cliente__numero_cliente', 'diccionario'),
+            ('fecha_emision', 'fecha_emision', 'fecha'),
+            ('fecha_vencimiento', 'fecha_vencimiento', 'fecha'),
+            ('consumo_energetico', 'consumo_energetico', 'texto'),
+            ('monto_total', 'monto_total', 'entero'),
+            ('total_pagado', 'total_pagado', 'entero'),
+            ('saldo_pendiente', 'saldo_pendiente', 'entero'),
+            ('estado', 'estado', 'diccionario'),
+        ],
+    },
+    'pagos': {
+        'modelo': Pago,
+        'fecha': 'fecha_pago',
+        'huella': {'monto': Sum('monto_pagado')},
+        'columnas': [
+            ('id', 'id', 'entero'),
+            ('boleta_id', 'boleta_id', 'entero'),
+            ('medidor', 'boleta__lectura__medidor__numero_medidor', 'diccionario'),
+            ('cliente', 'boleta__lectura__medidor__contrato__cliente__numero_cliente', 'diccionario'),
+            ('fecha_pago', 'fecha_pago', 'fecha'),
+            ('monto_pagado', 'monto_pagado', 'entero'),
+            ('metodo_pago', 'metodo_pago', 'diccionario'),
+            ('estado_pago', 'estado_pago', 'diccionario'),
+            ('numero_referencia', 'numero_referencia', 'texto'),
+        ],
+    },
+}
+
+
+class ErrorExportacion(Exception):
+    """Opciones de exportación inválidas (formato no disponible, tabla desconocida)."""
+
+
+def configuracion():
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'EXPORTACION_COLUMNAR', {})}
+
+
+def _pyarrow():
+    """Módulos (pyarrow, pyarrow.parquet) si pyarrow está instalado, si no None."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow, pyarrow.parquet
+
+
+def elegir_formato(formato='auto'):
+    if formato == 'auto':
+        return 'parquet' if _pyarrow() else 'npz'
+    if formato not in FORMATOS:
+        raise ErrorExportacion(f"Formato desconocido: {formato} (opciones: auto, {', '.join(FORMATOS)})")
+    if formato == 'parquet' and not _pyarrow():
+        raise ErrorExportacion('El formato parquet requiere pyarrow (pip install pyarrow)')
+    return formato
+
+
+def huellas_por_mes(tabla):
+    """{'AAAA-MM': [filas, id máximo, sumas de control...]} con una consulta agregada."""
+    definicion = TABLAS[tabla]
+    extras = definicion['huella']
+    meses = (
+        definicion['modelo'].objects
+        .annotate(mes=TruncMonth(definicion['fecha']))
+        .values('mes')
+        .annotate(filas=Count('id'), id_maximo=Max('id'), **extras)
+        .order_by('mes')
+    )
+    return {
+        f"{fila['mes']:%Y-%m}": [fila['filas'], fila['id_maximo'], *(fila[clave] or 0 for clave in sorted(extras))]
+        for fila in meses
+    }
+
+
+def leer_particion(tabla, mes, tamano_lote):
+    """{columna: lista de valores} con las filas del mes ('AAAA-MM'), leídas por lotes de id."""
+    definicion = TABLAS[tabla]
+    anio, numero_mes = (int(parte) for parte in mes.split('-'))
+    inicio = date(anio, numero_mes, 1)
+    fin = date(anio + numero_mes // 12, numero_mes % 12 + 1, 1)
+    filas = definicion['modelo'].objects.filter(**{
+        f"{definicion['fecha']}__gte": inicio,
+        f"{definicion['fecha']}__lt": fin,
+    })
+    columnas = {nombre: [] for nombre, _, _ in definicion['columnas']}
+    campos = [campo for _, campo, _ in definicion['columnas']]
+    for lote in lotes_de_filas(filas, campos, tamano_lote):
+        for valores, nombre in zip(zip(*lote), columnas):
+            columnas[nombre].extend(valores)
+    return columnas
+
+
+def codificar_diccionario(valores):
+    """
+    Codificación de diccionario de una columna de texto.
+
+    retorna:
+        (códigos int32 con -1 para los vacíos, diccionario ordenado)
+    """
+    diccionario = sorted({valor for valor in valores if valor is not None})
+    posicion = {valor: indice for indice, valor in enumerate(diccionario)}
+    codigos = np.fromiter((posicion.get(valor, -1) for valor in valores), dtype=np.int32, count=len(valores))
+    return codigos, diccionario
+
+
+def _escribir_npz(archivo, columnas, definicion):
+    arreglos = {}
+    for nombre, _, tipo in definicion:
+        valores = columnas[nombre]
+        if tipo == 'diccionario':
+            codigos, diccionario = codificar_diccionario(valores)
+            arreglos[f'{nombre}__codigos'] = codigos
+            arreglos[f'{nombre}__diccionario'] = np.array(diccionario, dtype=str)
+        elif tipo == 'entero':
+            arreglos[nombre] = np.fromiter(
+                (-1 if valor is None else valor for valor in valores), dtype=np.int64, count=len(valores)
+            )
+        elif tipo == 'fecha':
+            arreglos[nombre] = np.array(valores, dtype='datetime64[D]')
+        else:
+            arreglos[nombre] = np.array(['' if valor is None else valor for valor in valores], dtype=str)
+    np.savez_compressed(archivo, **arreglos)
+
+
+def _escribir_parquet(archivo, columnas, definicion):
+    pa, pq = _pyarrow()
+    arreglos = []
+    for nombre, _, tipo in definicion:
+        valores = columnas[nombre]
+        if tipo == 'diccionario':
+            codigos, diccionario = codificar_diccionario(valores)
+            arreglos.append(pa.DictionaryArray.from_arrays(
+                pa.array(codigos, mask=codigos < 0), pa.array(diccionario, type=pa.string())
+            ))
+        elif tipo == 'entero':
+            arreglos.append(pa.array(valores, type=pa.int64()))
+        elif tipo == 'fecha':
+            arreglos.append(pa.array(valores, type=pa.date32()))
+        else:
+            arreglos.append(pa.array(valores, type=pa.string()))
+    tabla = pa.table(arreglos, names=[nombre for nombre, _, _ in definicion])
+    pq.write_table(tabla, archivo)
+
+
+def _escribir_atomico(ruta, escribir):
+    """Escribe con escribir(archivo binario) en un temporal y lo renombra a `ruta`."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(temporal, 'wb') as archivo:
+            escribir(archivo)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def leer_manifest(directorio):
+    try:
+        with open(os.path.join(directorio, 'manifest.json'), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {'version': VERSION_MANIFEST, 'tablas': {}}
+
+
+def _guardar_manifest(directorio, manifest):
+    manifest['actualizado'] = timezone.now().isoformat(timespec='seconds')
+    contenido = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+    _escribir_atomico(os.path.join(directorio, 'manifest.json'), lambda archivo: archivo.write(contenido))
+
+
+def _borrar(directorio, archivo):
+    try:
+        os.remove(os.path.join(directorio, archivo))
+    except FileNotFoundError:
+        pass
+
+
+def exportar(directorio=None, tablas=None, formato='auto', completo=False, tamano_lote=None, progreso=None):
+    """
+    Exporta los meses nuevos o modificados de cada tabla y actualiza el manifest.
+
+    parámetros:
+        tablas: nombres de TABLAS a exportar (por defecto todas)
+        formato: 'auto' (parquet si hay pyarrow, si no npz), 'parquet' o 'npz'
+        completo: reescribe todos los meses aunque su huella no haya cambiado
+        progreso: función opcional que recibe (tabla, mes, filas) por cada archivo escrito
+
+    retorna:
+        dict: {tabla: {'escritas', 'sin_cambios', 'borradas', 'filas'}}
+    """
+    opciones = configuracion()
+    directorio = directorio or opciones['DIRECTORIO']
+    if not directorio:
+        raise ErrorExportacion('Falta el directorio de destino (settings.EXPORTACION_COLUMNAR["DIRECTORIO"])')
+    directorio = os.fspath(directorio)
+    tablas = tablas or list(TABLAS)
+    desconocidas = set(tablas) - set(TABLAS)
+    if desconocidas:
+        raise ErrorExportacion(f"Tablas desconocidas: {', '.join(sorted(desconocidas))} (opciones: {', '.join(TABLAS)})")
+    formato = elegir_formato(formato)
+    escribir = _escribir_parquet if formato == 'parquet' else _escribir_npz
+    tamano_lote = tamano_lote or opciones['TAMANO_LOTE']
+
+    manifest = leer_manifest(directorio)
+    manifest['version'] = VERSION_MANIFEST
+    resumen = {}
+    for tabla in tablas:
+        definicion = TABLAS[tabla]
+        registro = manifest['tablas'].setdefault(tabla, {'particiones': {}})
+        registro['columnas'] = [[nombre, tipo] for nombre, _, tipo in definicion['columnas']]
+        registro['huella'] = ['filas', 'id_maximo', *sorted(definicion['huella'])]
+        particiones = registro['particiones']
+        resumen[tabla] = {'escritas': 0, 'sin_cambios': 0, 'borradas': 0, 'filas': 0}
+
+        huellas = huellas_por_mes(tabla)
+        for mes, huella in huellas.items():
+            anterior = particiones.get(mes)
+            if (
+                not completo and anterior
+                and anterior['huella'] == huella and anterior['formato'] == formato
+                and os.path.exists(os.path.join(directorio, anterior['archivo']))
+            ):
+                resumen[tabla]['sin_cambios'] += 1
+                continue
+
+            columnas = leer_particion(tabla, mes, tamano_lote)
+            archivo = f'{tabla}/{mes}.{formato}'
+            ruta = os.path.join(directorio, archivo)
+            _escribir_atomico(ruta, lambda destino: escribir(destino, columnas, definicion['columnas']))
+            if anterior and anterior['archivo'] != archivo:
+                _borrar(directorio, anterior['archivo'])
+
+            filas = len(columnas['id'])
+            particiones[mes] = {
+                'archivo': archivo,
+                'formato': formato,
+                'filas': filas,
+                'bytes': os.path.getsize(ruta),
+                'huella': huella,
+                'generado': timezone.now().isoformat(timespec='seconds'),
+            }
+            # El manifest se guarda después de cada archivo para retomar una ejecución interrumpida
+            _guardar_manifest(directorio, manifest)
+            resumen[tabla]['escritas'] += 1
+            resumen[tabla]['filas'] += filas
+            if progreso:
+                progreso(tabla, mes, filas)
+
+        for mes in sorted(set(particiones) - set(huellas)):
+            _borrar(directorio, particiones.pop(mes)['archivo'])
+            resumen[tabla]['borradas'] += 1
+        registro['particiones'] = dict(sorted(particiones.items()))
+        _guardar_manifest(directorio, manifest)
+    return resumen
@@ -0,0 +1,147 @@
+"""
+SERVICIO DE FACTURACIÓN MASIVA
+==============================
+
+Genera las boletas de todo un período a partir de las lecturas que aún no
+tienen boleta asociada. Se usa desde el comando `facturar_periodo`.
+
+FLUJO:
+- Se seleccionan las lecturas del período sin boleta (lectura.boleta IS NULL)
+- Las tarifas de todos los contratos se cargan en UNA sola consulta
+  a través de Tarifa_has_Contrato
+- monto_total = consumo_energetico * precio de la tarifa vigente
+- Las boletas se escriben con bulk_create en lotes, cada lote en su
+  propia transacción. Si el proceso se corta, basta con volver a
+  ejecutarlo: las lecturas ya facturadas dejan de aparecer en la selección.
+"""
+
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from .contadores import incrementar_contador
+from .estadisticas import invalidar_estadisticas_boletas
+from .models import Boleta, Lectura, Tarifa_has_Contrato
+
+
+TAMANO_LOTE = 1000
+DIAS_VENCIMIENTO = 30
+
+
+def cargar_tarifas_por_contrato():
+    """
+    Retorna un diccionario {contrato_id: [(fecha_vigencia, precio), ...]}
+    ordenado por fecha de vigencia, usando una sola consulta.
+    """
+    tarifas = {}
+    filas = (
+        Tarifa_has_Contrato.objects
+        .order_by('contrato_id', 'tarifa__fecha_vigencia')
+        .values_list('contrato_id', 'tarifa__fecha_vigencia', 'tarifa__precio')
+    )
+    for contrato_id, fecha_vigencia, precio in filas.iterator(chunk_size=TAMANO_LOTE):
+        tarifas.setdefault(contrato_id, []).append((fecha_vigencia, precio))
+    return tarifas
+
+
+def precio_vigente(tarifas_contrato, fecha):
+    """
+    Retorna el precio de la tarifa vigente en la fecha indicada.
+    Si ninguna tarifa había entrado en vigencia se usa la más antigua.
+    """
+    if not tarifas_contrato:
+        return None
+    fechas = [fecha_vigencia for fecha_vigencia, _ in tarifas_contrato]
+    posicion = bisect_right(fechas, fecha) - 1
+    return tarifas_contrato[max(posicion, 0)][1]
+
+
+def generar_boletas_periodo(anio, mes, fecha_emision=None, dias_vencimiento=DIAS_VENCIMIENTO,
+                            tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Genera las boletas de todas las lecturas del período (anio, mes) que no
+    tengan boleta.
+
+    parámetros:
+        progreso: función opcional que recibe el resumen parcial tras cada lote
+
+    retorna:
+        dict: resumen con lecturas procesadas, boletas creadas, lecturas sin
+        tarifa, segundos transcurridos y filas por segundo
+    """
+    fecha_emision = fecha_emision or date.today()
+    fecha_vencimiento = fecha_emision + timedelta(days=dias_vencimiento)
+    tarifas = cargar_tarifas_por_contrato()
+
+    pendientes = (
+        Lectura.objects
+        .filter(fecha_lectura__year=anio, fecha_lectura__month=mes, boleta__isnull=True)
+        .order_by('id')
+        .values_list('id', 'fecha_lectura', 'consumo_energetico', 'medidor__contrato_id')
+    )
+
+    resumen = {
+        'procesadas': 0,
+        'creadas': 0,
+        'sin_tarifa': 0,
+        'segundos': 0.0,
+        'filas_por_segundo': 0.0,
+    }
+    inicio = time.monotonic()
+    ultimo_id = 0
+
+    while True:
+        # Paginación por id (keyset) en lugar de OFFSET
+        lote = list(pendientes.filter(id__gt=ultimo_id)[:tamano_lote])
+        if not lote:
+            break
+        ultimo_id = lote[-1][0]
+
+        boletas = []
+        for lectura_id, fecha_lectura, consumo, contrato_id in lote:
+            precio = precio_vigente(tarifas.get(contrato_id), fecha_lectura)
+            if precio is None:
+                resumen['sin_tarifa'] += 1
+                continue
+            monto_total = consumo * precio
+            boletas.append(Boleta(
+                lectura_id=lectura_id,
+                fecha_emision=fecha_emision,
+                fecha_vencimiento=fecha_vencimiento,
+                monto_total=monto_total,
+                saldo_pendiente=monto_total,  # bulk_create no pasa por Boleta.save()
+                consumo_energetico=str(consumo),
+                estado='Pendiente',
+            ))
+
+        # Cada lote es una transacción: un corte solo pierde el lote en curso.
+        # ignore_conflicts evita duplicar boletas si dos ejecuciones se cruzan; como no
+        # informa qué filas omitió, las creadas se cuentan antes y después del INSERT
+        creadas = 0
+        if boletas:
+            boletas_del_lote = Boleta.objects.filter(lectura_id__in=[boleta.lectura_id for boleta in boletas])
+            with transaction.atomic():
+                existentes = boletas_del_lote.count()
+                Boleta.objects.bulk_create(boletas, batch_size=tamano_lote, ignore_conflicts=True)
+                creadas = boletas_del_lote.count() - existentes
+                incrementar_contador('boletas_emitidas', creadas)
+
+        resumen['procesadas'] += len(lote)
+        resumen['creadas'] += creadas
+        resumen['segundos'] = time.monotonic() - inicio
+        if resumen['segundos'] > 0:
+            resumen['filas_por_segundo'] = resumen['procesadas'] / resumen['segundos']
+        if progreso:
+            progreso(resumen)
+
+    # bulk_create no emite señales: se invalida el resumen de boletas a mano
+    # (el contador del dashboard ya se incrementó en cada lote)
+    if resumen['creadas']:
+        invalidar_estadisticas_boletas()
+
+    resumen['segundos'] = time.monotonic() - inicio
+    if resumen['segundos'] > 0:
+        resumen['filas_por_segundo'] = resumen['procesadas'] / resumen['segundos']
+    return resumen
@@ -1,4 +1,5 @@
 from django import forms
+from django.core.validators import FileExtensionValidator
 from datetime import date, timedelta
 import re
 from .models import (
@@ -273,6 +274,19 @@ class MedidorForm(forms.ModelForm):
 # FORMULARIO LECTURA
 # ==========================================================
 class LecturaForm(forms.ModelForm):
+    # Límites de validación (también los usa la importación masiva, ver importacion.py)
+    LECTURA_MAXIMA = 9999999
+    CONSUMO_MAXIMO = 999999
+    DIAS_ANTIGUEDAD_MAXIMA = 365
+
+    # Se deriva de la lectura anterior del medidor (ver Lectura.save); solo se usa en la primera lectura
+    consumo_energetico = forms.IntegerField(
+        required=False,
+        label='Consumo Energético (kWh)',
+        widget=forms.NumberInput(attrs={'placeholder': 'Consumo en kWh','class': 'form-control','min': '0'}),
+        help_text='Se calcula automáticamente con la lectura anterior del medidor; solo se considera en su primera lectura'
+    )
+
     class Meta:
         model = Lectura
         fields = ['medidor', 'fecha_lectura', 'consumo_energetico', 'tipo_lectura', 'lectura_actual']
@@ -301,7 +315,7 @@ class LecturaForm(forms.ModelForm):
         if lectura is None or lectura == 0:
             raise forms.ValidationError("La lectura actual no puede ser cero.")
 
-        if lectura > 9999999:
+        if lectura > self.LECTURA_MAXIMA:
             raise forms.ValidationError("La lectura actual parece muy alta")
         return lectura
     #def clean_consumo_energetico se encarga de validar que el consumo energético sea un número positivo y no muy alto
@@ -310,7 +324,7 @@ class LecturaForm(forms.ModelForm):
         
         if consumo and consumo < 0:
             raise forms.ValidationError("El consumo energético no puede ser negativo.")
-        if consumo and consumo > 999999:
+        if consumo and consumo > self.CONSUMO_MAXIMO:
             raise forms.ValidationError("El consumo energético parece muy alto")
         
         return consumo
@@ -321,27 +335,52 @@ class LecturaForm(forms.ModelForm):
         if fecha_lectura and fecha_lectura > date.today():
             raise forms.ValidationError("La fecha de lectura no puede ser posterior a hoy.")
 
-        fecha_limite = date.today() - timedelta(days=365)
+        fecha_limite = date.today() - timedelta(days=self.DIAS_ANTIGUEDAD_MAXIMA)
         if fecha_lectura < fecha_limite:
             raise forms.ValidationError("La fecha de lectura no puede ser tan antigua")
         
         return fecha_lectura
 
 
+# ==========================================================
+# FORMULARIO IMPORTACIÓN DE LECTURAS
+# ==========================================================
+class ImportarLecturasForm(forms.Form):
+    # La importación corre dentro del request; los archivos mayores se cargan con el comando importar_lecturas
+    TAMANO_MAXIMO_MB = 20
+
+    archivo = forms.FileField(
+        label='Archivo de lecturas (.csv o .jsonl)',
+        help_text=f'Máximo {TAMANO_MAXIMO_MB} MB; los archivos más grandes se cargan con el comando importar_lecturas',
+        validators=[FileExtensionValidator(['csv', 'jsonl', 'ndjson'])],
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.jsonl,.ndjson'})
+    )
+
+    #def clean_archivo se encarga de rechazar los archivos que superan TAMANO_MAXIMO_MB
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if archivo.size > self.TAMANO_MAXIMO_MB * 1024 * 1024:
+            raise forms.ValidationError(
+                f"El archivo supera los {self.TAMANO_MAXIMO_MB} MB. "
+                "Para archivos más grandes use: python manage.py importar_lecturas"
+            )
+        return archivo
+
+
 # ==========================================================
 # FORMULARIO BOLETA
 # ==========================================================
 class BoletaForm(forms.ModelForm):  
+    # El estado no se edita: se calcula según los pagos (Boleta.estado_segun_pagos)
     class Meta:
         model = Boleta
-        fields = ['lectura', 'fecha_emision', 'fecha_vencimiento', 'monto_total', 'consumo_energetico', 'estado']
+        fields = ['lectura', 'fecha_emision', 'fecha_vencimiento', 'monto_total', 'consumo_energetico']
         widgets = {
             'lectura': forms.Select(attrs={'class': 'form-control'}),
             'fecha_emision': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d'),
             'fecha_vencimiento': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d'),
             'monto_total': forms.NumberInput(attrs={'placeholder': 'Monto total a pagar','class': 'form-control','min': '1'}),
             'consumo_energetico': forms.TextInput(attrs={'placeholder': 'Ejemplo: 150 kWh','class': 'form-control'}),
-            'estado': forms.Select(attrs={'class': 'form-control'}),
         }
         labels = {
             'lectura': 'Lectura Asociada',
@@ -349,7 +388,6 @@ class BoletaForm(forms.ModelForm):
             'fecha_vencimiento': 'Fecha de Vencimiento',
             'monto_total': 'Monto Total ($)',
             'consumo_energetico': 'Consumo Energético',
-            'estado': 'Estado de la Boleta',
         }
     
     def clean_monto_total(self):
@@ -458,12 +496,11 @@ class PagoForm(forms.ModelForm):
         monto_pagado = cleaned_data.get('monto_pagado')
         
         if boleta and monto_pagado:
-            # Calcular el total pagado manualmente sumando todos los pagos de esta boleta
-            from django.db.models import Sum
-            total_pagado_actual = boleta.pagos.aggregate(Sum('monto_pagado'))['monto_pagado__sum'] or 0
+            # Total pagado desnormalizado en la boleta (se mantiene en cada escritura de Pago)
+            total_pagado_actual = boleta.total_pagado
             
             # Si estamos editando, restar el monto anterior de este pago
-            if self.instance and self.instance.pk:
+            if self.instance and self.instance.pk and self.instance.boleta_id == boleta.id:
                 total_pagado_actual -= self.instance.monto_pagado
             
             saldo_pendiente = boleta.monto_total - total_pagado_actual
@@ -477,6 +514,22 @@ class PagoForm(forms.ModelForm):
         return cleaned_data
 
 
+# ==========================================================
+# FORMULARIO CONCILIACIÓN DE PAGOS (CARTOLA BANCARIA)
+# ==========================================================
+class ConciliarPagosForm(forms.Form):
+    archivo = forms.FileField(
+        label='Cartola bancaria (.csv)',
+        validators=[FileExtensionValidator(['csv'])],
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'})
+    )
+    solo_verificar = forms.BooleanField(
+        label='Solo verificar (no registrar pagos)',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+
 # ==========================================================
 # FORMULARIO USUARIO
 # ==========================================================
@@ -0,0 +1,252 @@
+"""
+GENERADOR DE DATOS SINTÉTICOS
+=============================
+
+Pobla toda la jerarquía de modelos a escala configurable para reproducir
+localmente el volumen de producción y medir optimizaciones:
+
+    Cliente → Contrato → Medidor → Lectura (N meses) → Boleta → Pago
+    + Tarifa_has_Contrato, NotificacionLectura y NotificacionPago
+
+CARACTERÍSTICAS:
+- Determinista: la misma semilla produce exactamente los mismos datos
+- bulk_create en orden de dependencias, por bloques de clientes, cada bloque
+  en su propia transacción (memoria constante)
+- Los ids se asignan explícitamente a partir del máximo existente, así no
+  hace falta volver a consultar las filas insertadas (MySQL no devuelve los
+  ids en bulk_create) y funciona igual en SQLite y MySQL.
+  No debe ejecutarse mientras otros procesos escriben en las mismas tablas.
+- Los campos desnormalizados (total_pagado, saldo_pendiente, estado) se
+  calculan al generar y al final se reconcilian los contadores del dashboard.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+
+from .contadores import CONTADORES, reconciliar_contador
+from .estadisticas import invalidar_estadisticas_boletas
+from .models import (
+    Boleta, Cliente, Contrato, Lectura, Medidor, NotificacionLectura, NotificacionPago,
+    Pago, Tarifa, Tarifa_has_Contrato
+)
+
+
+# Distribuciones (valor, peso)
+DISTRIBUCION_TIPO_CLIENTE = [('Residencial', 80), ('Comercial', 15), ('Industrial', 5)]
+DISTRIBUCION_ESTADO_CONTRATO = [('Activo', 92), ('Inactivo', 8)]
+DISTRIBUCION_ESTADO_MEDIDOR = [('Activo', 90), ('Inactivo', 4), ('Mantenimiento', 4), ('Dañado', 2)]
+DISTRIBUCION_TIPO_LECTURA = [('Digital', 70), ('Analogica', 30)]
+DISTRIBUCION_METODO_PAGO = [('Transferencia', 45), ('Debito', 25), ('Efectivo', 18), ('Tarjeta', 12)]
+# Cómo termina cada boleta: pagada completa, pago parcial o sin pagos
+DISTRIBUCION_PAGO_BOLETA = [('completo', 72), ('parcial', 13), ('sin_pago', 15)]
+
+# Consumo mensual medio (kWh) por tipo de cliente
+CONSUMO_MEDIO = {'Residencial': 220, 'Comercial': 1800, 'Industrial': 12000}
+# Precio por kWh de cada tarifa (tipo_cliente, tipo_tarifa)
+PRECIOS = {
+    ('Residencial', 'Verano'): 140, ('Residencial', 'Invierno'): 165,
+    ('Comercial', 'Verano'): 125, ('Comercial', 'Invierno'): 150,
+    ('Industrial', 'Verano'): 105, ('Industrial', 'Invierno'): 120,
+}
+PROBABILIDAD_NOTIFICACION_LECTURA = 0.02
+SECTORES = ['Centro', 'El Tránsito', 'San Félix', 'Chanchoquín', 'Conay', 'La Huerta', 'Los Perales']
+NOMBRES = ['Ana', 'Luis', 'María', 'José', 'Carmen', 'Pedro', 'Rosa', 'Juan', 'Elena', 'Diego']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Torres', 'Araya']
+
+
+def _elegir(rng, distribucion):
+    valores, pesos = zip(*distribucion)
+    return rng.choices(valores, weights=pesos)[0]
+
+
+def _siguiente_id(modelo):
+    return (modelo.objects.aggregate(maximo=Max('id'))['maximo'] or 0) + 1
+
+
+def _inicio_mes(fecha, meses_atras):
+    mes = fecha.month - 1 - meses_atras
+    return date(fecha.year + mes // 12, mes % 12 + 1, 1)
+
+
+def _crear_tarifas(fecha_base):
+    """Crea (una vez) una tarifa por tipo de cliente y temporada. Retorna {(tipo_cliente, tipo_tarifa): Tarifa}."""
+    tarifas = {}
+    for (tipo_cliente, tipo_tarifa), precio in PRECIOS.items():
+        tarifa, _ = Tarifa.objects.get_or_create(
+            tipo_cliente=tipo_cliente, tipo_tarifa=tipo_tarifa, precio=precio,
+            defaults={'fecha_vigencia': fecha_base},
+        )
+        tarifas[(tipo_cliente, tipo_tarifa)] = tarifa
+    return tarifas
+
+
+class _Ids:
+    """Asigna ids consecutivos por modelo a partir del máximo existente."""
+
+    def __init__(self, modelos):
+        self.siguientes = {modelo: _siguiente_id(modelo) for modelo in modelos}
+
+    def nuevo(self, modelo):
+        valor = self.siguientes[modelo]
+        self.siguientes[modelo] = valor + 1
+        return valor
+
+
+def generar_datos(clientes=1000, meses=12, semilla=42, tamano_lote=1000, hoy=None, progreso=None):
+    """
+    Genera `clientes` clientes con toda su jerarquía y `meses` meses de lecturas.
+
+    parámetros:
+        progreso: función opcional que recibe el resumen parcial tras cada bloque
+
+    retorna:
+        dict: cantidad de filas creadas por modelo, segundos y filas por segundo
+    """
+    rng = random.Random(semilla)
+    hoy = hoy or date.today()
+    primer_mes = _inicio_mes(hoy, meses)
+    tarifas = _crear_tarifas(primer_mes - timedelta(days=30))
+    ids = _Ids([Cliente, Contrato, Medidor, Lectura, Boleta, Pago, NotificacionLectura, NotificacionPago])
+
+    resumen = {modelo.__name__: 0 for modelo in (
+        Cliente, Contrato, Tarifa_has_Contrato, Medidor, Lectura, Boleta, Pago,
+        NotificacionLectura, NotificacionPago,
+    )}
+    inicio = time.monotonic()
+
+    for desde in range(0, clientes, tamano_lote):
+        filas = {nombre: [] for nombre in resumen}
+
+        for _ in range(min(tamano_lote, clientes - desde)):
+            tipo_cliente = _elegir(rng, DISTRIBUCION_TIPO_CLIENTE)
+            tipo_tarifa = rng.choice(['Verano', 'Invierno'])
+            tarifa = tarifas[(tipo_cliente, tipo_tarifa)]
+
+            cliente_id = ids.nuevo(Cliente)
+            filas['Cliente'].append(Cliente(
+                id=cliente_id,
+                numero_cliente=f'CLI-{cliente_id:07d}',
+                nombre=f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}',
+                email=f'cliente{cliente_id}@correo.cl',
+                telefono=f'+569{rng.randrange(10**7, 10**8)}',
+            ))
+
+            contrato_id = ids.nuevo(Contrato)
+            estado_contrato = _elegir(rng, DISTRIBUCION_ESTADO_CONTRATO)
+            fecha_inicio = primer_mes - timedelta(days=rng.randrange(30, 900))
+            filas['Contrato'].append(Contrato(
+                id=contrato_id,
+                cliente_id=cliente_id,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=hoy + timedelta(days=rng.randrange(30, 1500)) if estado_contrato == 'Activo'
+                else hoy - timedelta(days=rng.randrange(1, 30)),
+                estado=estado_contrato,
+                numero_contrato=f'CON-{contrato_id:07d}',
+            ))
+            filas['Tarifa_has_Contrato'].append(Tarifa_has_Contrato(tarifa_id=tarifa.id, contrato_id=contrato_id))
+
+            medidor_id = ids.nuevo(Medidor)
+            filas['Medidor'].append(Medidor(
+                id=medidor_id,
+                contrato_id=contrato_id,
+                numero_medidor=f'MED-{medidor_id:07d}',
+                fecha_instalacion=fecha_inicio,
+                ubicacion=f'{rng.choice(SECTORES)} {rng.randrange(1, 2000)}',
+                estado_medidor=_elegir(rng, DISTRIBUCION_ESTADO_MEDIDOR),
+            ))
+
+            # Lecturas mensuales con registro acumulado
+            tipo_lectura = _elegir(rng, DISTRIBUCION_TIPO_LECTURA)
+            registro = rng.randrange(0, 50000)
+            consumo_medio = CONSUMO_MEDIO[tipo_cliente]
+            for mes in range(meses):
+                fecha_lectura = _inicio_mes(hoy, meses - 1 - mes) + timedelta(days=rng.randrange(0, 5))
+                if fecha_lectura > hoy:
+                    fecha_lectura = hoy
+                consumo = max(0, int(rng.gauss(consumo_medio, consumo_medio * 0.25)))
+                registro += consumo
+                lectura_id = ids.nuevo(Lectura)
+                filas['Lectura'].append(Lectura(
+                    id=lectura_id,
+                    medidor_id=medidor_id,
+                    fecha_lectura=fecha_lectura,
+                    consumo_energetico=consumo,
+                    tipo_lectura=tipo_lectura,
+                    lectura_actual=registro,
+                ))
+                if rng.random() < PROBABILIDAD_NOTIFICACION_LECTURA:
+                    filas['NotificacionLectura'].append(NotificacionLectura(
+                        id=ids.nuevo(NotificacionLectura),
+                        lectura_id=lectura_id,
+                        registro_consumo=f'Consumo de {consumo} kWh fuera del rango habitual del medidor',
+                        revisada=rng.random() < 0.5,
+                    ))
+
+                # La lectura del último mes aún no se factura
+                if mes == meses - 1:
+                    continue
+
+                boleta_id = ids.nuevo(Boleta)
+                monto_total = max(1, consumo * tarifa.precio)
+                fecha_emision = fecha_lectura + timedelta(days=2)
+                desenlace = _elegir(rng, DISTRIBUCION_PAGO_BOLETA)
+                total_pagado = 0
+                if desenlace != 'sin_pago':
+                    total_pagado = monto_total if desenlace == 'completo' else int(monto_total * rng.uniform(0.3, 0.9))
+                    pago_id = ids.nuevo(Pago)
+                    filas['Pago'].append(Pago(
+                        id=pago_id,
+                        boleta_id=boleta_id,
+                        fecha_pago=min(hoy, fecha_emision + timedelta(days=rng.randrange(1, 40))),
+                        monto_pagado=max(1, total_pagado),
+                        metodo_pago=_elegir(rng, DISTRIBUCION_METODO_PAGO),
+                        numero_referencia=f'REF-{pago_id:09d}',
+                        estado_pago='Pagado' if desenlace == 'completo' else 'No pagado completamente',
+                    ))
+                    total_pagado = max(1, total_pagado)
+                    if desenlace == 'parcial':
+                        filas['NotificacionPago'].append(NotificacionPago(
+                            id=ids.nuevo(NotificacionPago),
+                            pago_id=pago_id,
+                            deuda_pendiente=f'Boleta {boleta_id} con saldo pendiente de ${monto_total - total_pagado:,}',
+                            revisada=rng.random() < 0.3,
+                        ))
+
+                filas['Boleta'].append(Boleta(
+                    id=boleta_id,
+                    lectura_id=lectura_id,
+                    fecha_emision=fecha_emision,
+                    fecha_vencimiento=fecha_emision + timedelta(days=30),
+                    monto_total=monto_total,
+                    consumo_energetico=str(consumo),
+                    estado={'completo': 'Pagado', 'parcial': 'Pagado Parcialmente'}.get(desenlace, 'Pendiente'),
+                    total_pagado=total_pagado,
+                    saldo_pendiente=monto_total - total_pagado,
+                ))
+
+        # Insertar en orden de dependencias
+        with transaction.atomic():
+            for modelo in (Cliente, Contrato, Tarifa_has_Contrato, Medidor, Lectura, Boleta, Pago,
+                           NotificacionLectura, NotificacionPago):
+                modelo.objects.bulk_create(filas[modelo.__name__], batch_size=tamano_lote)
+                resumen[modelo.__name__] += len(filas[modelo.__name__])
+
+        if progreso:
+            progreso(resumen, time.monotonic() - inicio)
+
+    # bulk_create no emite señales: se reconcilian contadores y estadísticas
+    for nombre in CONTADORES:
+        reconciliar_contador(nombre)
+    invalidar_estadisticas_boletas()
+
+    segundos = time.monotonic() - inicio
+    filas_totales = sum(resumen.values())
+    return {
+        'filas': resumen,
+        'segundos': segundos,
+        'filas_por_segundo': filas_totales / segundos if segundos > 0 else 0.0,
+    }
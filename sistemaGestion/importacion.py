@@ -0,0 +1,336 @@
+"""
+IMPORTACIÓN MASIVA DE LECTURAS
+==============================
+
+Carga lecturas desde archivos CSV o JSONL (una lectura por línea) entregados
+por las cuadrillas o por el head-end de medición. Se usa desde el comando
+`importar_lecturas` y desde la vista de carga de archivos.
+
+COLUMNAS: numero_medidor, fecha_lectura (AAAA-MM-DD), lectura_actual,
+          tipo_lectura (opcional, Digital por defecto),
+          consumo_energetico (opcional, solo se usa en la primera lectura de un
+          medidor; en las demás se deriva del registro anterior)
+
+FLUJO:
+- El archivo se lee de forma incremental, por lotes de filas (memoria constante)
+- Los numero_medidor de cada lote se resuelven a ids con UNA consulta;
+  los ya resueltos quedan en memoria para los lotes siguientes
+- Las reglas de LecturaForm se aplican por columna sobre el lote completo,
+  sin instanciar un formulario por fila
+- El consumo se deriva de la lectura anterior de cada medidor (consumos.py)
+- Las filas válidas se guardan con upsert sobre (medidor, fecha_lectura,
+  tipo_lectura) (bulk_create con update_conflicts → INSERT ... ON DUPLICATE
+  KEY UPDATE en MySQL, ver opciones_upsert), cada lote en su propia
+  transacción; las inválidas se informan con su número de línea
+
+IDEMPOTENCIA: reenviar el mismo archivo no crea duplicados. Las filas
+idénticas a lo ya guardado se descartan sin escribir; las que corrigen el
+registro de una lectura existente la actualizan.
+
+LÍMITES: desde la vista la importación corre dentro del request (síncrona),
+con un presupuesto de 500 consultas y un archivo de a lo más
+ImportarLecturasForm.TAMANO_MAXIMO_MB; los archivos más grandes se cargan con
+`python manage.py importar_lecturas`. Un CSV mal formado (comillas sin cerrar,
+campo sobre el límite de csv) detiene la importación con ErrorImportacion; los
+lotes anteriores ya quedaron guardados y reenviar el archivo corregido no los
+duplica.
+"""
+
+import csv
+import json
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .consumos import derivar_consumos_lote, recalcular_consumos
+from .contadores import incrementar_contador
+from .forms import LecturaForm
+from .models import Lectura, Medidor
+
+
+TAMANO_LOTE = 5000
+COLUMNAS_OBLIGATORIAS = ('numero_medidor', 'fecha_lectura', 'lectura_actual')
+FORMATOS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# Acepta tanto el valor como la etiqueta de cada tipo (ej: 'Analógica')
+TIPOS_LECTURA = {
+    texto.lower(): valor
+    for valor, etiqueta in Lectura.TIPO_LECTURA_CHOICES
+    for texto in (valor, etiqueta)
+}
+
+
+class ErrorImportacion(Exception):
+    """Error que impide procesar el archivo completo (formato, encabezado)."""
+
+
+def detectar_formato(nombre_archivo):
+    for extension, formato in FORMATOS.items():
+        if nombre_archivo.lower().endswith(extension):
+            return formato
+    raise ErrorImportacion(f"Formato no soportado: {nombre_archivo} (use .csv o .jsonl)")
+
+
+def abrir_csv(archivo):
+    """csv.DictReader con el encabezado ya leído; un CSV ilegible se informa como ErrorImportacion."""
+    lector = csv.DictReader(archivo)
+    try:
+        lector.fieldnames
+    except csv.Error as error:
+        raise ErrorImportacion(f"CSV inválido en el encabezado: {error}")
+    return lector
+
+
+def filas_csv(lector):
+    """Generador de (número de línea, fila) de un lector de abrir_csv()."""
+    try:
+        for fila in lector:
+            yield lector.line_num, fila
+    except csv.Error as error:
+        raise ErrorImportacion(f"CSV inválido cerca de la línea {lector.line_num + 1}: {error}")
+
+
+def leer_filas(archivo, formato):
+    """
+    Generador de (número de línea, fila) a partir de un archivo de texto.
+    Las filas JSONL que no son un objeto se entregan como None.
+    """
+    if formato == 'csv':
+        lector = abrir_csv(archivo)
+        faltantes = [columna for columna in COLUMNAS_OBLIGATORIAS if columna not in (lector.fieldnames or [])]
+        if faltantes:
+            raise ErrorImportacion(f"Faltan columnas en el encabezado: {', '.join(faltantes)}")
+        yield from filas_csv(lector)
+    elif formato == 'jsonl':
+        for numero_linea, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                fila = None
+            yield numero_linea, fila if isinstance(fila, dict) else None
+    else:
+        raise ErrorImportacion(f"Formato no soportado: {formato}")
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def _entero(valor):
+    try:
+        return int(_texto(valor))
+    except ValueError:
+        return None
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(_texto(valor))
+    except ValueError:
+        return None
+
+
+class ResolutorMedidores:
+    """Resuelve numero_medidor → id con una consulta por lote, recordando lo ya resuelto."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def resolver(self, numeros):
+        faltantes = {numero for numero in numeros if numero and numero not in self.ids}
+        if faltantes:
+            encontrados = dict(
+                Medidor.objects.filter(numero_medidor__in=faltantes).values_list('numero_medidor', 'id')
+            )
+            for numero in faltantes:
+                self.ids[numero] = encontrados.get(numero)
+        return [self.ids.get(numero) for numero in numeros]
+
+
+def validar_lote(filas, resolutor, hoy=None):
+    """
+    Aplica las reglas de LecturaForm columna por columna a un lote de filas.
+
+    parámetros:
+        filas: lista de (número de línea, fila)
+
+    retorna:
+        (lecturas válidas sin guardar, lista de (número de línea, mensaje))
+    """
+    hoy = hoy or date.today()
+    fecha_limite = hoy - timedelta(days=LecturaForm.DIAS_ANTIGUEDAD_MAXIMA)
+    lineas = [numero_linea for numero_linea, _ in filas]
+    datos = [fila or {} for _, fila in filas]
+    errores = [[] if fila is not None else ['La línea no es un objeto JSON válido.'] for _, fila in filas]
+
+    numeros = [_texto(fila.get('numero_medidor')) for fila in datos]
+    medidores = resolutor.resolver(numeros)
+    fechas = [_fecha(fila.get('fecha_lectura')) for fila in datos]
+    textos_consumo = [_texto(fila.get('consumo_energetico')) for fila in datos]
+    consumos = [_entero(texto) if texto else None for texto in textos_consumo]
+    registros = [_entero(fila.get('lectura_actual')) for fila in datos]
+    tipos = [TIPOS_LECTURA.get(_texto(fila.get('tipo_lectura')).lower() or 'digital') for fila in datos]
+
+    for i, (numero, medidor_id) in enumerate(zip(numeros, medidores)):
+        if not numero:
+            errores[i].append('Falta numero_medidor.')
+        elif medidor_id is None:
+            errores[i].append(f"El medidor {numero} no existe.")
+
+    for i, fecha in enumerate(fechas):
+        if fecha is None:
+            errores[i].append('Fecha de lectura inválida (use AAAA-MM-DD).')
+        elif fecha > hoy:
+            errores[i].append('La fecha de lectura no puede ser posterior a hoy.')
+        elif fecha < fecha_limite:
+            errores[i].append('La fecha de lectura no puede ser tan antigua')
+
+    for i, consumo in enumerate(consumos):
+        if consumo is None and textos_consumo[i]:
+            errores[i].append('El consumo energético debe ser un número entero.')
+        elif consumo is not None and consumo < 0:
+            errores[i].append('El consumo energético no puede ser negativo.')
+        elif consumo is not None and consumo > LecturaForm.CONSUMO_MAXIMO:
+            errores[i].append('El consumo energético parece muy alto')
+
+    for i, registro in enumerate(registros):
+        if registro is None or registro < 0:
+            errores[i].append('La lectura actual debe ser un número positivo.')
+        elif registro == 0:
+            errores[i].append('La lectura actual no puede ser cero.')
+        elif registro > LecturaForm.LECTURA_MAXIMA:
+            errores[i].append('La lectura actual parece muy alta')
+
+    for i, tipo in enumerate(tipos):
+        if tipo is None:
+            errores[i].append(f"Tipo de lectura inválido: {_texto(datos[i].get('tipo_lectura'))}")
+
+    validas = []
+    rechazadas = []
+    for i, mensajes in enumerate(errores):
+        if filas[i][1] is None:
+            rechazadas.append((lineas[i], mensajes[0]))  # Sin datos: el resto de los errores es ruido
+        elif mensajes:
+            rechazadas.append((lineas[i], ' '.join(mensajes)))
+        else:
+            validas.append(Lectura(
+                medidor_id=medidores[i],
+                fecha_lectura=fechas[i],
+                consumo_energetico=consumos[i],
+                tipo_lectura=tipos[i],
+                lectura_actual=registros[i],
+            ))
+    return validas, rechazadas
+
+
+def _clave(lectura):
+    return lectura.medidor_id, lectura.fecha_lectura, lectura.tipo_lectura
+
+
+def opciones_upsert(campos_unicos, campos_actualizar):
+    """
+    Argumentos de bulk_create para un upsert sobre la restricción única de
+    campos_unicos. MySQL (ON DUPLICATE KEY UPDATE) no permite indicar la
+    restricción y rechaza unique_fields; usa la clave única que choque, que en
+    estas tablas es justamente esa. SQLite y PostgreSQL (ON CONFLICT) la exigen.
+    """
+    opciones = {'update_conflicts': True, 'update_fields': campos_actualizar}
+    if connection.features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = campos_unicos
+    return opciones
+
+
+def guardar_lecturas(lecturas, tamano_lote=TAMANO_LOTE):
+    """
+    Guarda (upsert) una lista de lecturas sin guardar, sin duplicar las que ya
+    existen para el mismo (medidor, fecha_lectura, tipo_lectura).
+    Dentro de la lista, la última fila de cada clave es la que vale.
+
+    retorna:
+        dict: creadas, actualizadas, sin_cambios
+    """
+    por_clave = {_clave(lectura): lectura for lectura in lecturas}
+    if not por_clave:
+        return {'creadas': 0, 'actualizadas': 0, 'sin_cambios': 0}
+
+    # Registros ya guardados de las claves del lote (una consulta)
+    fechas = [fecha for _, fecha, _ in por_clave]
+    existentes = {
+        (medidor_id, fecha, tipo): registro
+        for medidor_id, fecha, tipo, registro in Lectura.objects.filter(
+            medidor_id__in={medidor_id for medidor_id, _, _ in por_clave},
+            fecha_lectura__range=(min(fechas), max(fechas)),
+        ).order_by().values_list('medidor_id', 'fecha_lectura', 'tipo_lectura', 'lectura_actual')
+    }
+
+    nuevas, corregidas, sin_cambios = [], [], 0
+    for clave, lectura in por_clave.items():
+        if clave not in existentes:
+            nuevas.append(lectura)
+        elif existentes[clave] != lectura.lectura_actual:
+            corregidas.append(lectura)
+        else:
+            sin_cambios += 1
+
+    escribir = nuevas + corregidas
+    medidores_a_recalcular = derivar_consumos_lote(escribir)
+    medidores_a_recalcular.update(lectura.medidor_id for lectura in corregidas)
+
+    if escribir:
+        with transaction.atomic():
+            Lectura.objects.bulk_create(
+                escribir,
+                batch_size=tamano_lote,
+                **opciones_upsert(['medidor', 'fecha_lectura', 'tipo_lectura'], ['lectura_actual', 'consumo_energetico']),
+            )
+            # bulk_create no emite señales
+            incrementar_contador('lecturas_pendientes', len(nuevas))
+    # Lecturas intercaladas o corregidas en el historial: se recalcula el medidor completo
+    if medidores_a_recalcular:
+        recalcular_consumos(medidores_a_recalcular)
+
+    return {'creadas': len(nuevas), 'actualizadas': len(corregidas), 'sin_cambios': sin_cambios}
+
+
+def importar_lecturas(archivo, formato, tamano_lote=TAMANO_LOTE, reportar_error=None, progreso=None):
+    """
+    Importa las lecturas de un archivo de texto abierto.
+
+    parámetros:
+        reportar_error: función opcional que recibe (número de línea, mensaje)
+            por cada fila rechazada
+        progreso: función opcional que recibe el resumen parcial tras cada lote
+
+    retorna:
+        dict: leidas, creadas, actualizadas, sin_cambios, con_error,
+              segundos, filas_por_segundo
+    """
+    resumen = {'leidas': 0, 'creadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'con_error': 0}
+    resolutor = ResolutorMedidores()
+    inicio = time.monotonic()
+    filas = leer_filas(archivo, formato)
+
+    while True:
+        lote = list(islice(filas, tamano_lote))
+        if not lote:
+            break
+        validas, rechazadas = validar_lote(lote, resolutor)
+        for clave, cantidad in guardar_lecturas(validas, tamano_lote).items():
+            resumen[clave] += cantidad
+
+        resumen['leidas'] += len(lote)
+        resumen['con_error'] += len(rechazadas)
+        if reportar_error:
+            for numero_linea, mensaje in rechazadas:
+                reportar_error(numero_linea, mensaje)
+        if progreso:
+            progreso(resumen)
+
+    segundos = time.monotonic() - inicio
+    resumen['segundos'] = segundos
+    resumen['filas_por_segundo'] = resumen['leidas'] / segundos if segundos > 0 else 0.0
+    return resumen
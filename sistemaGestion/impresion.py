@@ -0,0 +1,202 @@
+"""
+IMPRESIÓN MASIVA DE BOLETAS EN PDF
+==================================
+
+Genera los PDF de todas las boletas de un período (mes de la lectura, igual
+que facturar_periodo) para imprimirlas o enviarlas por correo. Se usa desde
+el comando `imprimir_boletas`.
+
+FLUJO:
+- Las boletas se leen por lotes de id con toda su cadena (lectura, medidor,
+  contrato, cliente) en la misma consulta, sus pagos con una consulta por
+  lote (prefetch) y la tarifa de los contratos del lote con otra
+- El proceso principal renderiza el template reportes/boleta_pdf.html (el
+  mismo de generar_pdf_boleta) y reparte los HTML entre los procesos de un
+  ProcessPoolExecutor, que hacen la conversión a PDF (la parte costosa, que
+  ocupa CPU). Los procesos no tocan la base de datos
+- Hay a lo más EN_VUELO_POR_PROCESO documentos pendientes por proceso, así
+  la memoria no crece con el tamaño del período
+- Los PDF se escriben en un directorio (boleta_<id>.pdf) o en un ZIP, que
+  puede ir a un archivo o a un stream sin posicionamiento (ej: stdout)
+"""
+
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime
+
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+
+from .models import Boleta, Pago, Tarifa_has_Contrato
+from .pdf import convertir_trabajo
+
+
+TAMANO_LOTE = 200
+EN_VUELO_POR_PROCESO = 4
+TEMPLATE_BOLETA = 'reportes/boleta_pdf.html'
+
+
+def nombre_archivo(boleta_id):
+    return f'boleta_{boleta_id}.pdf'
+
+
+def boletas_del_periodo(anio, mes):
+    """Boletas cuya lectura es del mes indicado."""
+    inicio = date(anio, mes, 1)
+    fin = date(anio + mes // 12, mes % 12 + 1, 1)
+    return Boleta.objects.filter(lectura__fecha_lectura__gte=inicio, lectura__fecha_lectura__lt=fin)
+
+
+def contexto_boleta(boleta, tarifa, fecha_generacion):
+    """Contexto del template de la boleta (pagos ya cargados en boleta.pagos)."""
+    lectura = boleta.lectura
+    medidor = lectura.medidor if lectura else None
+    contrato = medidor.contrato if medidor else None
+    return {
+        'boleta': boleta,
+        'lectura': lectura,
+        'medidor': medidor,
+        'contrato': contrato,
+        'cliente': contrato.cliente if contrato else None,
+        'tarifa': tarifa,
+        'pagos': boleta.pagos.all(),
+        'total_pagado': boleta.total_pagado,
+        'saldo_pendiente': boleta.saldo_pendiente,
+        'fecha_generacion': fecha_generacion,
+    }
+
+
+def _tarifas(contrato_ids):
+    """{contrato_id: tarifa} con la primera tarifa asociada a cada contrato (una consulta)."""
+    tarifas = {}
+    asociaciones = (
+        Tarifa_has_Contrato.objects
+        .filter(contrato_id__in=contrato_ids)
+        .select_related('tarifa')
+        .order_by('contrato_id', 'pk')
+    )
+    for asociacion in asociaciones:
+        tarifas.setdefault(asociacion.contrato_id, asociacion.tarifa)
+    return tarifas
+
+
+def documentos(boletas, tamano_lote=TAMANO_LOTE, fecha_generacion=None):
+    """Generador de (boleta_id, html) para las boletas del queryset, por lotes de id."""
+    fecha_generacion = fecha_generacion or datetime.now()
+    boletas = (
+        boletas
+        .select_related('lectura__medidor__contrato__cliente')
+        .prefetch_related(Prefetch('pagos', queryset=Pago.objects.order_by('fecha_pago')))
+        .order_by('pk')
+    )
+    ultimo_id = 0
+    while True:
+        lote = list(boletas.filter(pk__gt=ultimo_id)[:tamano_lote])
+        if not lote:
+            return
+        ultimo_id = lote[-1].pk
+        tarifas = _tarifas({
+            boleta.lectura.medidor.contrato_id
+            for boleta in lote
+            if boleta.lectura and boleta.lectura.medidor
+        } - {None})
+        for boleta in lote:
+            medidor = boleta.lectura.medidor if boleta.lectura else None
+            tarifa = tarifas.get(medidor.contrato_id) if medidor else None
+            yield boleta.pk, render_to_string(TEMPLATE_BOLETA, contexto_boleta(boleta, tarifa, fecha_generacion))
+
+
+class DestinoDirectorio:
+    """Escribe cada PDF como archivo en un directorio."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        os.makedirs(ruta, exist_ok=True)
+
+    def guardar(self, nombre, datos):
+        # Se escribe con otro nombre y se renombra: no quedan PDF a medias si el proceso se corta
+        destino = os.path.join(self.ruta, nombre)
+        with open(destino + '.tmp', 'wb') as archivo:
+            archivo.write(datos)
+        os.replace(destino + '.tmp', destino)
+
+    def cerrar(self):
+        pass
+
+
+class DestinoZip:
+    """Agrega cada PDF a un ZIP escrito en un archivo binario abierto (puede ser un stream)."""
+
+    def __init__(self, archivo):
+        # Los PDF ya vienen comprimidos: se guardan sin volver a comprimir
+        self.zip = zipfile.ZipFile(archivo, 'w', compression=zipfile.ZIP_STORED)
+
+    def guardar(self, nombre, datos):
+        self.zip.writestr(nombre, datos)
+
+    def cerrar(self):
+        self.zip.close()
+
+
+def imprimir_boletas(boletas, destino, procesos=None, tamano_lote=TAMANO_LOTE, reportar_error=None, progreso=None):
+    """
+    Genera los PDF de las boletas del queryset y los entrega a `destino`
+    (DestinoDirectorio o DestinoZip, que se cierra al terminar).
+
+    parámetros:
+        procesos: procesos de conversión (por defecto uno por núcleo); con 1
+            se convierte en el mismo proceso, sin ProcessPoolExecutor
+        reportar_error: función opcional que recibe (boleta_id, mensaje)
+        progreso: función opcional que recibe el resumen parcial cada 100 PDF
+
+    retorna:
+        dict: generadas, con_error, procesos, segundos, pdf_por_segundo,
+              pdf_por_segundo_por_proceso, ms_cpu_por_pdf
+    """
+    procesos = procesos or os.cpu_count() or 1
+    resumen = {'generadas': 0, 'con_error': 0, 'procesos': procesos}
+    segundos_cpu = 0.0
+    inicio = time.monotonic()
+
+    def recoger(resultado):
+        nonlocal segundos_cpu
+        boleta_id, pdf, error, cpu = resultado
+        segundos_cpu += cpu
+        if error is None:
+            destino.guardar(nombre_archivo(boleta_id), pdf)
+            resumen['generadas'] += 1
+        else:
+            resumen['con_error'] += 1
+            if reportar_error:
+                reportar_error(boleta_id, error)
+        if progreso and (resumen['generadas'] + resumen['con_error']) % 100 == 0:
+            progreso(resumen)
+
+    try:
+        trabajos = documentos(boletas, tamano_lote)
+        if procesos == 1:
+            for trabajo in trabajos:
+                recoger(convertir_trabajo(trabajo))
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                pendientes = set()
+                for trabajo in trabajos:
+                    pendientes.add(ejecutor.submit(convertir_trabajo, trabajo))
+                    if len(pendientes) >= procesos * EN_VUELO_POR_PROCESO:
+                        listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                        for futuro in listos:
+                            recoger(futuro.result())
+                for futuro in wait(pendientes).done:
+                    recoger(futuro.result())
+    finally:
+        destino.cerrar()
+
+    segundos = time.monotonic() - inicio
+    documentos_procesados = resumen['generadas'] + resumen['con_error']
+    resumen['segundos'] = segundos
+    resumen['pdf_por_segundo'] = resumen['generadas'] / segundos if segundos > 0 else 0.0
+    resumen['pdf_por_segundo_por_proceso'] = resumen['pdf_por_segundo'] / procesos
+    resumen['ms_cpu_por_pdf'] = segundos_cpu * 1000 / documentos_procesados if documentos_procesados else 0.0
+    return resumen
@@ -0,0 +1,136 @@
+"""
+VERIFICACIÓN DE ÍNDICES CON EXPLAIN
+===================================
+
+Ejecuta EXPLAIN sobre las consultas que generan las vistas de lista
+(mismos filtros y orden que en views.py) y revisa que el plan use un
+índice: sin recorrer la tabla completa y sin ordenar en memoria/disco
+(filesort en MySQL, "TEMP B-TREE" en SQLite, nodo Sort en PostgreSQL).
+
+Con pocas filas el optimizador puede preferir recorrer la tabla aunque el
+índice exista, por eso conviene ejecutarlo sobre datos generados
+(`python manage.py generar_datos`). Se usa desde el comando `verificar_indices`.
+"""
+
+import json
+from datetime import date, timedelta
+
+from django.db import connection
+
+from .models import Boleta, Lectura, Medidor, NotificacionLectura, NotificacionPago, Pago
+
+
+# Bajo esta cantidad de filas el plan puede no ser representativo
+FILAS_TABLA_GRANDE = 10000
+
+ORDENAMIENTO = 'ordenamiento sin índice'
+
+# Rango sobre una columna y orden por otra: ningún índice sirve para ambos.
+# El índice de la columna filtrada acota las filas y solo ese subconjunto se ordena.
+ORDENAMIENTO_ACEPTADO = {'lista_boletas?fecha_vencimiento'}
+
+
+def consultas_listas():
+    """
+    Retorna {etiqueta: queryset} con las consultas de página de cada vista de lista.
+    """
+    hace_un_mes = date.today() - timedelta(days=30)
+    medidor_id = Medidor.objects.order_by('id').values_list('id', flat=True).first() or 0
+    orden_lecturas = ('-fecha_lectura', '-id')
+    return {
+        'lista_lecturas': Lectura.objects.order_by(*orden_lecturas)[:6],
+        'lista_lecturas?periodo': Lectura.objects.filter(fecha_lectura__gte=hace_un_mes).order_by(*orden_lecturas)[:6],
+        'lista_lecturas?medidor': Lectura.objects.filter(
+            medidor_id=medidor_id, fecha_lectura__gte=hace_un_mes - timedelta(days=365)
+        ).order_by(*orden_lecturas)[:6],
+        'lista_boletas': Boleta.objects.order_by('-fecha_emision')[:5],
+        'lista_boletas?estado': Boleta.objects.filter(estado__in=['Pendiente']).order_by('-fecha_emision')[:5],
+        'lista_boletas?fecha_emision': Boleta.objects.filter(fecha_emision__gte=hace_un_mes).order_by('-fecha_emision')[:5],
+        'lista_boletas?fecha_vencimiento': Boleta.objects.filter(fecha_vencimiento__lte=hace_un_mes).order_by('-fecha_emision')[:5],
+        'lista_pagos': Pago.objects.order_by('-fecha_pago', '-id')[:6],
+        'lista_notificaciones (lectura)': NotificacionLectura.objects.order_by('-fecha_notificacion')[:5],
+        'lista_notificaciones?estado (lectura)': NotificacionLectura.objects.filter(revisada=False).order_by('-fecha_notificacion')[:5],
+        'lista_notificaciones (pago)': NotificacionPago.objects.order_by('-fecha_notificacion')[:5],
+        'lista_notificaciones?estado (pago)': NotificacionPago.objects.filter(revisada=False).order_by('-fecha_notificacion')[:5],
+    }
+
+
+def _problemas_mysql(queryset):
+    plan = queryset.explain(format='json')
+    problemas = set()
+
+    def recorrer(nodo):
+        if isinstance(nodo, dict):
+            if nodo.get('using_filesort'):
+                problemas.add(ORDENAMIENTO + ' (filesort)')
+            if nodo.get('access_type') == 'ALL':
+                problemas.add('recorrido completo de ' + nodo.get('table_name', '?'))
+            for valor in nodo.values():
+                recorrer(valor)
+        elif isinstance(nodo, list):
+            for valor in nodo:
+                recorrer(valor)
+
+    recorrer(json.loads(plan))
+    return plan, sorted(problemas)
+
+
+def _problemas_sqlite(queryset):
+    plan = queryset.explain()
+    problemas = []
+    for linea in plan.splitlines():
+        if 'USE TEMP B-TREE' in linea:
+            problemas.append(ORDENAMIENTO)
+        elif ' SCAN ' in f' {linea} ' and 'INDEX' not in linea:
+            problemas.append('recorrido completo: ' + linea.split('SCAN', 1)[1].strip())
+    return plan, problemas
+
+
+def _problemas_postgresql(queryset):
+    plan = queryset.explain()
+    problemas = []
+    for linea in plan.splitlines():
+        nodo = linea.strip().lstrip('->').strip()
+        if nodo.startswith(('Sort ', 'Incremental Sort ')):
+            problemas.append(ORDENAMIENTO)
+        elif nodo.startswith('Seq Scan'):
+            problemas.append('recorrido completo: ' + nodo.split(' on ', 1)[-1].split(' ', 1)[0])
+    return plan, problemas
+
+
+ANALIZADORES = {
+    'mysql': _problemas_mysql,
+    'sqlite': _problemas_sqlite,
+    'postgresql': _problemas_postgresql,
+}
+
+
+def analizar_plan(queryset):
+    """
+    Retorna (plan, problemas) para el queryset. problemas es una lista vacía
+    si la consulta se resuelve con índices.
+    """
+    analizador = ANALIZADORES.get(connection.vendor)
+    if analizador is None:
+        raise NotImplementedError(f'EXPLAIN no soportado para el motor {connection.vendor}')
+    return analizador(queryset)
+
+
+def verificar_indices():
+    """
+    Analiza todas las consultas de consultas_listas().
+
+    retorna:
+        list: (etiqueta, filas de la tabla, plan, problemas) por consulta
+    """
+    resultados = []
+    filas_por_modelo = {}
+    for etiqueta, queryset in consultas_listas().items():
+        modelo = queryset.model
+        if modelo not in filas_por_modelo:
+            filas_por_modelo[modelo] = modelo.objects.count()
+        plan, problemas = analizar_plan(queryset)
+        if etiqueta in ORDENAMIENTO_ACEPTADO:
+            problemas = [problema for problema in problemas if not problema.startswith(ORDENAMIENTO)]
+        resultados.append((etiqueta, filas_por_modelo[modelo], plan, problemas))
+    return resultados
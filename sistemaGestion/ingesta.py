@@ -0,0 +1,365 @@
+"""
+INGESTA ASÍNCRONA DE LECTURAS (ASGI)
+====================================
+
+Endpoint para que los head-end de medición envíen lecturas por lotes sin
+ocupar un worker síncrono por request:
+
+    POST /api/ingesta/lecturas/
+    Authorization: Bearer <token>
+    {"lecturas": [{"numero_medidor": "MED-001", "fecha_lectura": "2026-10-01",
+                   "lectura_actual": 12345, "tipo_lectura": "Digital"}, ...]}
+
+    202 → {"aceptadas": n, "en_cola": filas pendientes}
+    401 token inválido · 400 JSON inválido · 413 cuerpo muy grande
+    503 + Retry-After: buffer lleno, el head-end debe reintentar más tarde
+
+Las filas (mismas columnas que importacion.py) quedan en un buffer en memoria
+y una tarea de fondo las guarda por micro-lotes: cuando se junta un lote
+completo o cada INTERVALO_SEGUNDOS. Cada lote se valida y guarda con
+importacion.validar_lote / guardar_lecturas (upsert), en un hilo aparte para
+no bloquear el event loop. Las filas rechazadas por validación se registran
+en el logger 'sistemaGestion.ingesta'; si la base de datos falla el lote
+vuelve al buffer y se reintenta. Un lote que falla MAXIMO_INTENTOS veces
+seguidas se descarta para no bloquear la cola: sus filas se agregan a
+ARCHIVO_DESCARTES (JSONL, se recupera con `python manage.py importar_lecturas
+<archivo>`) o, sin archivo, se registran una a una en el logger. Como el
+guardado es idempotente, un reenvío del head-end no duplica lecturas.
+
+GET en la misma ruta (con token) retorna el estado del buffer.
+
+AplicacionIngesta envuelve la aplicación ASGI de Django (ver asgi.py) y
+atiende esta ruta antes del stack de middleware (sesión, CSRF, presupuesto de
+consultas), que no aplica a un cliente máquina con token. Solo existe al
+servir con un servidor ASGI (uvicorn, daphne); con el evento lifespan la tarea
+de fondo se inicia al arrancar y el buffer se vacía al detener el servidor.
+Lo que quede en memoria si el proceso muere sin detenerse se pierde: el
+head-end debe conservar lo enviado hasta recibir el 202 y reenviar ante error.
+
+CONFIGURACIÓN (settings.INGESTA_LECTURAS): TOKENS {nombre: token}, CAPACIDAD,
+TAMANO_LOTE, INTERVALO_SEGUNDOS, MAXIMO_BYTES, REINTENTO_SEGUNDOS,
+MAXIMO_INTENTOS, ARCHIVO_DESCARTES.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import math
+import time
+from collections import deque
+from itertools import count, islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .importacion import ResolutorMedidores, guardar_lecturas, validar_lote
+
+
+logger = logging.getLogger('sistemaGestion.ingesta')
+
+RUTA_INGESTA = '/api/ingesta/lecturas/'
+
+CONFIGURACION_POR_DEFECTO = {
+    'TOKENS': {},
+    'CAPACIDAD': 50000,          # filas en memoria antes de responder 503
+    'TAMANO_LOTE': 5000,         # filas por escritura
+    'INTERVALO_SEGUNDOS': 1.0,   # espera máxima de una fila antes de guardarse
+    'MAXIMO_BYTES': 5 * 1024 * 1024,
+    'REINTENTO_SEGUNDOS': 5.0,   # pausa tras un error de base de datos
+    'MAXIMO_INTENTOS': 5,        # intentos de un lote antes de descartarlo
+    'ARCHIVO_DESCARTES': None,   # JSONL con las filas de los lotes descartados
+}
+
+
+def configuracion():
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'INGESTA_LECTURAS', {})}
+
+
+def guardar_lote(lote):
+    """
+    Valida y guarda (upsert) un lote de (referencia, fila). Se ejecuta en un
+    hilo, fuera del event loop.
+
+    retorna:
+        dict: creadas, actualizadas, sin_cambios, rechazadas
+    """
+    close_old_connections()
+    try:
+        validas, rechazadas = validar_lote(lote, ResolutorMedidores())
+        resumen = guardar_lecturas(validas)
+    finally:
+        close_old_connections()
+    for referencia, mensaje in rechazadas:
+        logger.warning('Lectura rechazada (%s): %s', referencia, mensaje)
+    resumen['rechazadas'] = len(rechazadas)
+    return resumen
+
+
+def escribir_descartes(ruta, lote):
+    """Agrega las filas de un lote descartado al archivo JSONL ruta (formato de importacion.py)."""
+    with open(ruta, 'a', encoding='utf-8') as archivo:
+        for _, fila in lote:
+            archivo.write(json.dumps(fila, ensure_ascii=False, default=str) + '\n')
+
+
+class BufferIngesta:
+    """
+    Cola en memoria de filas pendientes y la tarea que las guarda por lotes.
+    Se usa solo desde el event loop (un hilo), por lo que no necesita locks.
+    """
+
+    def __init__(self, capacidad, tamano_lote, intervalo, reintento, maximo_intentos=5, archivo_descartes=None):
+        self.filas = deque()
+        self.capacidad = capacidad
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.reintento = reintento
+        self.maximo_intentos = maximo_intentos
+        self.archivo_descartes = archivo_descartes
+        self.en_proceso = 0  # filas del lote que se está guardando
+        self.intentos = 0    # fallos seguidos del lote al frente de la cola
+        self.estadisticas = {
+            'recibidas': 0, 'creadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'rechazadas': 0,
+            'lotes': 0, 'rechazos_por_capacidad': 0, 'errores_bd': 0, 'descartadas': 0,
+        }
+        self._hay_lote = None
+        self._detener = False
+        self._tarea = None
+
+    def ocupacion(self):
+        return len(self.filas) + self.en_proceso
+
+    def admitir(self, filas):
+        """Encola las filas si caben completas; retorna False si el buffer está lleno."""
+        if self.ocupacion() + len(filas) > self.capacidad:
+            self.estadisticas['rechazos_por_capacidad'] += 1
+            return False
+        self.filas.extend(filas)
+        self.estadisticas['recibidas'] += len(filas)
+        if len(self.filas) >= self.tamano_lote and self._hay_lote is not None:
+            self._hay_lote.set()
+        return True
+
+    def iniciar(self):
+        """Inicia la tarea de fondo en el event loop actual (si no está iniciada o terminó con error)."""
+        if self._tarea is not None and self._tarea.done():
+            if not self._tarea.cancelled() and self._tarea.exception() is not None:
+                logger.error('La tarea de ingesta terminó con error; se reinicia', exc_info=self._tarea.exception())
+            self._tarea = None
+        if self._tarea is None:
+            self._hay_lote = asyncio.Event()
+            self._detener = False
+            self._tarea = asyncio.get_running_loop().create_task(self._ciclo())
+
+    async def detener(self):
+        """Termina la tarea de fondo después de guardar todo lo pendiente."""
+        if self._tarea is None:
+            return
+        self._detener = True
+        self._hay_lote.set()
+        await self._tarea
+        self._tarea = None
+
+    async def _ciclo(self):
+        # Se revisa _detener al final de cada vuelta y no al inicio: si detener() llega antes de
+        # la primera espera, el evento ya está activo y lo pendiente se guarda igual
+        while True:
+            try:
+                await asyncio.wait_for(self._hay_lote.wait(), timeout=self.intervalo)
+                por_tiempo = self._detener
+            except asyncio.TimeoutError:
+                por_tiempo = True
+            self._hay_lote.clear()
+            # Lotes completos de inmediato; el resto cuando vence el intervalo
+            while len(self.filas) >= self.tamano_lote or (por_tiempo and self.filas):
+                if not await self._guardar_lote():
+                    if self._detener:
+                        logger.error('Servidor detenido con %d lecturas sin guardar', len(self.filas))
+                        return
+                    await asyncio.sleep(self.reintento)
+                    break
+            if self._detener and not self.filas:
+                return
+
+    async def _guardar_lote(self):
+        lote = list(islice(self.filas, self.tamano_lote))
+        for _ in lote:
+            self.filas.popleft()
+        self.en_proceso = len(lote)
+        inicio = time.monotonic()
+        try:
+            resumen = await sync_to_async(guardar_lote, thread_sensitive=False)(lote)
+        except Exception:
+            self.estadisticas['errores_bd'] += 1
+            self.intentos += 1
+            if self.intentos < self.maximo_intentos:
+                logger.exception('Error al guardar un lote de %d lecturas (intento %d de %d); se reintentará',
+                                 len(lote), self.intentos, self.maximo_intentos)
+                self.filas.extendleft(reversed(lote))
+            else:
+                logger.exception('Error al guardar un lote de %d lecturas (intento %d); se descarta',
+                                 len(lote), self.intentos)
+                self.intentos = 0
+                await self._descartar(lote)
+            return False
+        finally:
+            self.en_proceso = 0
+        self.intentos = 0
+        for clave, cantidad in resumen.items():
+            self.estadisticas[clave] += cantidad
+        self.estadisticas['lotes'] += 1
+        logger.debug('Lote de %d lecturas guardado en %.1f ms', len(lote), (time.monotonic() - inicio) * 1000)
+        return True
+
+    async def _descartar(self, lote):
+        """Saca de la cola un lote que no se pudo guardar: lo escribe en archivo_descartes o en el logger."""
+        self.estadisticas['descartadas'] += len(lote)
+        if self.archivo_descartes:
+            try:
+                await sync_to_async(escribir_descartes, thread_sensitive=False)(self.archivo_descartes, lote)
+            except OSError:
+                logger.exception('No se pudo escribir en %s', self.archivo_descartes)
+            else:
+                logger.error('%d lecturas descartadas agregadas a %s (%s … %s)',
+                             len(lote), self.archivo_descartes, lote[0][0], lote[-1][0])
+                return
+        for referencia, fila in lote:
+            logger.error('Lectura descartada (%s): %s', referencia, json.dumps(fila, ensure_ascii=False, default=str))
+
+
+async def _leer_cuerpo(receive, maximo_bytes):
+    """Retorna el cuerpo del request, None si supera maximo_bytes o False si el cliente se desconectó."""
+    partes = []
+    total = 0
+    while True:
+        mensaje = await receive()
+        if mensaje['type'] == 'http.disconnect':
+            return False
+        parte = mensaje.get('body', b'')
+        total += len(parte)
+        if total > maximo_bytes:
+            return None
+        partes.append(parte)
+        if not mensaje.get('more_body', False):
+            return b''.join(partes)
+
+
+async def _responder(send, estado, datos, encabezados=()):
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': estado,
+        'headers': [
+            (b'content-type', b'application/json; charset=utf-8'),
+            (b'content-length', str(len(cuerpo)).encode()),
+            *encabezados,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': cuerpo})
+
+
+def _filas_del_payload(datos):
+    """Extrae la lista de filas del JSON recibido; lanza ValueError si la forma no es válida."""
+    if isinstance(datos, dict):
+        datos = datos.get('lecturas')
+    if not isinstance(datos, list):
+        raise ValueError('Se esperaba {"lecturas": [...]} o una lista de lecturas.')
+    for indice, fila in enumerate(datos, start=1):
+        if not isinstance(fila, dict):
+            raise ValueError(f'La lectura {indice} no es un objeto JSON.')
+    return datos
+
+
+class AplicacionIngesta:
+    """
+    Aplicación ASGI que atiende RUTA_INGESTA y delega todo lo demás en la
+    aplicación de Django.
+    """
+
+    def __init__(self, aplicacion_django):
+        self.aplicacion_django = aplicacion_django
+        opciones = configuracion()
+        self.tokens = {token.encode(): nombre for nombre, token in opciones['TOKENS'].items() if token}
+        self.maximo_bytes = opciones['MAXIMO_BYTES']
+        self.buffer = BufferIngesta(
+            opciones['CAPACIDAD'], opciones['TAMANO_LOTE'],
+            opciones['INTERVALO_SEGUNDOS'], opciones['REINTENTO_SEGUNDOS'],
+            opciones['MAXIMO_INTENTOS'], opciones['ARCHIVO_DESCARTES'],
+        )
+        self.reintentar_en = str(max(1, math.ceil(opciones['INTERVALO_SEGUNDOS']))).encode()
+        self._solicitudes = count(1)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == RUTA_INGESTA:
+            await self._atender(scope, receive, send)
+        else:
+            await self.aplicacion_django(scope, receive, send)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                self.buffer.iniciar()
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                await self.buffer.detener()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _origen(self, scope):
+        """Nombre del head-end dueño del token Bearer, o None."""
+        encabezados = dict(scope.get('headers', []))
+        tipo, _, token = encabezados.get(b'authorization', b'').partition(b' ')
+        if tipo.lower() != b'bearer' or not token:
+            return None
+        for valido, nombre in self.tokens.items():
+            if hmac.compare_digest(token, valido):
+                return nombre
+        return None
+
+    async def _atender(self, scope, receive, send):
+        origen = self._origen(scope)
+        if origen is None:
+            await _responder(send, 401, {'error': 'Token inválido o ausente.'}, [(b'www-authenticate', b'Bearer')])
+            return
+        # Sin servidor con lifespan (ej: daphne) la tarea se inicia con el primer request
+        self.buffer.iniciar()
+
+        if scope['method'] == 'GET':
+            await _responder(send, 200, {
+                'en_cola': self.buffer.ocupacion(), 'capacidad': self.buffer.capacidad, **self.buffer.estadisticas,
+            })
+            return
+        if scope['method'] != 'POST':
+            await _responder(send, 405, {'error': 'Método no permitido.'}, [(b'allow', b'GET, POST')])
+            return
+
+        cuerpo = await _leer_cuerpo(receive, self.maximo_bytes)
+        if cuerpo is False:
+            return
+        if cuerpo is None:
+            await _responder(send, 413, {'error': f'El cuerpo supera {self.maximo_bytes} bytes; divida el lote.'})
+            return
+        try:
+            filas = _filas_del_payload(json.loads(cuerpo))
+        except json.JSONDecodeError as error:
+            await _responder(send, 400, {'error': f'JSON inválido: {error}'})
+            return
+        except ValueError as error:
+            await _responder(send, 400, {'error': str(error)})
+            return
+
+        solicitud = next(self._solicitudes)
+        referencias = [(f'{origen}#{solicitud}:{indice}', fila) for indice, fila in enumerate(filas, start=1)]
+        if not self.buffer.admitir(referencias):
+            await _responder(
+                send, 503,
+                {'error': 'Buffer de ingesta lleno, reintente más tarde.', 'en_cola': self.buffer.ocupacion()},
+                [(b'retry-after', self.reintentar_en)],
+            )
+            return
+        await _responder(send, 202, {'aceptadas': len(filas), 'en_cola': self.buffer.ocupacion()})
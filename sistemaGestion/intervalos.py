@@ -0,0 +1,285 @@
+"""
+DATOS DE INTERVALO (CURVA DE CARGA DE 15 MINUTOS)
+=================================================
+
+Los medidores inteligentes entregan 96 consumos por día. En lugar de una fila
+por intervalo se guarda una fila por (medidor, día) en LecturaIntervalo, con
+los 96 valores empaquetados como uint32 little-endian (Wh por intervalo).
+Un año de un medidor son 365 filas de 384 bytes.
+
+- registrar_intervalos() / registrar_lote(): agrega o corrige intervalos a
+  partir de una hora de inicio. Los días afectados se leen con UNA consulta,
+  se combinan en memoria y se guardan con upsert sobre (medidor, fecha).
+  Reenviar los mismos datos no duplica nada.
+- leer_intervalos(): recorre un rango de días entregando memoryview sobre los
+  blobs, sin copiarlos; como_numpy() los expone como arreglo NumPy (también
+  sin copia).
+- consumo_por_periodo() / consolidar_lecturas(): suman los días en SQL (con la
+  columna consumo_wh, sin leer los blobs) y generan Lecturas diarias o
+  mensuales que siguen el flujo normal de lecturas (derivación de consumo,
+  boletas).
+
+Los intervalos se ubican por hora local (TIME_ZONE). El día del cambio de
+horario de invierno la hora repetida se escribe dos veces sobre los mismos
+intervalos; el día de verano la hora que no existe queda sin dato.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .importacion import guardar_lecturas, opciones_upsert
+from .models import Lectura, LecturaIntervalo, Medidor
+
+
+SIN_DATO = LecturaIntervalo.SIN_DATO
+INTERVALOS_POR_DIA = LecturaIntervalo.INTERVALOS_POR_DIA
+MINUTOS_INTERVALO = LecturaIntervalo.MINUTOS_INTERVALO
+PERIODOS = ('dia', 'mes')
+
+
+def ubicar_intervalo(momento):
+    """
+    Retorna (fecha, índice del intervalo) para el inicio de un intervalo.
+    Las horas con zona se convierten a la hora local.
+    """
+    if timezone.is_aware(momento):
+        momento = timezone.localtime(momento)
+    minutos = momento.hour * 60 + momento.minute
+    if minutos % MINUTOS_INTERVALO or momento.second or momento.microsecond:
+        raise ValueError(f"{momento} no es el inicio de un intervalo de {MINUTOS_INTERVALO} minutos")
+    return momento.date(), minutos // MINUTOS_INTERVALO
+
+
+def _validar_valor(valor):
+    if valor is None:
+        return
+    if not isinstance(valor, int) or isinstance(valor, bool) or not 0 <= valor < SIN_DATO:
+        raise ValueError(f"Consumo de intervalo inválido: {valor!r} (entero de Wh entre 0 y {SIN_DATO - 1})")
+
+
+def registrar_lote(registros):
+    """
+    Guarda intervalos de varios medidores.
+
+    parámetros:
+        registros: iterable de (medidor_id, inicio, valores), donde inicio es
+            la hora del primer intervalo y valores una secuencia de Wh
+            consecutivos (None deja el intervalo como estaba)
+
+    retorna:
+        dict: dias_creados, dias_actualizados, intervalos
+    """
+    # (medidor_id, fecha) → {índice: valor}; el último valor de cada intervalo es el que vale
+    cambios = {}
+    intervalos = 0
+    for medidor_id, inicio, valores in registros:
+        fecha, indice = ubicar_intervalo(inicio)
+        for valor in valores:
+            _validar_valor(valor)
+            if valor is not None:
+                cambios.setdefault((medidor_id, fecha), {})[indice] = valor
+                intervalos += 1
+            indice += 1
+            if indice == INTERVALOS_POR_DIA:
+                fecha, indice = fecha + timedelta(days=1), 0
+
+    if not cambios:
+        return {'dias_creados': 0, 'dias_actualizados': 0, 'intervalos': 0}
+
+    # Días ya guardados (una consulta)
+    fechas = [fecha for _, fecha in cambios]
+    existentes = {
+        (fila.medidor_id, fila.fecha): fila
+        for fila in LecturaIntervalo.objects.filter(
+            medidor_id__in={medidor_id for medidor_id, _ in cambios},
+            fecha__range=(min(fechas), max(fechas)),
+        ).order_by()
+    }
+
+    filas = []
+    for (medidor_id, fecha), valores in cambios.items():
+        fila = existentes.get((medidor_id, fecha))
+        arreglo = fila.como_array() if fila else LecturaIntervalo.dia_vacio()
+        for indice, valor in valores.items():
+            arreglo[indice] = valor
+        fila = LecturaIntervalo(medidor_id=medidor_id, fecha=fecha)
+        fila.asignar(arreglo)
+        filas.append(fila)
+
+    with transaction.atomic():
+        LecturaIntervalo.objects.bulk_create(
+            filas,
+            batch_size=1000,
+            **opciones_upsert(['medidor', 'fecha'], ['valores', 'intervalos_registrados', 'consumo_wh']),
+        )
+    actualizados = sum(1 for clave in cambios if clave in existentes)
+    return {'dias_creados': len(cambios) - actualizados, 'dias_actualizados': actualizados, 'intervalos': intervalos}
+
+
+def registrar_intervalos(medidor_id, inicio, valores):
+    """Guarda los intervalos consecutivos de un medidor desde `inicio` (ver registrar_lote)."""
+    return registrar_lote([(medidor_id, inicio, valores)])
+
+
+def leer_intervalos(medidor_id, desde, hasta):
+    """
+    Generador de (fecha, memoryview de 96 uint32) con los días guardados del
+    medidor entre `desde` y `hasta` (inclusive), en orden. Los días sin datos
+    no se entregan y los intervalos faltantes valen SIN_DATO.
+    Para una parte del día basta con cortar la vista: vista[32:48] (08:00 a 12:00).
+    """
+    filas = (
+        LecturaIntervalo.objects
+        .filter(medidor_id=medidor_id, fecha__range=(desde, hasta))
+        .order_by('fecha')
+        .only('fecha', 'valores')
+    )
+    for fila in filas.iterator(chunk_size=500):
+        yield fila.fecha, fila.vista()
+
+
+def como_numpy(vista):
+    """
+    Arreglo NumPy (uint32, solo lectura) sobre la vista, sin copiarla.
+    NumPy se importa aquí para no cargarlo en cada request web.
+    """
+    import numpy
+
+    return numpy.frombuffer(vista, dtype='<u4')
+
+
+def consumo_por_periodo(desde, hasta, periodo='mes', medidor_ids=None):
+    """
+    Suma de Wh por medidor y período, calculada en SQL.
+
+    retorna:
+        dict: {(medidor_id, fecha inicial del período): (wh, intervalos registrados)}
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo} (use {' o '.join(PERIODOS)})")
+    filas = LecturaIntervalo.objects.filter(fecha__range=(desde, hasta))
+    if medidor_ids is not None:
+        filas = filas.filter(medidor_id__in=medidor_ids)
+    if periodo == 'mes':
+        filas = filas.annotate(periodo=TruncMonth('fecha'))
+    else:
+        filas = filas.annotate(periodo=F('fecha'))
+    filas = (
+        filas.values('medidor_id', 'periodo')
+        .annotate(wh=Sum('consumo_wh'), intervalos=Sum('intervalos_registrados'))
+        .order_by('medidor_id', 'periodo')
+    )
+    return {
+        (fila['medidor_id'], _como_fecha(fila['periodo'])): (fila['wh'], fila['intervalos'])
+        for fila in filas
+    }
+
+
+def _como_fecha(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def _fin_periodo(inicio, periodo):
+    if periodo == 'dia':
+        return inicio
+    return inicio.replace(day=calendar.monthrange(inicio.year, inicio.month)[1])
+
+
+def _registros_previos(medidor_ids, fecha):
+    """{medidor_id: lectura_actual} de la última lectura de cada medidor anterior a `fecha`."""
+    previa = (
+        Lectura.objects
+        .filter(medidor_id=OuterRef('pk'), fecha_lectura__lt=fecha)
+        .order_by('-fecha_lectura', '-pk')
+    )
+    return dict(
+        Medidor.objects
+        .filter(pk__in=medidor_ids)
+        .annotate(registro=Subquery(previa.values('lectura_actual')[:1]))
+        .filter(registro__isnull=False)
+        .order_by()
+        .values_list('pk', 'registro')
+    )
+
+
+def consolidar_lecturas(desde, hasta, periodo='mes', medidor_ids=None, tipo_lectura='Digital'):
+    """
+    Genera una Lectura por medidor y período a partir de sus intervalos,
+    fechada el último día del período.
+
+    El registro (lectura_actual) continúa el de la lectura previa del medidor
+    sumando los kWh acumulados; el consumo de cada lectura se deriva luego
+    como en cualquier otra (importacion.guardar_lecturas). Si el medidor ya
+    tiene una lectura de ese tipo en esa fecha (ingresada a mano, importada o
+    de una consolidación anterior) no se reemplaza: se conserva y los
+    períodos siguientes continúan desde su registro. Los períodos sin ningún
+    intervalo registrado y los que aún no terminan (último día >= hoy) no
+    generan lectura.
+
+    retorna:
+        dict: creadas, actualizadas, sin_cambios, periodos, incompletos
+              (períodos con intervalos faltantes), existentes (períodos que
+              ya tenían lectura), sin_datos (períodos sin intervalos)
+    """
+    hoy = date.today()
+    if periodo == 'mes':
+        desde = desde.replace(day=1)
+        hasta = _fin_periodo(hasta, 'mes')
+    totales = consumo_por_periodo(desde, hasta, periodo, medidor_ids)
+    medidores = {medidor_id for medidor_id, _ in totales}
+    previos = _registros_previos(medidores, desde)
+    # Lecturas ya guardadas en el rango (una consulta); las de las fechas de cierre no se tocan
+    existentes = {
+        (medidor_id, fecha): registro
+        for medidor_id, fecha, registro in Lectura.objects.filter(
+            medidor_id__in=medidores, tipo_lectura=tipo_lectura, fecha_lectura__range=(desde, hasta),
+        ).order_by().values_list('medidor_id', 'fecha_lectura', 'lectura_actual')
+    }
+
+    lecturas = []
+    incompletos = omitidas = sin_datos = 0
+    for medidor_id, grupo in groupby(totales.items(), key=lambda item: item[0][0]):
+        base = previos.get(medidor_id)
+        acumulado_wh = 0
+        for (_, inicio), (wh, intervalos) in grupo:
+            fin = _fin_periodo(inicio, periodo)
+            if fin >= hoy:
+                break
+            if not intervalos:
+                sin_datos += 1
+                continue
+            if (medidor_id, fin) in existentes:
+                # El registro de la lectura existente ya incluye el consumo hasta su fecha
+                omitidas += 1
+                base, acumulado_wh = existentes[(medidor_id, fin)], 0
+                continue
+            dias = (fin - inicio).days + 1
+            if intervalos < dias * INTERVALOS_POR_DIA:
+                incompletos += 1
+            acumulado_wh += wh
+            # Con kWh acumulados (y no por período) el redondeo no se arrastra
+            registro = (base or 0) + acumulado_wh // 1000
+            lecturas.append(Lectura(
+                medidor_id=medidor_id,
+                fecha_lectura=fin,
+                tipo_lectura=tipo_lectura,
+                lectura_actual=registro,
+                consumo_energetico=None if base is not None else registro,
+            ))
+
+    resumen = guardar_lecturas(lecturas)
+    resumen.update(periodos=len(lecturas), incompletos=incompletos, existentes=omitidas, sin_datos=sin_datos)
+    return resumen
+
+
+def periodo_anterior(hoy=None):
+    """(primer día, último día) del mes anterior a `hoy`."""
+    hoy = hoy or date.today()
+    fin = hoy.replace(day=1) - timedelta(days=1)
+    return fin.replace(day=1), fin
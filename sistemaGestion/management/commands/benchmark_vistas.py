@@ -0,0 +1,114 @@
+import json
+import math
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.benchmark import (
+    TIEMPO_MAXIMO_ENDPOINT, base_de_datos_de_prueba, commit_actual, comparar, ejecutar_benchmark, guardar_json
+)
+from sistemaGestion.generador import generar_datos
+from sistemaGestion.models import Lectura
+
+
+# Escala usada en la base de datos de prueba si no se indica --escalas
+ESCALA_POR_DEFECTO = 10000
+
+
+# Uso:
+#   python manage.py benchmark_vistas                       (base de prueba con 10000 lecturas)
+#   python manage.py benchmark_vistas --escalas 10000,100000,1000000 --semilla 42
+#   python manage.py benchmark_vistas --rutas lista_,detalle_,pdf_,dashboard,crear_
+#   python manage.py benchmark_vistas --bd-actual           (datos de la base configurada, solo lectura)
+#   python manage.py benchmark_vistas --comparar benchmark_abc1234.json
+class Command(BaseCommand):
+    help = 'Mide latencia p50/p95, consultas SQL y memoria de todas las vistas GET y guarda los resultados en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escalas', default='',
+                            help='Cantidades de lecturas separadas por coma. Antes de cada medición se '
+                                 f'generan datos sintéticos hasta alcanzar esa cantidad (por defecto {ESCALA_POR_DEFECTO})')
+        parser.add_argument('--meses', type=int, default=12, help='Meses de lecturas por medidor al generar datos')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador de datos')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Requests por endpoint')
+        parser.add_argument('--rutas', default='',
+                            help='Prefijos de nombres de URL separados por coma (ej: lista_,detalle_,pdf_). '
+                                 'Por defecto se miden todas las rutas GET menos los formularios (crear_, editar_)')
+        parser.add_argument('--bd-actual', action='store_true',
+                            help='Mide sobre la base de datos configurada (ej: una copia de producción) en lugar '
+                                 'de una base de prueba desechable. No genera datos ni mide rutas que escriben')
+        parser.add_argument('--tiempo-maximo', type=float, default=TIEMPO_MAXIMO_ENDPOINT,
+                            help='Segundos por endpoint; al superarlos no se repite el request')
+        parser.add_argument('--salida', default=None, help='Archivo JSON de resultados (por defecto benchmark_<commit>.json)')
+        parser.add_argument('--comparar', default=None, help='JSON de una ejecución anterior para comparar')
+
+    def handle(self, *args, **options):
+        try:
+            escalas = sorted(int(valor) for valor in options['escalas'].split(',') if valor.strip())
+        except ValueError:
+            raise CommandError('--escalas debe ser una lista de enteros separados por coma')
+        prefijos = [valor.strip() for valor in options['rutas'].split(',') if valor.strip()]
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor a cero')
+        bd_prueba = not options['bd_actual']
+        if not bd_prueba and escalas:
+            raise CommandError('--escalas genera datos sintéticos: no se puede usar con --bd-actual')
+        if bd_prueba and not escalas:
+            escalas = [ESCALA_POR_DEFECTO]
+
+        def progreso(etiqueta, metricas):
+            memoria = (
+                f"{metricas['memoria_pico_kb']:>9.1f} KB" if metricas['memoria_pico_kb'] is not None
+                else f"truncado (> {options['tiempo_maximo']:.0f} s)"
+            )
+            self.stdout.write(
+                f"  {etiqueta:<60} p50 {metricas['p50_ms']:>8.1f} ms  p95 {metricas['p95_ms']:>8.1f} ms  "
+                f"{metricas['consultas']:>4} consultas  {memoria}"
+            )
+
+        ejecuciones = []
+        if bd_prueba:
+            self.stdout.write('Creando la base de datos de prueba (se destruye al terminar)...')
+        with base_de_datos_de_prueba() if bd_prueba else nullcontext():
+            for escala in escalas or [None]:
+                if escala is not None:
+                    faltantes = escala - Lectura.objects.count()
+                    if faltantes > 0:
+                        clientes = math.ceil(faltantes / options['meses'])
+                        self.stdout.write(f"Generando {clientes} clientes para llegar a {escala} lecturas...")
+                        generar_datos(clientes=clientes, meses=options['meses'], semilla=options['semilla'] + escala)
+                self.stdout.write(self.style.MIGRATE_HEADING(f"Escala: {escala or 'datos actuales'}"))
+                ejecuciones.append(ejecutar_benchmark(
+                    options['repeticiones'], escala, progreso, prefijos,
+                    bd_prueba=bd_prueba, tiempo_maximo=options['tiempo_maximo'],
+                ))
+
+        resultado = {'commit': commit_actual(), 'ejecuciones': ejecuciones}
+        salida = options['salida'] or f"benchmark_{resultado['commit'] or 'sin_commit'}.json"
+        guardar_json(resultado, salida)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {salida}"))
+
+        if options['comparar']:
+            self.comparar_con(options['comparar'], ejecuciones)
+
+    def comparar_con(self, ruta, ejecuciones):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'No se pudo leer {ruta}: {error}')
+
+        anteriores = {ejecucion['escala']: ejecucion for ejecucion in anterior.get('ejecuciones', [])}
+        for ejecucion in ejecuciones:
+            previa = anteriores.get(ejecucion['escala'])
+            if not previa:
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"Comparación con {anterior.get('commit')} (escala {ejecucion['escala'] or 'datos actuales'})"
+            ))
+            for etiqueta, p95_antes, p95_ahora, variacion, consultas_antes, consultas_ahora in comparar(previa, ejecucion):
+                estilo = self.style.ERROR if variacion > 20 or consultas_ahora > consultas_antes else self.style.SUCCESS
+                self.stdout.write(estilo(
+                    f"  {etiqueta:<60} p95 {p95_antes:>8.1f} → {p95_ahora:>8.1f} ms ({variacion:+.0f}%)  "
+                    f"consultas {consultas_antes} → {consultas_ahora}"
+                ))
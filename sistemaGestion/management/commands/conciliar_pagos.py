@@ -0,0 +1,77 @@
+import csv
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.conciliacion import METODO_POR_DEFECTO, TAMANO_LOTE, conciliar_pagos
+from sistemaGestion.importacion import ErrorImportacion
+from sistemaGestion.models import Pago
+
+
+COLUMNAS_REPORTE = ['linea', 'numero_referencia', 'boleta', 'monto_pagado', 'resultado', 'detalle']
+
+
+# Uso: python manage.py conciliar_pagos cartola.csv [--reporte reporte.csv] [--solo-verificar]
+class Command(BaseCommand):
+    help = ('Registra los pagos de una cartola bancaria (CSV), asociándolos a sus boletas por id o por cliente, '
+            'y genera el reporte de conciliación (conciliados, sin coincidencia, en exceso, duplicados)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV')
+        parser.add_argument('--reporte', default=None,
+                            help='Archivo CSV donde escribir el resultado de cada fila')
+        parser.add_argument('--metodo', default=METODO_POR_DEFECTO,
+                            choices=[valor for valor, _ in Pago.METODOPAGO_CHOICES],
+                            help='metodo_pago de las filas que no lo indican')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por lote/transacción')
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo clasifica las filas, sin registrar pagos')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor a cero')
+
+        with ExitStack() as stack:
+            try:
+                archivo = stack.enter_context(open(options['archivo'], encoding='utf-8-sig', newline=''))
+            except OSError as error:
+                raise CommandError(f"No se pudo abrir {options['archivo']}: {error}")
+
+            if options['reporte']:
+                reporte = csv.DictWriter(
+                    stack.enter_context(open(options['reporte'], 'w', encoding='utf-8', newline='')),
+                    fieldnames=COLUMNAS_REPORTE,
+                )
+                reporte.writeheader()
+                reportar = reporte.writerow
+            else:
+                def reportar(entrada):
+                    if entrada['resultado'] != 'conciliado':
+                        self.stderr.write(f"  Línea {entrada['linea']} ({entrada['resultado']}): {entrada['detalle']}")
+
+            def progreso(resumen):
+                self.stdout.write(f"  {resumen['leidas']} filas leídas, {resumen['conciliado'] + resumen['exceso']} pagos")
+
+            try:
+                resumen = conciliar_pagos(
+                    archivo,
+                    tamano_lote=options['lote'],
+                    metodo_por_defecto=options['metodo'],
+                    solo_verificar=options['solo_verificar'],
+                    reportar=reportar,
+                    progreso=progreso if options['verbosity'] > 1 else None,
+                )
+            except ErrorImportacion as error:
+                raise CommandError(str(error))
+
+        accion = 'por registrar' if options['solo_verificar'] else 'registrados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['leidas']} filas en {resumen['segundos']:.2f}s: "
+            f"{resumen['conciliado'] + resumen['exceso']} pagos {accion} (${resumen['monto_conciliado']:,}) "
+            f"en {resumen['boletas_afectadas']} boletas"
+        ))
+        self.stdout.write(
+            f"Conciliados: {resumen['conciliado']} | En exceso: {resumen['exceso']} | "
+            f"Sin coincidencia: {resumen['sin_coincidencia']} | Duplicados: {resumen['duplicado']} | "
+            f"Rechazados: {resumen['rechazado']}"
+        )
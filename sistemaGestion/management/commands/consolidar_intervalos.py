@@ -0,0 +1,52 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.intervalos import PERIODOS, consolidar_lecturas, periodo_anterior
+from sistemaGestion.models import Lectura
+
+
+# Uso: python manage.py consolidar_intervalos [--desde 2026-01-01 --hasta 2026-03-31] [--periodo dia] [--medidor 12]
+class Command(BaseCommand):
+    help = ('Genera las lecturas diarias o mensuales a partir de los intervalos de 15 minutos '
+            '(por defecto, las mensuales del mes anterior). Volver a ejecutarlo no crea duplicados')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, default=None, help='Primer día (AAAA-MM-DD)')
+        parser.add_argument('--hasta', type=date.fromisoformat, default=None, help='Último día (AAAA-MM-DD)')
+        parser.add_argument('--periodo', choices=PERIODOS, default='mes', help='Una lectura por día o por mes')
+        parser.add_argument('--medidor', type=int, action='append', dest='medidores',
+                            help='Id de medidor a consolidar (se puede repetir). Por defecto todos')
+        parser.add_argument('--tipo', default='Digital', choices=[valor for valor, _ in Lectura.TIPO_LECTURA_CHOICES],
+                            help='tipo_lectura de las lecturas generadas')
+
+    def handle(self, *args, **options):
+        desde, hasta = periodo_anterior()
+        desde = options['desde'] or desde
+        hasta = options['hasta'] or hasta
+        if desde > hasta:
+            raise CommandError('--desde no puede ser posterior a --hasta')
+
+        resumen = consolidar_lecturas(
+            desde, hasta,
+            periodo=options['periodo'],
+            medidor_ids=options['medidores'],
+            tipo_lectura=options['tipo'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['periodos']} períodos consolidados entre {desde} y {hasta}: "
+            f"{resumen['creadas']} lecturas creadas, {resumen['actualizadas']} actualizadas, "
+            f"{resumen['sin_cambios']} sin cambios"
+        ))
+        if resumen['existentes']:
+            self.stdout.write(
+                f"{resumen['existentes']} períodos ya tenían lectura de tipo {options['tipo']} en su fecha de cierre; "
+                f"se conservaron sin cambios"
+            )
+        if resumen['sin_datos']:
+            self.stdout.write(f"{resumen['sin_datos']} períodos sin intervalos registrados no generaron lectura")
+        if resumen['incompletos']:
+            self.stdout.write(self.style.WARNING(
+                f"{resumen['incompletos']} períodos tienen intervalos sin dato; su consumo puede estar subestimado"
+            ))
@@ -0,0 +1,122 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from sistemaGestion.consumos import recalcular_consumos
+from sistemaGestion.models import Lectura, NotificacionLectura
+
+
+def columnas_tabla(modelo):
+    """Nombres de las columnas que tiene hoy la tabla del modelo en la base de datos."""
+    with connection.cursor() as cursor:
+        return {columna.name for columna in connection.introspection.get_table_description(cursor, modelo._meta.db_table)}
+
+
+# Uso: python manage.py deduplicar_lecturas [--solo-verificar]
+class Command(BaseCommand):
+    help = ('Elimina lecturas repetidas por (medidor, fecha_lectura, tipo_lectura), conservando la que tiene '
+            'boleta o, si ninguna tiene, la más reciente; las notificaciones de las eliminadas pasan a la '
+            'conservada. Requerido antes de la migración 0016')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo informa las lecturas repetidas, sin eliminarlas')
+
+    def handle(self, *args, **options):
+        grupos = (
+            Lectura.objects
+            .filter(medidor__isnull=False)
+            .values('medidor_id', 'fecha_lectura', 'tipo_lectura')
+            .annotate(cantidad=Count('id'))
+            .filter(cantidad__gt=1)
+            .order_by('medidor_id', 'fecha_lectura')
+        )
+
+        # Se ejecuta antes de la migración 0016: la columna tipo_anomalia (0018) puede no existir aún
+        self.con_tipo_anomalia = 'tipo_anomalia' in columnas_tabla(NotificacionLectura)
+
+        eliminadas = 0
+        trasladadas = 0
+        descartadas = 0
+        conflictos = 0
+        medidores = set()
+        for grupo in grupos:
+            lecturas = list(
+                Lectura.objects
+                .filter(medidor_id=grupo['medidor_id'], fecha_lectura=grupo['fecha_lectura'],
+                        tipo_lectura=grupo['tipo_lectura'])
+                .annotate(cantidad_notificaciones=Count('notificaciones'))
+                .order_by('id')
+                .values_list('id', 'boleta__id', 'cantidad_notificaciones')
+            )
+            con_boleta = [lectura_id for lectura_id, boleta_id, _ in lecturas if boleta_id]
+            if len(con_boleta) > 1:
+                conflictos += 1
+                self.stdout.write(self.style.WARNING(
+                    f"  Medidor {grupo['medidor_id']} {grupo['fecha_lectura']} {grupo['tipo_lectura']}: "
+                    f"las lecturas {con_boleta} tienen boleta, se debe resolver a mano"
+                ))
+                continue
+
+            conservar = con_boleta[0] if con_boleta else lecturas[-1][0]
+            sobrantes = [lectura_id for lectura_id, _, _ in lecturas if lectura_id != conservar]
+            # Borrar una lectura borra en cascada sus notificaciones: se trasladan a la conservada
+            trasladar, repetidas = [], 0
+            if any(cantidad for lectura_id, _, cantidad in lecturas if lectura_id != conservar):
+                trasladar, repetidas = self.notificaciones_a_trasladar(conservar, sobrantes)
+            eliminadas += len(sobrantes)
+            trasladadas += len(trasladar)
+            descartadas += repetidas
+            medidores.add(grupo['medidor_id'])
+            self.stdout.write(
+                f"  Medidor {grupo['medidor_id']} {grupo['fecha_lectura']} {grupo['tipo_lectura']}: "
+                f"se conserva {conservar}, sobran {sobrantes}"
+                + (f", {len(trasladar)} notificaciones pasan a {conservar}" if trasladar else "")
+                + (f", {repetidas} notificaciones repetidas se eliminan" if repetidas else "")
+            )
+            if not options['solo_verificar']:
+                with transaction.atomic():
+                    NotificacionLectura.objects.filter(id__in=trasladar).update(lectura_id=conservar)
+                    Lectura.objects.filter(id__in=sobrantes).delete()
+
+        if options['solo_verificar']:
+            self.stdout.write(
+                f"{eliminadas} lecturas repetidas, {trasladadas} notificaciones a trasladar, "
+                f"{descartadas} notificaciones repetidas, {conflictos} grupos con conflicto"
+            )
+            return
+
+        if medidores:
+            recalcular_consumos(medidores)
+        self.stdout.write(self.style.SUCCESS(
+            f"{eliminadas} lecturas eliminadas, {trasladadas} notificaciones trasladadas, "
+            f"{descartadas} notificaciones repetidas eliminadas, {conflictos} grupos con conflicto"
+        ))
+
+    def notificaciones_a_trasladar(self, conservar, sobrantes):
+        """
+        Notificaciones de las lecturas sobrantes que pueden pasar a la conservada. Se deja a lo
+        más una por tipo de anomalía (restricción notif_lect_unica_anomalia); el resto se borra
+        con su lectura. Sin la columna tipo_anomalia se trasladan todas.
+
+        retorna:
+            (ids a trasladar, cantidad de repetidas)
+        """
+        notificaciones = NotificacionLectura.objects.filter(lectura_id__in=sobrantes).order_by('id')
+        if not self.con_tipo_anomalia:
+            return list(notificaciones.values_list('id', flat=True)), 0
+
+        tipos = set(
+            NotificacionLectura.objects
+            .filter(lectura_id=conservar, tipo_anomalia__isnull=False)
+            .values_list('tipo_anomalia', flat=True)
+        )
+        trasladar, repetidas = [], 0
+        for notificacion_id, tipo in notificaciones.values_list('id', 'tipo_anomalia'):
+            if tipo in tipos:
+                repetidas += 1
+                continue
+            if tipo:
+                tipos.add(tipo)
+            trasladar.append(notificacion_id)
+        return trasladar, repetidas
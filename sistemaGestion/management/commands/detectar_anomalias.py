@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.anomalias import (
+    DIAS_A_NOTIFICAR, MESES_HISTORIAL, TAMANO_LOTE_MEDIDORES, UMBRAL_PUNTAJE, detectar_anomalias
+)
+
+
+# Uso: python manage.py detectar_anomalias [--dias 60] [--umbral 3.5] [--medidor 12] [--solo-verificar]
+class Command(BaseCommand):
+    help = ('Detecta picos de consumo, rachas de consumo cero y registros que retroceden en las lecturas '
+            'recientes y crea las notificaciones de lectura correspondientes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=DIAS_A_NOTIFICAR,
+                            help='Se notifican las lecturas de los últimos N días')
+        parser.add_argument('--meses-historial', type=int, default=MESES_HISTORIAL,
+                            help='Meses de historial usados como referencia')
+        parser.add_argument('--umbral', type=float, default=UMBRAL_PUNTAJE,
+                            help='Puntaje z robusto sobre el cual un consumo es pico')
+        parser.add_argument('--medidor', type=int, action='append', dest='medidores',
+                            help='Id de medidor a analizar (se puede repetir). Por defecto todos')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_MEDIDORES, help='Medidores por consulta')
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo informa las anomalías, sin crear notificaciones')
+
+    def handle(self, *args, **options):
+        for opcion in ('dias', 'meses_historial', 'lote'):
+            if options[opcion] < 1:
+                raise CommandError(f"--{opcion.replace('_', '-')} debe ser mayor a cero")
+        if options['umbral'] <= 0:
+            raise CommandError('--umbral debe ser mayor a cero')
+
+        def progreso(resumen):
+            self.stdout.write(f"  {resumen['medidores']} medidores, {resumen['lecturas']} lecturas analizadas")
+
+        resumen = detectar_anomalias(
+            medidor_ids=options['medidores'],
+            dias=options['dias'],
+            meses_historial=options['meses_historial'],
+            umbral=options['umbral'],
+            solo_verificar=options['solo_verificar'],
+            tamano_lote=options['lote'],
+            progreso=progreso if options['verbosity'] > 1 else None,
+        )
+
+        self.stdout.write(
+            f"{resumen['lecturas']} lecturas de {resumen['medidores']} medidores analizadas en {resumen['segundos']:.2f}s: "
+            f"{resumen['pico']} picos, {resumen['consumo_cero']} rachas de consumo cero, "
+            f"{resumen['registro_retrocede']} registros que retroceden"
+        )
+        accion = 'por crear' if options['solo_verificar'] else 'creadas'
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['creadas']} notificaciones {accion}, {resumen['ya_notificadas']} ya notificadas"
+        ))
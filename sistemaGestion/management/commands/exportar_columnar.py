@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.exportacion_columnar import TABLAS, ErrorExportacion, exportar
+
+
+# Uso: python manage.py exportar_columnar [--directorio analitica] [--tablas lecturas,pagos] [--formato auto|parquet|npz] [--completo]
+class Command(BaseCommand):
+    help = ('Exporta lecturas, boletas y pagos a archivos columnares por mes (Parquet con pyarrow, '
+            'si no NumPy .npz) con manifest; solo escribe los meses nuevos o modificados')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directorio', default=None,
+                            help='Directorio de destino (por defecto EXPORTACION_COLUMNAR["DIRECTORIO"])')
+        parser.add_argument('--tablas', default='', help=f"Tablas separadas por coma (por defecto {','.join(TABLAS)})")
+        parser.add_argument('--formato', default='auto', help='auto (parquet si hay pyarrow), parquet o npz')
+        parser.add_argument('--completo', action='store_true', help='Reescribe todos los meses')
+        parser.add_argument('--lote', type=int, default=None, help='Filas por consulta')
+
+    def handle(self, *args, **options):
+        if options['lote'] is not None and options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor a cero')
+        tablas = [valor.strip() for valor in options['tablas'].split(',') if valor.strip()]
+
+        def progreso(tabla, mes, filas):
+            self.stdout.write(f"  {tabla}/{mes}: {filas} filas")
+
+        try:
+            resumen = exportar(
+                directorio=options['directorio'],
+                tablas=tablas,
+                formato=options['formato'],
+                completo=options['completo'],
+                tamano_lote=options['lote'],
+                progreso=progreso,
+            )
+        except ErrorExportacion as error:
+            raise CommandError(str(error))
+
+        for tabla, datos in resumen.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{tabla}: {datos['escritas']} meses escritos ({datos['filas']} filas), "
+                f"{datos['sin_cambios']} sin cambios, {datos['borradas']} borrados"
+            ))
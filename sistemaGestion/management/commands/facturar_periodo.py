@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.facturacion import DIAS_VENCIMIENTO, TAMANO_LOTE, generar_boletas_periodo
+
+
+# Uso: python manage.py facturar_periodo 2025-10 [--lote 1000] [--dias-vencimiento 30]
+class Command(BaseCommand):
+    help = 'Genera las boletas de todas las lecturas de un período (AAAA-MM) que aún no tienen boleta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo', help='Período a facturar en formato AAAA-MM')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE,
+                            help='Cantidad de lecturas por lote/transacción')
+        parser.add_argument('--dias-vencimiento', type=int, default=DIAS_VENCIMIENTO,
+                            help='Días entre la emisión y el vencimiento de la boleta')
+        parser.add_argument('--fecha-emision', default=None,
+                            help='Fecha de emisión AAAA-MM-DD (por defecto hoy)')
+
+    def handle(self, *args, **options):
+        try:
+            anio, mes = (int(parte) for parte in options['periodo'].split('-'))
+            if not 1 <= mes <= 12:
+                raise ValueError
+        except ValueError:
+            raise CommandError("El período debe tener el formato AAAA-MM")
+
+        fecha_emision = None
+        if options['fecha_emision']:
+            try:
+                fecha_emision = date.fromisoformat(options['fecha_emision'])
+            except ValueError:
+                raise CommandError("La fecha de emisión debe tener el formato AAAA-MM-DD")
+
+        def progreso(resumen):
+            self.stdout.write(
+                f"  {resumen['procesadas']} lecturas procesadas "
+                f"({resumen['filas_por_segundo']:.0f} filas/s)"
+            )
+
+        resumen = generar_boletas_periodo(
+            anio, mes,
+            fecha_emision=fecha_emision,
+            dias_vencimiento=options['dias_vencimiento'],
+            tamano_lote=options['lote'],
+            progreso=progreso if options['verbosity'] > 1 else None,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Período {anio}-{mes:02d}: {resumen['creadas']} boletas creadas de "
+            f"{resumen['procesadas']} lecturas en {resumen['segundos']:.2f}s "
+            f"({resumen['filas_por_segundo']:.0f} filas/s)"
+        ))
+        if resumen['sin_tarifa']:
+            self.stdout.write(self.style.WARNING(
+                f"{resumen['sin_tarifa']} lecturas sin tarifa asignada a su contrato no fueron facturadas"
+            ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.generador import generar_datos
+
+
+# Uso: python manage.py generar_datos --clientes 100000 --meses 12 --semilla 42
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos de toda la jerarquía (clientes → contratos → medidores → lecturas → boletas → pagos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=1000, help='Cantidad de clientes a generar')
+        parser.add_argument('--meses', type=int, default=12, help='Meses de lecturas por medidor')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla para obtener datos reproducibles')
+        parser.add_argument('--lote', type=int, default=1000, help='Clientes por bloque/transacción')
+
+    def handle(self, *args, **options):
+        if options['clientes'] < 1 or options['meses'] < 1 or options['lote'] < 1:
+            raise CommandError('--clientes, --meses y --lote deben ser mayores a cero')
+
+        def progreso(filas, segundos):
+            self.stdout.write(f"  {filas['Cliente']} clientes, {filas['Lectura']} lecturas ({segundos:.1f}s)")
+
+        resultado = generar_datos(
+            clientes=options['clientes'],
+            meses=options['meses'],
+            semilla=options['semilla'],
+            tamano_lote=options['lote'],
+            progreso=progreso if options['verbosity'] > 1 else None,
+        )
+
+        for modelo, cantidad in resultado['filas'].items():
+            self.stdout.write(f"{modelo}: {cantidad}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Datos generados en {resultado['segundos']:.2f}s ({resultado['filas_por_segundo']:.0f} filas/s)"
+        ))
@@ -0,0 +1,62 @@
+import csv
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.importacion import TAMANO_LOTE, ErrorImportacion, detectar_formato, importar_lecturas
+
+
+# Uso: python manage.py importar_lecturas lecturas.csv [--formato jsonl] [--errores errores.csv]
+class Command(BaseCommand):
+    help = ('Importa (upsert) lecturas desde un archivo CSV o JSONL de forma incremental, con reporte de filas '
+            'rechazadas. Reimportar el mismo archivo no crea duplicados')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo (.csv, .jsonl o .ndjson)')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], default=None,
+                            help='Formato del archivo (por defecto se deduce de la extensión)')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por lote/transacción')
+        parser.add_argument('--errores', default=None,
+                            help='Archivo CSV donde escribir las filas rechazadas (linea, error)')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor a cero')
+        try:
+            formato = options['formato'] or detectar_formato(options['archivo'])
+        except ErrorImportacion as error:
+            raise CommandError(str(error))
+
+        with ExitStack() as stack:
+            try:
+                archivo = stack.enter_context(open(options['archivo'], encoding='utf-8-sig', newline=''))
+            except OSError as error:
+                raise CommandError(f"No se pudo abrir {options['archivo']}: {error}")
+
+            if options['errores']:
+                reporte = csv.writer(stack.enter_context(open(options['errores'], 'w', encoding='utf-8', newline='')))
+                reporte.writerow(['linea', 'error'])
+                reportar_error = lambda linea, mensaje: reporte.writerow([linea, mensaje])
+            else:
+                reportar_error = lambda linea, mensaje: self.stderr.write(f"  Línea {linea}: {mensaje}")
+
+            def progreso(resumen):
+                self.stdout.write(f"  {resumen['leidas']} filas leídas, {resumen['creadas']} creadas")
+
+            try:
+                resumen = importar_lecturas(
+                    archivo, formato,
+                    tamano_lote=options['lote'],
+                    reportar_error=reportar_error,
+                    progreso=progreso if options['verbosity'] > 1 else None,
+                )
+            except ErrorImportacion as error:
+                raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['leidas']} filas: {resumen['creadas']} lecturas creadas, {resumen['actualizadas']} actualizadas, "
+            f"{resumen['sin_cambios']} sin cambios, en {resumen['segundos']:.2f}s "
+            f"({resumen['filas_por_segundo'] * 60:.0f} filas/min)"
+        ))
+        if resumen['con_error']:
+            self.stdout.write(self.style.WARNING(f"{resumen['con_error']} filas rechazadas"))
@@ -0,0 +1,78 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.impresion import (
+    TAMANO_LOTE, DestinoDirectorio, DestinoZip, boletas_del_periodo, imprimir_boletas
+)
+
+
+# Uso: python manage.py imprimir_boletas 2025-10 (--directorio pdf/2025-10 | --zip boletas.zip | --zip -)
+#      [--procesos 8] [--lote 200]
+class Command(BaseCommand):
+    help = ('Genera en paralelo (un proceso por núcleo) los PDF de todas las boletas de un período (AAAA-MM) '
+            'en un directorio o en un ZIP')
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo', help='Período (mes de la lectura) en formato AAAA-MM')
+        destino = parser.add_mutually_exclusive_group(required=True)
+        destino.add_argument('--directorio', help='Directorio donde escribir boleta_<id>.pdf')
+        destino.add_argument('--zip', help='Archivo ZIP de salida ("-" para escribirlo en la salida estándar)')
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                            help='Procesos de conversión a PDF (por defecto uno por núcleo)')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Boletas por consulta')
+
+    def handle(self, *args, **options):
+        try:
+            anio, mes = (int(parte) for parte in options['periodo'].split('-'))
+            if not 1 <= mes <= 12:
+                raise ValueError
+        except ValueError:
+            raise CommandError("El período debe tener el formato AAAA-MM")
+        for opcion in ('procesos', 'lote'):
+            if options[opcion] < 1:
+                raise CommandError(f"--{opcion} debe ser mayor a cero")
+
+        # Con el ZIP en la salida estándar los mensajes van a la salida de errores
+        salida = self.stdout
+        archivo_zip = None
+        if options['zip'] == '-':
+            salida = self.stderr
+            destino = DestinoZip(sys.stdout.buffer)
+        elif options['zip']:
+            try:
+                archivo_zip = open(options['zip'], 'wb')
+            except OSError as error:
+                raise CommandError(f"No se pudo crear {options['zip']}: {error}")
+            destino = DestinoZip(archivo_zip)
+        else:
+            destino = DestinoDirectorio(options['directorio'])
+
+        def reportar_error(boleta_id, mensaje):
+            salida.write(self.style.WARNING(f"  Boleta {boleta_id}: {mensaje}"))
+
+        def progreso(resumen):
+            salida.write(f"  {resumen['generadas']} PDF generados")
+
+        try:
+            resumen = imprimir_boletas(
+                boletas_del_periodo(anio, mes),
+                destino,
+                procesos=options['procesos'],
+                tamano_lote=options['lote'],
+                reportar_error=reportar_error,
+                progreso=progreso if options['verbosity'] > 1 else None,
+            )
+        finally:
+            if archivo_zip:
+                archivo_zip.close()
+
+        salida.write(self.style.SUCCESS(
+            f"Período {anio}-{mes:02d}: {resumen['generadas']} PDF en {resumen['segundos']:.1f}s con "
+            f"{resumen['procesos']} procesos · {resumen['pdf_por_segundo']:.1f} PDF/s "
+            f"({resumen['pdf_por_segundo_por_proceso']:.1f} PDF/s por proceso, "
+            f"{resumen['ms_cpu_por_pdf']:.0f} ms de CPU por PDF)"
+        ))
+        if resumen['con_error']:
+            salida.write(self.style.WARNING(f"{resumen['con_error']} boletas no se pudieron generar"))
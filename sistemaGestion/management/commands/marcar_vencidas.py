@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.cobranza import TAMANO_LOTE, marcar_vencidas
+
+
+# Uso: python manage.py marcar_vencidas [--fecha 2025-10-01] [--lote 5000] [--solo-verificar]
+class Command(BaseCommand):
+    help = ('Marca como Vencido las boletas con saldo después de su fecha de vencimiento y crea un aviso '
+            'de cobranza (notificación de pago) por boleta, sin duplicarlos. Pensado para ejecutarse a diario')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', default=None,
+                            help='Fecha de referencia AAAA-MM-DD (por defecto hoy)')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Boletas por consulta de avisos')
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo informa cuántas boletas se marcarían y cuántos avisos se crearían')
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            try:
+                hoy = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError("La fecha debe tener el formato AAAA-MM-DD")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor a cero")
+
+        def progreso(resumen):
+            self.stdout.write(f"  {resumen['avisos_creados']} avisos")
+
+        resumen = marcar_vencidas(
+            hoy=hoy,
+            solo_verificar=options['solo_verificar'],
+            tamano_lote=options['lote'],
+            progreso=progreso if options['verbosity'] > 1 else None,
+        )
+
+        verbo = 'se marcarían' if options['solo_verificar'] else 'marcadas'
+        self.stdout.write(self.style.SUCCESS(
+            f"Boletas vencidas {verbo}: {resumen['marcadas']} · avisos de cobranza: {resumen['avisos_creados']} "
+            f"({resumen['segundos']:.2f}s)"
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from sistemaGestion.trabajos_pdf import trabajar
+
+
+# Uso: python manage.py procesar_trabajos_pdf [--una-vez]
+class Command(BaseCommand):
+    help = ('Worker que genera los PDF de boletas encolados por la vista de descarga. '
+            'Se puede ejecutar más de una instancia para repartir la carga')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesa los trabajos pendientes y termina (sin quedar esperando)')
+
+    def handle(self, *args, **options):
+        def reportar(trabajo, resultado, segundos):
+            estilo = self.style.SUCCESS if resultado == 'listo' else self.style.WARNING
+            self.stdout.write(estilo(f"Trabajo {trabajo.id} (boleta {trabajo.boleta_id}): {resultado} en {segundos * 1000:.0f} ms"))
+
+        if not options['una_vez']:
+            self.stdout.write("Esperando trabajos de PDF (Ctrl+C para detener)...")
+        try:
+            resumen = trabajar(una_vez=options['una_vez'], reportar=reportar if options['verbosity'] > 0 else None)
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['listos']} PDF generados, {resumen['con_error']} con error"
+        ))
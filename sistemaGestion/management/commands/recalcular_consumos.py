@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.consumos import TAMANO_LOTE_MEDIDORES, recalcular_consumos
+
+
+# Uso: python manage.py recalcular_consumos [--medidor 12 --medidor 15] [--solo-verificar]
+class Command(BaseCommand):
+    help = 'Recalcula (backfill) el consumo_energetico de las lecturas a partir de la lectura anterior de cada medidor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--medidor', type=int, action='append', dest='medidores',
+                            help='Id de medidor a recalcular (se puede repetir). Por defecto todos')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_MEDIDORES, help='Medidores por lote/transacción')
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo informa cuántas lecturas tienen un consumo distinto al derivado, sin modificarlas')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor a cero')
+
+        def progreso(resumen):
+            self.stdout.write(f"  {resumen['revisadas']} lecturas revisadas, {resumen['modificadas']} con diferencias")
+
+        resumen = recalcular_consumos(
+            medidor_ids=options['medidores'],
+            solo_verificar=options['solo_verificar'],
+            tamano_lote=options['lote'],
+            progreso=progreso if options['verbosity'] > 1 else None,
+        )
+
+        accion = 'con consumo distinto al derivado' if options['solo_verificar'] else 'recalculadas'
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['revisadas']} lecturas revisadas, {resumen['modificadas']} {accion} "
+            f"en {resumen['segundos']:.2f}s"
+        ))
+        if resumen['con_boleta']:
+            self.stdout.write(self.style.WARNING(
+                f"{resumen['con_boleta']} de ellas ya tienen boleta emitida; los montos de esas boletas no se modifican"
+            ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from sistemaGestion.estadisticas import invalidar_estadisticas_boletas
+from sistemaGestion.models import Boleta
+
+
+# Uso: python manage.py recalcular_estados [--solo-verificar]
+class Command(BaseCommand):
+    help = ('Repara en bloque el estado (y total_pagado/saldo_pendiente) de todas las boletas según la suma '
+            'real de sus pagos, con un único UPDATE')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo informa cuántas boletas tienen un estado que no corresponde a sus pagos')
+
+    def handle(self, *args, **options):
+        incoherente = ~Q(total_pagado=F('suma_pagos'))
+        for estado, condicion in Boleta.condiciones_estado('suma_pagos'):
+            incoherente |= condicion & ~Q(estado=estado)
+        incoherentes = (
+            Boleta.objects
+            .annotate(suma_pagos=Coalesce(Sum('pagos__monto_pagado'), Value(0)))
+            .filter(incoherente)
+            .count()
+        )
+        self.stdout.write(f"Boletas con estado o totales desincronizados: {incoherentes}")
+
+        if options['solo_verificar']:
+            return
+
+        inicio = time.monotonic()
+        corregidas = Boleta.sincronizar_con_pagos()
+        if corregidas:
+            invalidar_estadisticas_boletas()
+        self.stdout.write(self.style.SUCCESS(
+            f"{corregidas} boletas corregidas en {time.monotonic() - inicio:.1f} s"
+        ))
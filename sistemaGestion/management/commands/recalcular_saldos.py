@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from sistemaGestion.estadisticas import invalidar_estadisticas_boletas
+from sistemaGestion.models import Boleta
+
+
+# Uso: python manage.py recalcular_saldos [--solo-verificar]
+class Command(BaseCommand):
+    help = 'Recalcula (backfill/reparación) las columnas total_pagado y saldo_pendiente de las boletas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo informa cuántas boletas están desincronizadas, sin modificarlas')
+
+    def handle(self, *args, **options):
+        desincronizadas = (
+            Boleta.objects
+            .annotate(suma_pagos=Coalesce(Sum('pagos__monto_pagado'), Value(0)))
+            .filter(
+                ~Q(total_pagado=F('suma_pagos'))
+                | ~Q(saldo_pendiente=F('monto_total') - F('suma_pagos'))
+            )
+            .count()
+        )
+        self.stdout.write(f"Boletas desincronizadas: {desincronizadas}")
+
+        if options['solo_verificar']:
+            return
+
+        actualizadas = Boleta.recalcular_totales()
+        estados = Boleta.recalcular_estados()
+        invalidar_estadisticas_boletas()
+        self.stdout.write(self.style.SUCCESS(f"{actualizadas} boletas recalculadas ({estados} cambiaron de estado)"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from sistemaGestion.contadores import CONTADORES, reconciliar_contador
+from sistemaGestion.models import ContadorDashboard
+
+
+# Uso: python manage.py reconciliar_contadores (ej: en un cron nocturno)
+class Command(BaseCommand):
+    help = 'Recalcula con COUNT(*) los contadores del dashboard y corrige cualquier desviación'
+
+    def handle(self, *args, **options):
+        anteriores = dict(ContadorDashboard.objects.values_list('nombre', 'valor'))
+        for nombre in CONTADORES:
+            valor = reconciliar_contador(nombre)
+            anterior = anteriores.get(nombre)
+            if anterior is not None and anterior != valor:
+                self.stdout.write(self.style.WARNING(f"{nombre}: {anterior} → {valor}"))
+            else:
+                self.stdout.write(f"{nombre}: {valor}")
+        self.stdout.write(self.style.SUCCESS('Contadores reconciliados'))
@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.arranque import configuracion, medir_arranque, verificar
+from sistemaGestion.benchmark import commit_actual, guardar_json
+
+
+# Porcentaje sobre la mediana anterior que se considera regresión al comparar
+TOLERANCIA_COMPARACION = 20
+
+
+# Uso:
+#   python manage.py verificar_arranque
+#   python manage.py verificar_arranque --repeticiones 10 --presupuesto-ms 1200
+#   python manage.py verificar_arranque --salida arranque_abc1234.json --comparar arranque_anterior.json
+class Command(BaseCommand):
+    help = ('Mide el arranque en frío de la aplicación (python -X importtime), informa los módulos más lentos '
+            'y falla si se cargan dependencias pesadas que deben importarse al usarse o si supera el presupuesto')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5, help='Procesos lanzados para medir el tiempo')
+        parser.add_argument('--presupuesto-ms', type=int, default=None,
+                            help='Tiempo máximo de arranque (por defecto ARRANQUE["PRESUPUESTO_MS"])')
+        parser.add_argument('--top', type=int, default=15, help='Cantidad de módulos y paquetes del reporte')
+        parser.add_argument('--salida', default=None, help='Archivo JSON donde guardar la medición')
+        parser.add_argument('--comparar', default=None, help='JSON de una medición anterior para comparar')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor a cero')
+        presupuesto = options['presupuesto_ms'] or configuracion()['PRESUPUESTO_MS']
+
+        try:
+            resultado = medir_arranque(options['repeticiones'], options['top'])
+        except RuntimeError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Paquetes (tiempo de importación propio)'))
+        for paquete, ms in resultado['paquetes']:
+            self.stdout.write(f"  {paquete:<50} {ms:>8.1f} ms")
+        self.stdout.write(self.style.MIGRATE_HEADING('Módulos más lentos'))
+        for modulo, ms in resultado['modulos']:
+            self.stdout.write(f"  {modulo:<50} {ms:>8.1f} ms")
+        self.stdout.write(
+            f"Arranque: mediana {resultado['ms_mediana']:.0f} ms, mínimo {resultado['ms_minimo']:.0f} ms "
+            f"({resultado['ms_importaciones']:.0f} ms importando {resultado['modulos_cargados']} módulos)"
+        )
+
+        if options['salida']:
+            guardar_json({'commit': commit_actual(), **resultado}, options['salida'])
+            self.stdout.write(self.style.SUCCESS(f"Medición guardada en {options['salida']}"))
+
+        problemas = verificar(resultado, presupuesto)
+        if options['comparar']:
+            problemas += self.comparar_con(options['comparar'], resultado)
+
+        for problema in problemas:
+            self.stdout.write(self.style.ERROR(f"  FALLA {problema}"))
+        if problemas:
+            raise CommandError(f"{len(problemas)} problemas en el arranque")
+        self.stdout.write(self.style.SUCCESS(f"Arranque dentro del presupuesto ({presupuesto} ms)"))
+
+    def comparar_con(self, ruta, resultado):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'No se pudo leer {ruta}: {error}')
+
+        antes, ahora = anterior['ms_mediana'], resultado['ms_mediana']
+        variacion = (ahora - antes) / antes * 100 if antes else 0.0
+        self.stdout.write(
+            f"Comparación con {anterior.get('commit')}: {antes:.0f} → {ahora:.0f} ms ({variacion:+.0f}%), "
+            f"módulos {anterior['modulos_cargados']} → {resultado['modulos_cargados']}"
+        )
+        if variacion > TOLERANCIA_COMPARACION:
+            return [f"el arranque empeoró {variacion:.0f}% respecto de {anterior.get('commit') or ruta}"]
+        return []
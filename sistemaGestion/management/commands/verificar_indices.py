@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sistemaGestion.indices import FILAS_TABLA_GRANDE, verificar_indices
+
+
+# Uso: python manage.py verificar_indices [--plan]
+class Command(BaseCommand):
+    help = 'Verifica con EXPLAIN que las consultas de las vistas de lista usan índices (sin filesort ni recorrido completo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plan', action='store_true', help='Muestra el plan completo de cada consulta')
+
+    def handle(self, *args, **options):
+        try:
+            resultados = verificar_indices()
+        except NotImplementedError as error:
+            raise CommandError(str(error))
+
+        fallidas = 0
+        for etiqueta, filas, plan, problemas in resultados:
+            aviso = f" (solo {filas} filas, el plan puede no ser representativo)" if filas < FILAS_TABLA_GRANDE else ''
+            if problemas:
+                fallidas += 1
+                self.stdout.write(self.style.ERROR(f"  FALLA {etiqueta}: {', '.join(problemas)}{aviso}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"  OK    {etiqueta}{aviso}"))
+            if options['plan']:
+                self.stdout.write(plan)
+
+        if fallidas:
+            raise CommandError(f"{fallidas} de {len(resultados)} consultas no usan índice")
+        self.stdout.write(self.style.SUCCESS(f"Las {len(resultados)} consultas usan índice"))
@@ -0,0 +1,106 @@
+"""
+MIDDLEWARE DE PRESUPUESTO DE CONSULTAS
+======================================
+
+Cuenta la cantidad y el tiempo total de las consultas SQL de cada request y
+los asocia al nombre de la URL (ej: 'lista_lecturas', ver urls.py).
+Si una vista supera su presupuesto se registra una advertencia en el logger
+'sistemaGestion.consultas' o, en modo estricto, se lanza una excepción.
+
+CONFIGURACIÓN (settings.py):
+- PRESUPUESTO_CONSULTAS: {'nombre_url': máximo}; las URL que no aparecen usan
+  'default' si está definido, si no PRESUPUESTO_POR_DEFECTO
+- PRESUPUESTO_CONSULTAS_ESTRICTO: True para lanzar PresupuestoConsultasExcedido
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('sistemaGestion.consultas')
+
+PRESUPUESTO_POR_DEFECTO = 10
+
+
+class PresupuestoConsultasExcedido(Exception):
+    pass
+
+
+class ContadorConsultas:
+    """
+    Wrapper de ejecución (connection.execute_wrapper) que acumula la
+    cantidad de consultas y su duración. Funciona aunque DEBUG sea False.
+    """
+
+    def __init__(self):
+        self.cantidad = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.cantidad += 1
+            self.segundos += time.perf_counter() - inicio
+
+    def registrar(self):
+        """Context manager que instala el contador en todas las conexiones."""
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+
+def presupuesto_para(nombre_url):
+    """Retorna el máximo de consultas permitido para una URL."""
+    presupuestos = getattr(settings, 'PRESUPUESTO_CONSULTAS', {})
+    return presupuestos.get(nombre_url, presupuestos.get('default', PRESUPUESTO_POR_DEFECTO))
+
+
+def verificar_presupuesto(nombre_url, contador, estricto=False):
+    """
+    Compara lo medido con el presupuesto de la URL. Registra o lanza según
+    el modo. Retorna el presupuesto aplicado.
+    """
+    presupuesto = presupuesto_para(nombre_url)
+    logger.debug('%s: %d consultas en %.1f ms', nombre_url, contador.cantidad, contador.segundos * 1000)
+    if contador.cantidad > presupuesto:
+        mensaje = (
+            f"La vista '{nombre_url}' ejecutó {contador.cantidad} consultas "
+            f"({contador.segundos * 1000:.1f} ms), presupuesto: {presupuesto}"
+        )
+        if estricto:
+            raise PresupuestoConsultasExcedido(mensaje)
+        logger.warning(mensaje)
+    return presupuesto
+
+
+class PresupuestoConsultasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = ContadorConsultas()
+        with contador.registrar():
+            response = self.get_response(request)
+            # Las respuestas con template se renderizan aquí, dentro de la medición
+            if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+                response.render()
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        if coincidencia is None or coincidencia.url_name is None:
+            return response
+
+        verificar_presupuesto(
+            coincidencia.url_name,
+            contador,
+            estricto=getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False),
+        )
+        response['X-Consultas-SQL'] = str(contador.cantidad)
+        response['X-Tiempo-SQL-ms'] = f"{contador.segundos * 1000:.1f}"
+        return response
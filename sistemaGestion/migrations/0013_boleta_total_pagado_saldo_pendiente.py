@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:30
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_totales(apps, schema_editor):
+    Boleta = apps.get_model('sistemaGestion', 'Boleta')
+    Pago = apps.get_model('sistemaGestion', 'Pago')
+    suma_pagos = Coalesce(
+        Subquery(
+            Pago.objects.filter(boleta=OuterRef('pk'))
+            .order_by()
+            .values('boleta')
+            .annotate(total=Sum('monto_pagado'))
+            .values('total')
+        ),
+        Value(0),
+    )
+    Boleta.objects.update(
+        total_pagado=suma_pagos,
+        saldo_pendiente=F('monto_total') - suma_pagos,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0012_alter_boleta_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boleta',
+            name='total_pagado',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boleta',
+            name='saldo_pendiente',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_totales, migrations.RunPython.noop),
+    ]
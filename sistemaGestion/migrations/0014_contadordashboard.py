@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:45
+
+from django.db import migrations, models
+
+
+def inicializar_contadores(apps, schema_editor):
+    ContadorDashboard = apps.get_model('sistemaGestion', 'ContadorDashboard')
+    conteos = {
+        'total_clientes': apps.get_model('sistemaGestion', 'Cliente').objects.count(),
+        'total_contratos': apps.get_model('sistemaGestion', 'Contrato').objects.count(),
+        'total_medidores': apps.get_model('sistemaGestion', 'Medidor').objects.count(),
+        'lecturas_pendientes': apps.get_model('sistemaGestion', 'Lectura').objects.count(),
+        'boletas_emitidas': apps.get_model('sistemaGestion', 'Boleta').objects.count(),
+        'pagos_realizados': apps.get_model('sistemaGestion', 'Pago').objects.filter(estado_pago='Pagado').count(),
+    }
+    ContadorDashboard.objects.bulk_create(
+        [ContadorDashboard(nombre=nombre, valor=valor) for nombre, valor in conteos.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0013_boleta_total_pagado_saldo_pendiente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=45, unique=True)),
+                ('valor', models.BigIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.RunPython(inicializar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-17 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0014_contadordashboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lectura',
+            index=models.Index(fields=['medidor', '-fecha_lectura', '-id'], name='lectura_medidor_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lectura',
+            index=models.Index(fields=['-fecha_lectura', '-id'], name='lectura_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['estado', '-fecha_emision'], name='boleta_estado_emision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['-fecha_emision', '-id'], name='boleta_emision_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boleta',
+            index=models.Index(fields=['fecha_vencimiento'], name='boleta_vencimiento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['-fecha_pago', '-id'], name='pago_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacionlectura',
+            index=models.Index(fields=['revisada', '-fecha_notificacion'], name='notif_lect_revisada_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacionlectura',
+            index=models.Index(fields=['-fecha_notificacion'], name='notif_lect_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacionpago',
+            index=models.Index(fields=['revisada', '-fecha_notificacion'], name='notif_pago_revisada_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacionpago',
+            index=models.Index(fields=['-fecha_notificacion'], name='notif_pago_fecha_idx'),
+        ),
+    ]
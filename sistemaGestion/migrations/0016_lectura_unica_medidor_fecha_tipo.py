@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def verificar_sin_duplicados(apps, schema_editor):
+    # Eliminar duplicados puede borrar boletas en cascada, por eso no se hace
+    # aquí: se informa y se resuelve antes con `deduplicar_lecturas`
+    Lectura = apps.get_model('sistemaGestion', 'Lectura')
+    duplicados = (
+        Lectura.objects
+        .filter(medidor__isnull=False)
+        .values('medidor_id', 'fecha_lectura', 'tipo_lectura')
+        .annotate(cantidad=Count('id'))
+        .filter(cantidad__gt=1)
+        .order_by()
+        .count()
+    )
+    if duplicados:
+        raise RuntimeError(
+            f"Hay {duplicados} combinaciones (medidor, fecha_lectura, tipo_lectura) repetidas. "
+            f"Ejecute `python manage.py deduplicar_lecturas` antes de migrar."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0015_indices_listas'),
+    ]
+
+    operations = [
+        migrations.RunPython(verificar_sin_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lectura',
+            constraint=models.UniqueConstraint(
+                fields=('medidor', 'fecha_lectura', 'tipo_lectura'),
+                name='lectura_unica_medidor_fecha_tipo',
+                violation_error_message='Ya existe una lectura de este tipo para el medidor en esa fecha.',
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 09:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0016_lectura_unica_medidor_fecha_tipo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LecturaIntervalo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('valores', models.BinaryField(max_length=384)),
+                ('intervalos_registrados', models.PositiveSmallIntegerField(default=0)),
+                ('consumo_wh', models.PositiveBigIntegerField(default=0)),
+                ('medidor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intervalos', to='sistemaGestion.medidor')),
+            ],
+            options={
+                'ordering': ['medidor', 'fecha'],
+                'constraints': [models.UniqueConstraint(fields=('medidor', 'fecha'), name='intervalo_unico_medidor_fecha')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0017_lecturaintervalo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacionlectura',
+            name='tipo_anomalia',
+            field=models.CharField(blank=True, choices=[('pico', 'Pico de consumo'), ('consumo_cero', 'Racha de consumo cero'), ('registro_retrocede', 'Registro del medidor retrocede')], max_length=30, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificacionlectura',
+            name='detalle_anomalia',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='notificacionlectura',
+            constraint=models.UniqueConstraint(fields=('lectura', 'tipo_anomalia'), name='notif_lect_unica_anomalia'),
+        ),
+    ]
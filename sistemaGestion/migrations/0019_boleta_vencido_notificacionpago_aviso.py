@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistemaGestion', '0018_notificacionlectura_anomalia'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='boleta',
+            name='estado',
+            field=models.CharField(choices=[('Pagado', 'Pagado'), ('Pagado Parcialmente', 'Pagado Parcialmente'), ('Pendiente', 'Pendiente'), ('Vencido', 'Vencido')], default='Pendiente', max_length=45),
+        ),
+        migrations.AddField(
+            model_name='notificacionpago',
+            name='boleta',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='sistemaGestion.boleta'),
+        ),
+        migrations.AddField(
+            model_name='notificacionpago',
+            name='tipo_aviso',
+            field=models.CharField(blank=True, choices=[('vencimiento', 'Boleta vencida')], max_length=30, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='notificacionpago',
+            constraint=models.UniqueConstraint(fields=('boleta', 'tipo_aviso'), name='notif_pago_unico_aviso'),
+        ),
+    ]
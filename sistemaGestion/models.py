@@ -8,7 +8,9 @@ JERARQUÍA DE RELACIONES:
 - Cliente (base) → Contrato → Medidor → Lectura → Boleta → Pago
 - Tarifa ←→ Contrato (relación muchos a muchos)
 - Lectura → NotificacionLectura
+- Medidor → LecturaIntervalo (curva de 15 minutos, un blob por día)
 - Pago → NotificacionPago
+- Boleta → TrabajoPDF (cola de generación de PDF)
 - Usuario (modelo independiente para autenticación)
 
 CARACTERÍSTICAS PRINCIPALES:
@@ -24,11 +26,24 @@ MÉTODOS PERSONALIZADOS:
 - get_cliente(): Obtiene el cliente a través de la cadena de relaciones
 - get_info_completa(): Retorna diccionario con toda la información relacionada
 - calcular_total_pagado(): Calcula automáticamente el total pagado (Boleta)
-- actualizar_estado(): Actualiza el estado según los pagos (Boleta)
+- recalcular_totales(): Recalcula total_pagado/saldo_pendiente en SQL (Boleta)
+- recalcular_estados(): Ajusta el estado a lo pagado en SQL, para escrituras masivas (Boleta)
+- actualizar_estado(): Actualiza el estado según los pagos y el vencimiento (Boleta)
+- sincronizar_con_pagos(): Repara totales y estado de todas las boletas en un UPDATE (Boleta)
+- consumo_entre(): Deriva el consumo de dos valores del registro, con vuelta de contador (Lectura)
 """
 
-from django.db import models
-from django.db.models import Sum
+import sys
+from array import array
+from datetime import date
+
+from django.db import connection, models
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+# Código de array.array para enteros sin signo de 32 bits
+TIPO_UINT32 = 'I' if array('I').itemsize == 4 else 'L'
 
 
 # ============================================
@@ -277,7 +292,8 @@ class Medidor(models.Model):
 # CAMPOS:
 # - medidor: FK → Medidor 
 # - fecha_lectura: Fecha en que se tomó la lectura
-# - consumo_energetico: Consumo en kWh durante el período
+# - consumo_energetico: Consumo en kWh durante el período. Se deriva al guardar
+#   de la diferencia con la lectura anterior del mismo medidor
 # - tipo_lectura: Digital o Analógica (choices)
 # - lectura_actual: Valor actual del medidor en kWh
 #
@@ -307,8 +323,93 @@ class Lectura(models.Model):
     tipo_lectura = models.CharField(max_length=45, choices=TIPO_LECTURA_CHOICES, default='Digital')
     lectura_actual = models.PositiveIntegerField()  # Valor actual del contador
 
+    # Un registro que retrocede se considera vuelta de contador (ej: 99.950 → 120)
+    # solo si el valor anterior estaba en el último 10% de su capacidad;
+    # en otro caso se asume cambio de medidor y el registro parte de cero.
+    FRACCION_VUELTA_CONTADOR = 0.9
+
     def __str__(self):
         return f"Lectura {self.fecha_lectura} - Medidor {self.medidor.numero_medidor} - {self.consumo_energetico} kWh"
+
+    @classmethod
+    def consumo_entre(cls, registro_anterior, registro_actual):
+        """
+        kWh consumidos entre dos valores del registro del medidor.
+        Retorna None si no hay valor anterior.
+        """
+        if registro_anterior is None:
+            return None
+        if registro_actual >= registro_anterior:
+            return registro_actual - registro_anterior
+        capacidad = 10 ** len(str(registro_anterior))  # el registro da la vuelta en 99..9 → 0
+        if registro_anterior >= capacidad * cls.FRACCION_VUELTA_CONTADOR:
+            return capacidad - registro_anterior + registro_actual
+        return registro_actual
+
+    def _lecturas_del_medidor(self):
+        return Lectura.objects.filter(medidor_id=self.medidor_id).exclude(pk=self.pk)
+
+    def lectura_anterior(self):
+        """Lectura previa del mismo medidor (por fecha y, en la misma fecha, por id)."""
+        anteriores = Q(fecha_lectura__lt=self.fecha_lectura)
+        if self.pk:
+            anteriores |= Q(fecha_lectura=self.fecha_lectura, pk__lt=self.pk)
+        else:
+            anteriores |= Q(fecha_lectura=self.fecha_lectura)  # las ya guardadas van antes que la nueva
+        return self._lecturas_del_medidor().filter(anteriores).order_by('-fecha_lectura', '-pk').first()
+
+    def lectura_siguiente(self):
+        """Lectura posterior del mismo medidor (requiere que la lectura esté guardada)."""
+        siguientes = Q(fecha_lectura__gt=self.fecha_lectura) | Q(fecha_lectura=self.fecha_lectura, pk__gt=self.pk)
+        return self._lecturas_del_medidor().filter(siguientes).order_by('fecha_lectura', 'pk').first()
+
+    def save(self, *args, **kwargs):
+        # Posición (medidor, fecha) que tenía la lectura antes de editarla
+        original = None
+        if self.pk and not self._state.adding:
+            original = Lectura.objects.filter(pk=self.pk).values('medidor_id', 'fecha_lectura').first()
+
+        # El consumo se deriva del registro anterior; el valor digitado solo se
+        # conserva en la primera lectura del medidor
+        if self.medidor_id:
+            anterior = self.lectura_anterior()
+            consumo = self.consumo_entre(anterior.lectura_actual if anterior else None, self.lectura_actual)
+            if consumo is not None:
+                self.consumo_energetico = consumo
+        if self.consumo_energetico is None:
+            self.consumo_energetico = 0
+        super().save(*args, **kwargs)
+
+        # La lectura siguiente (si se insertó o editó una lectura intermedia) se recalcula
+        if self.medidor_id:
+            self.recalcular_consumo_siguiente()
+
+        # Si cambió de medidor o de fecha, la que la seguía en su posición anterior tenía un
+        # consumo calculado desde ella: se recalcula con su nueva lectura anterior
+        if original and original['medidor_id'] and (
+            original['medidor_id'] != self.medidor_id or original['fecha_lectura'] != self.fecha_lectura
+        ):
+            posicion_anterior = Lectura(pk=self.pk, medidor_id=original['medidor_id'],
+                                        fecha_lectura=original['fecha_lectura'])
+            siguiente = posicion_anterior.lectura_siguiente()
+            if siguiente is not None:
+                siguiente.recalcular_consumo()
+
+    def recalcular_consumo(self):
+        """Recalcula el consumo desde la lectura anterior y lo guarda con un UPDATE (sin pasar por save())."""
+        anterior = self.lectura_anterior()
+        consumo = self.consumo_entre(anterior.lectura_actual if anterior else None, self.lectura_actual)
+        if consumo is not None and consumo != self.consumo_energetico:
+            Lectura.objects.filter(pk=self.pk).update(consumo_energetico=consumo)
+            self.consumo_energetico = consumo
+
+    def recalcular_consumo_siguiente(self):
+        siguiente = self.lectura_siguiente()
+        if siguiente is None:
+            return
+        consumo = self.consumo_entre(self.lectura_actual, siguiente.lectura_actual)
+        if consumo != siguiente.consumo_energetico:
+            Lectura.objects.filter(pk=siguiente.pk).update(consumo_energetico=consumo)
     
     def get_cliente(self):
         return self.medidor.contrato.cliente
@@ -334,6 +435,104 @@ class Lectura(models.Model):
     
     class Meta:
         ordering = ['-fecha_lectura']  # Más recientes primero
+        indexes = [
+            # lista_lecturas: filtro por medidor + rango de fechas, orden por fecha
+            models.Index(fields=['medidor', '-fecha_lectura', '-id'], name='lectura_medidor_fecha_idx'),
+            # lista_lecturas sin filtro de medidor (paginación por cursor sobre fecha, id)
+            models.Index(fields=['-fecha_lectura', '-id'], name='lectura_fecha_id_idx'),
+        ]
+        constraints = [
+            # Una lectura por medidor, fecha y tipo: permite reenviar archivos sin duplicar (upsert)
+            models.UniqueConstraint(
+                fields=['medidor', 'fecha_lectura', 'tipo_lectura'],
+                name='lectura_unica_medidor_fecha_tipo',
+                violation_error_message='Ya existe una lectura de este tipo para el medidor en esa fecha.',
+            ),
+        ]
+
+
+# ============================================
+# MODELO LECTURA INTERVALO
+# ============================================
+# Curva de carga de un medidor inteligente: los 96 consumos de 15 minutos de
+# UN día, empaquetados en un único blob (en lugar de una fila por intervalo).
+#
+# CAMPOS:
+# - medidor: FK → Medidor
+# - fecha: Día (hora local) al que corresponden los intervalos
+# - valores: 96 enteros uint32 little-endian (384 bytes), Wh por intervalo.
+#   El intervalo i cubre desde las i*15 minutos; SIN_DATO marca los faltantes.
+#   Es el mismo formato de un arreglo NumPy dtype='<u4' (ver intervalos.py)
+# - intervalos_registrados: Cantidad de intervalos con dato
+# - consumo_wh: Suma del día en Wh (los totales se agregan en SQL sin leer el blob)
+#
+# RELACIONES:
+# - medidor (N:1): El medidor que registró la curva
+#
+class LecturaIntervalo(models.Model):
+    INTERVALOS_POR_DIA = 96
+    MINUTOS_INTERVALO = 15
+    SIN_DATO = 0xFFFFFFFF  # máximo de uint32
+
+    medidor = models.ForeignKey(
+        Medidor,
+        on_delete=models.CASCADE,  # Si se elimina medidor, se eliminan sus intervalos
+        related_name='intervalos',  # Acceder desde medidor: medidor.intervalos.all()
+    )
+    fecha = models.DateField()
+    valores = models.BinaryField(max_length=INTERVALOS_POR_DIA * 4)
+    intervalos_registrados = models.PositiveSmallIntegerField(default=0)
+    consumo_wh = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Intervalos {self.fecha} - Medidor {self.medidor_id} - {self.intervalos_registrados}/{self.INTERVALOS_POR_DIA}"
+
+    @classmethod
+    def dia_vacio(cls):
+        """Arreglo de 96 intervalos sin dato."""
+        return array(TIPO_UINT32, [cls.SIN_DATO]) * cls.INTERVALOS_POR_DIA
+
+    @classmethod
+    def empaquetar(cls, arreglo):
+        """Convierte un arreglo de 96 uint32 en el blob que se guarda."""
+        if len(arreglo) != cls.INTERVALOS_POR_DIA:
+            raise ValueError(f"Se esperaban {cls.INTERVALOS_POR_DIA} intervalos, se recibieron {len(arreglo)}")
+        if sys.byteorder == 'little':
+            return arreglo.tobytes()
+        copia = array(TIPO_UINT32, arreglo)
+        copia.byteswap()
+        return copia.tobytes()
+
+    def vista(self):
+        """
+        Los 96 valores como memoryview de uint32 sobre el blob, sin copiarlo.
+        (En un equipo big-endian se retorna una copia con el orden corregido.)
+        """
+        if sys.byteorder == 'little':
+            return memoryview(self.valores).cast('B').cast(TIPO_UINT32)
+        return memoryview(self.como_array())
+
+    def como_array(self):
+        """Copia modificable de los valores (array.array de uint32)."""
+        arreglo = array(TIPO_UINT32)
+        arreglo.frombytes(bytes(self.valores))
+        if sys.byteorder != 'little':
+            arreglo.byteswap()
+        return arreglo
+
+    def asignar(self, arreglo):
+        """Guarda el arreglo en el blob y recalcula los totales del día."""
+        presentes = [valor for valor in arreglo if valor != self.SIN_DATO]
+        self.valores = self.empaquetar(arreglo)
+        self.intervalos_registrados = len(presentes)
+        self.consumo_wh = sum(presentes)
+
+    class Meta:
+        ordering = ['medidor', 'fecha']
+        constraints = [
+            # Un blob por medidor y día; el índice único también sirve a las lecturas por rango
+            models.UniqueConstraint(fields=['medidor', 'fecha'], name='intervalo_unico_medidor_fecha'),
+        ]
 
 
 # ============================================
@@ -349,7 +548,9 @@ class Lectura(models.Model):
 # - fecha_vencimiento: Fecha límite de pago
 # - monto_total: Monto total a pagar
 # - consumo_energetico: Consumo que se está cobrando
-# - estado: Pagado, Pagado Parcialmente o Pendiente
+# - estado: Pagado, Pagado Parcialmente, Pendiente o Vencido (calculado según pagos y vencimiento)
+# - total_pagado: Suma de los pagos (columna desnormalizada, ver signals.py)
+# - saldo_pendiente: monto_total - total_pagado (columna desnormalizada)
 #
 # RELACIONES:
 # - lectura (1:1): La lectura que originó esta boleta
@@ -359,7 +560,8 @@ class Boleta(models.Model):
     BOLETA_CHOICES = [
         ('Pagado','Pagado'),
         ('Pagado Parcialmente','Pagado Parcialmente'),
-        ('Pendiente','Pendiente')
+        ('Pendiente','Pendiente'),
+        ('Vencido','Vencido')  # Con saldo después de fecha_vencimiento
     ]
     
     lectura = models.OneToOneField(
@@ -378,6 +580,9 @@ class Boleta(models.Model):
         choices=BOLETA_CHOICES, 
         default='Pendiente'
     )
+    # Se mantienen en cada escritura de Pago para no sumar los pagos en cada lectura
+    total_pagado = models.PositiveIntegerField(default=0)
+    saldo_pendiente = models.IntegerField(default=0)  # Negativo si hay pago en exceso
 
     def __str__(self):
         try:
@@ -416,27 +621,192 @@ class Boleta(models.Model):
             }
         }
     
+    def save(self, *args, **kwargs):
+        # Mantener el saldo y el estado coherentes si se edita el monto total
+        # total_pagado lo mantienen los pagos en SQL (recalcular_totales): al editar se relee
+        # de la base de datos para no sobrescribirlo con el valor que tenía la instancia al cargarse
+        if self.pk and not self._state.adding:
+            total_pagado = Boleta.objects.filter(pk=self.pk).values_list('total_pagado', flat=True).first()
+            if total_pagado is not None:
+                self.total_pagado = total_pagado
+        self.saldo_pendiente = self.monto_total - self.total_pagado
+        self.estado = self.estado_segun_pagos()
+        super().save(*args, **kwargs)
+    
+    def estado_segun_pagos(self, hoy=None):
+        """
+        Estado que corresponde a lo pagado y al vencimiento (mismas reglas que
+        recalcular_estados).
+        
+        retorna:
+            str: 'Pagado', 'Vencido', 'Pagado Parcialmente' o 'Pendiente'
+        """
+        if self.total_pagado >= self.monto_total:
+            return 'Pagado'
+        if self.fecha_vencimiento and self.fecha_vencimiento < (hoy or date.today()):
+            return 'Vencido'
+        if self.total_pagado > 0:
+            return 'Pagado Parcialmente'
+        return 'Pendiente'
+    
+    def actualizar_estado(self):
+        """
+        Lee total_pagado desde la base de datos y ajusta el estado de la
+        boleta; solo escribe si el estado cambió (sin pasar por save()).
+        
+        retorna:
+            bool: True si el estado cambió
+        """
+        self.refresh_from_db(fields=['total_pagado', 'saldo_pendiente', 'estado', 'fecha_vencimiento'])
+        estado = self.estado_segun_pagos()
+        if estado == self.estado:
+            return False
+        self.estado = estado
+        Boleta.objects.filter(pk=self.pk).update(estado=estado)
+        return True
+    
     def calcular_total_pagado(self):
         """
-        Calcula la suma total de todos los pagos realizados para esta boleta.
+        Retorna la suma total de todos los pagos realizados para esta boleta.
+        Lee la columna total_pagado, por lo que no realiza consultas.
         
         retorna:
             int: Total pagado en pesos, 0 si no hay pagos
         """
-        total = self.pagos.aggregate(Sum('monto_pagado'))['monto_pagado__sum']
-        return total if total is not None else 0
+        return self.total_pagado
     
     def calcular_saldo_pendiente(self):
         """
-        Calcula el saldo pendiente de pago (monto total - total pagado).
+        Retorna el saldo pendiente de pago (monto total - total pagado).
+        Lee la columna saldo_pendiente, por lo que no realiza consultas.
         
         retorna:
             int: Saldo pendiente en pesos
         """
-        return self.monto_total - self.calcular_total_pagado()
+        return self.saldo_pendiente
+    
+    @classmethod
+    def recalcular_totales(cls, boleta_ids=None):
+        """
+        Recalcula total_pagado y saldo_pendiente desde la tabla de pagos
+        con un único UPDATE. Si no se indican ids se recalculan todas.
+        
+        retorna:
+            int: Cantidad de boletas actualizadas
+        """
+        suma_pagos = Coalesce(
+            Subquery(
+                Pago.objects.filter(boleta=OuterRef('pk'))
+                .order_by()
+                .values('boleta')
+                .annotate(total=Sum('monto_pagado'))
+                .values('total')
+            ),
+            Value(0),
+        )
+        boletas = cls.objects.all()
+        if boleta_ids is not None:
+            boletas = boletas.filter(pk__in=[boleta_id for boleta_id in boleta_ids if boleta_id])
+        return boletas.update(
+            total_pagado=suma_pagos,
+            saldo_pendiente=F('monto_total') - suma_pagos,
+        )
+    
+    @staticmethod
+    def condiciones_estado(campo_pagado='total_pagado', hoy=None):
+        """
+        Reglas de estado_segun_pagos como condiciones Q, en orden de prioridad.
+        campo_pagado permite evaluarlas sobre otra columna o anotación
+        (ej: la suma real de los pagos).
+        
+        retorna:
+            list: (estado, Q) para Pagado, Vencido, Pagado Parcialmente y Pendiente
+        """
+        hoy = hoy or date.today()
+        impaga = Q(**{f'{campo_pagado}__lt': F('monto_total')})
+        return [
+            ('Pagado', Q(**{f'{campo_pagado}__gte': F('monto_total')})),
+            ('Vencido', impaga & Q(fecha_vencimiento__lt=hoy)),
+            ('Pagado Parcialmente', impaga & Q(**{f'{campo_pagado}__gt': 0}, fecha_vencimiento__gte=hoy)),
+            ('Pendiente', impaga & Q(**{campo_pagado: 0}, fecha_vencimiento__gte=hoy)),
+        ]
+    
+    @classmethod
+    def recalcular_estados(cls, boleta_ids=None, hoy=None):
+        """
+        Ajusta el estado de las boletas a su total_pagado y fecha_vencimiento
+        con un único UPDATE (CASE WHEN), solo en las filas cuyo estado no
+        corresponde. Requiere total_pagado al día (ver recalcular_totales).
+        
+        retorna:
+            int: Cantidad de boletas cuyo estado cambió
+        """
+        condiciones = cls.condiciones_estado(hoy=hoy)
+        incoherente = Q()
+        for estado, condicion in condiciones:
+            incoherente |= condicion & ~Q(estado=estado)
+        boletas = cls.objects.filter(incoherente)
+        if boleta_ids is not None:
+            boletas = boletas.filter(pk__in=[boleta_id for boleta_id in boleta_ids if boleta_id])
+        return boletas.update(estado=Case(
+            *(When(condicion, then=Value(estado)) for estado, condicion in condiciones[:-1]),
+            default=Value('Pendiente'),
+        ))
+    
+    @classmethod
+    def sincronizar_con_pagos(cls, hoy=None):
+        """
+        Repara total_pagado, saldo_pendiente y estado de todas las boletas.
+        En MySQL es un único UPDATE ... LEFT JOIN contra la suma de pagos por
+        boleta (la tabla de pagos se agrupa una sola vez, sin subconsulta por
+        fila); en otros motores se usan recalcular_totales y recalcular_estados.
+        Solo se escriben las filas desincronizadas.
+        
+        retorna:
+            int: Cantidad de boletas corregidas
+        """
+        hoy = hoy or date.today()
+        if connection.vendor != 'mysql':
+            cls.recalcular_totales()
+            return cls.recalcular_estados(hoy=hoy)
+        boleta = connection.ops.quote_name(cls._meta.db_table)
+        pago = connection.ops.quote_name(Pago._meta.db_table)
+        pagado = 'COALESCE(p.total, 0)'
+        # monto_total es UNSIGNED: se convierte para que el saldo pueda ser negativo
+        saldo = f'CAST(b.monto_total AS SIGNED) - {pagado}'
+        estado = (
+            f"CASE WHEN {pagado} >= b.monto_total THEN 'Pagado' "
+            f"WHEN b.fecha_vencimiento < %(hoy)s THEN 'Vencido' "
+            f"WHEN {pagado} > 0 THEN 'Pagado Parcialmente' ELSE 'Pendiente' END"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {boleta} b
+                LEFT JOIN (
+                    SELECT boleta_id, SUM(monto_pagado) AS total
+                    FROM {pago}
+                    WHERE boleta_id IS NOT NULL
+                    GROUP BY boleta_id
+                ) p ON p.boleta_id = b.id
+                SET b.total_pagado = {pagado},
+                    b.saldo_pendiente = {saldo},
+                    b.estado = {estado}
+                WHERE b.total_pagado <> {pagado}
+                   OR b.saldo_pendiente <> {saldo}
+                   OR b.estado <> {estado}
+            """, {'hoy': hoy})
+            return cursor.rowcount
     
     class Meta:
         ordering = ['-fecha_emision']  # Más recientes primero
+        indexes = [
+            # lista_boletas: filtro por estado ordenado por emisión
+            models.Index(fields=['estado', '-fecha_emision'], name='boleta_estado_emision_idx'),
+            # lista_boletas: orden y rango por fecha de emisión
+            models.Index(fields=['-fecha_emision', '-id'], name='boleta_emision_idx'),
+            # lista_boletas: rango por fecha de vencimiento
+            models.Index(fields=['fecha_vencimiento'], name='boleta_vencimiento_idx'),
+        ]
 
 
 # ============================================
@@ -584,6 +954,10 @@ class Pago(models.Model):
     
     class Meta:
         ordering = ['-fecha_pago']  # Más recientes primero
+        indexes = [
+            # lista_pagos: paginación por cursor sobre (fecha_pago, id)
+            models.Index(fields=['-fecha_pago', '-id'], name='pago_fecha_id_idx'),
+        ]
 
 # ============================================
 # MODELO NOTIFICACION LECTURA
@@ -597,6 +971,8 @@ class Pago(models.Model):
 # - registro_consumo: Texto descriptivo de la notificación (máx 500 caracteres)
 # - fecha_notificacion: Se asigna automáticamente al crear
 # - revisada: Boolean para marcar si fue leída (default: False)
+# - tipo_anomalia: Motivo de las notificaciones automáticas (choices, vacío en las manuales)
+# - detalle_anomalia: Valores que dispararon la alerta (JSON: consumo, mediana, puntaje, etc.)
 #
 # RELACIONES:
 # - lectura (N:1): La lectura que generó esta notificación
@@ -604,6 +980,12 @@ class Pago(models.Model):
 # - Solo usuarios con rol 'Administrador' o 'Eléctrico' pueden ver/editar
 #
 class NotificacionLectura(models.Model):
+    ANOMALIA_CHOICES = [
+        ('pico', 'Pico de consumo'),
+        ('consumo_cero', 'Racha de consumo cero'),
+        ('registro_retrocede', 'Registro del medidor retrocede'),
+    ]
+
     lectura = models.ForeignKey(
         Lectura,
         on_delete=models.CASCADE,  # Si se elimina lectura, se eliminan sus notificaciones
@@ -614,6 +996,9 @@ class NotificacionLectura(models.Model):
     registro_consumo = models.CharField(max_length=500)
     fecha_notificacion = models.DateTimeField(auto_now_add=True)  # Se asigna automáticamente
     revisada = models.BooleanField(default=False)  # Para marcar como leído
+    # Solo en las notificaciones generadas por `detectar_anomalias` (ver anomalias.py)
+    tipo_anomalia = models.CharField(max_length=30, choices=ANOMALIA_CHOICES, null=True, blank=True)
+    detalle_anomalia = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         """se representa  con un emote indicando si fue revisada"""
@@ -641,6 +1026,15 @@ class NotificacionLectura(models.Model):
     
     class Meta:
         ordering = ['-fecha_notificacion']  # Más recientes primero
+        indexes = [
+            # lista_notificaciones: filtro por revisada ordenado por fecha
+            models.Index(fields=['revisada', '-fecha_notificacion'], name='notif_lect_revisada_fecha_idx'),
+            models.Index(fields=['-fecha_notificacion'], name='notif_lect_fecha_idx'),
+        ]
+        constraints = [
+            # Una alerta automática de cada tipo por lectura (las manuales no tienen tipo: NULL no se repite)
+            models.UniqueConstraint(fields=['lectura', 'tipo_anomalia'], name='notif_lect_unica_anomalia'),
+        ]
 
 # ============================================
 # MODELO NOTIFICACION PAGO
@@ -654,12 +1048,19 @@ class NotificacionLectura(models.Model):
 # - deuda_pendiente: Texto descriptivo de la notificación (máx 500 caracteres)
 # - fecha_notificacion: Se asigna automáticamente al crear
 # - revisada: Boolean para marcar si fue leída (default: False)
+# - boleta: FK → Boleta (avisos de cobranza, que pueden no tener pago)
+# - tipo_aviso: Motivo de los avisos automáticos (choices, vacío en las manuales)
 #
 # RELACIONES:
 # - pago (N:1): El pago que generó esta notificación
+# - boleta (N:1): La boleta cobrada (ej: boleta vencida sin pagos)
 
 
 class NotificacionPago(models.Model):
+    AVISO_CHOICES = [
+        ('vencimiento', 'Boleta vencida'),
+    ]
+
     pago = models.ForeignKey(
         Pago,
         on_delete=models.CASCADE,  # Si se elimina pago, se eliminan sus notificaciones
@@ -670,17 +1071,36 @@ class NotificacionPago(models.Model):
     deuda_pendiente = models.CharField(max_length=500)
     fecha_notificacion = models.DateTimeField(auto_now_add=True)  # Se asigna automáticamente
     revisada = models.BooleanField(default=False)  # Para marcar como leído
+    # Solo en los avisos generados por `marcar_vencidas` (ver cobranza.py)
+    boleta = models.ForeignKey(
+        Boleta,
+        on_delete=models.CASCADE,  # Si se elimina boleta, se eliminan sus avisos
+        related_name='notificaciones',  # Acceder desde boleta: boleta.notificaciones.all()
+        null=True,
+        blank=True
+    )
+    tipo_aviso = models.CharField(max_length=30, choices=AVISO_CHOICES, null=True, blank=True)
 
     def __str__(self):
         """Representación en texto con emoji indicando si fue revisada"""
         estado = "✅" if self.revisada else "🔔"
-        return f"{estado} Notificación Pago - Cliente: {self.pago.get_cliente().nombre} - {self.deuda_pendiente[:30]}..."
+        cliente = self.get_cliente()
+        return f"{estado} Notificación Pago - Cliente: {cliente.nombre if cliente else 'Sin cliente'} - {self.deuda_pendiente[:30]}..."
+    
+    def get_cliente(self):
+        """Cliente del pago o, en los avisos de cobranza sin pago, de la boleta"""
+        if self.pago:
+            return self.pago.get_cliente()
+        if self.boleta:
+            return self.boleta.get_cliente()
+        return None
     
     def get_info_completa(self):
         """
         Retorna información completa de la notificación con datos del cliente.
         Útil para mostrar detalles sin múltiples consultas a la BD.
         """
+        cliente = self.get_cliente()
         return {
             'deuda_pendiente': self.deuda_pendiente,
             'fecha_notificacion': self.fecha_notificacion,
@@ -688,16 +1108,25 @@ class NotificacionPago(models.Model):
                 'numero_referencia': self.pago.numero_referencia,
                 'monto_pagado': self.pago.monto_pagado,
                 'fecha_pago': self.pago.fecha_pago
-            },
+            } if self.pago else None,
             'cliente': {
-                'nombre': self.pago.get_cliente().nombre,
-                'email': self.pago.get_cliente().email,
-                'telefono': self.pago.get_cliente().telefono
-            }
+                'nombre': cliente.nombre,
+                'email': cliente.email,
+                'telefono': cliente.telefono
+            } if cliente else None
             }
     
     class Meta:
         ordering = ['-fecha_notificacion']  # Más recientes primero
+        indexes = [
+            # lista_notificaciones: filtro por revisada ordenado por fecha
+            models.Index(fields=['revisada', '-fecha_notificacion'], name='notif_pago_revisada_fecha_idx'),
+            models.Index(fields=['-fecha_notificacion'], name='notif_pago_fecha_idx'),
+        ]
+        constraints = [
+            # Un aviso automático de cada tipo por boleta (las manuales no tienen tipo: NULL no se repite)
+            models.UniqueConstraint(fields=['boleta', 'tipo_aviso'], name='notif_pago_unico_aviso'),
+        ]
 
 # ============================================
 # MODELO USUARIO
@@ -748,4 +1177,77 @@ class Usuario(models.Model):
         return f"{self.username} - {self.rol}"
     
     class Meta:
-        ordering = ['username']  # Orden alfabético por username
\ No newline at end of file
+        ordering = ['username']  # Orden alfabético por username
+
+# ============================================
+# MODELO CONTADOR DASHBOARD
+# ============================================
+# Guarda los totales que se muestran en el dashboard para no ejecutar
+# un COUNT(*) por tabla en cada visita.
+# Se mantiene de forma incremental con señales (ver signals.py) y se puede
+# reconciliar con el comando `reconciliar_contadores`.
+#
+# CAMPOS:
+# - nombre: Identificador del contador (ej: total_clientes)
+# - valor: Valor actual del contador
+# - actualizado: Fecha de la última modificación
+#
+class ContadorDashboard(models.Model):
+    nombre = models.CharField(max_length=45, unique=True)
+    valor = models.BigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+    
+    class Meta:
+        ordering = ['nombre']
+
+
+# ============================================
+# MODELO TRABAJO PDF
+# ============================================
+# Cola de generación de PDF de boletas. La vista encola el trabajo y un
+# proceso aparte (comando `procesar_trabajos_pdf`) genera el PDF en la caché
+# en disco (ver trabajos_pdf.py y cache_pdf.py); el navegador consulta el
+# estado y descarga el archivo al terminar.
+#
+# CAMPOS:
+# - boleta: FK → Boleta
+# - estado: pendiente, procesando, listo o error (choices)
+# - version: Versión del PDF generado en la caché (vacía hasta terminar)
+# - error: Mensaje si la generación falló
+# - creado / iniciado / terminado: Momentos de encolado, inicio y término
+#
+# RELACIONES:
+# - boleta (N:1): La boleta a generar
+#
+class TrabajoPDF(models.Model):
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('listo', 'Listo'),
+        ('error', 'Error'),
+    ]
+
+    boleta = models.ForeignKey(
+        Boleta,
+        on_delete=models.CASCADE,  # Si se elimina boleta, se eliminan sus trabajos
+        related_name='trabajos_pdf',  # Acceder desde boleta: boleta.trabajos_pdf.all()
+    )
+    estado = models.CharField(max_length=15, choices=ESTADO_CHOICES, default='pendiente')
+    version = models.CharField(max_length=64, blank=True)
+    error = models.CharField(max_length=500, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Trabajo PDF {self.id} - Boleta {self.boleta_id} ({self.estado})"
+
+    class Meta:
+        ordering = ['-creado']
+        indexes = [
+            # procesar_trabajos_pdf: siguiente trabajo pendiente en orden de llegada
+            models.Index(fields=['estado', 'id'], name='trabajo_pdf_estado_idx'),
+        ]
@@ -0,0 +1,151 @@
+"""
+PAGINACIÓN POR CURSOR (KEYSET)
+==============================
+
+Alternativa a django.core.paginator.Paginator para tablas grandes
+(lecturas, pagos). En lugar de COUNT(*) + LIMIT/OFFSET, cada página se
+obtiene con una condición sobre la última fila vista:
+
+    WHERE (fecha, id) < (fecha_ultima, id_ultimo) ORDER BY fecha DESC, id DESC LIMIT n + 1
+
+por lo que la página N cuesta lo mismo que la página 1 y no se cuenta la
+tabla completa. El cursor que viaja en la URL (?cursor=...) es opaco y va
+firmado con django.core.signing: un cursor alterado o vencido vuelve a la
+primera página, igual que Paginator.get_page con un número inválido.
+
+Las vistas lo activan con paginar_objetos(..., orden_cursor='fecha_lectura').
+"""
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+PARAMETRO_CURSOR = 'cursor'
+SALT_CURSOR = 'sistemaGestion.paginacion'
+
+SIGUIENTE = 's'
+ANTERIOR = 'a'
+
+
+def codificar_cursor(direccion, valor=None, pk=None):
+    """
+    Genera el cursor opaco. Sin valor ni pk, con dirección ANTERIOR,
+    representa la última página.
+    """
+    return signing.dumps([direccion, valor, pk], salt=SALT_CURSOR, compress=True)
+
+
+def decodificar_cursor(cursor):
+    """Retorna (dirección, valor, pk) o None si el cursor no es válido."""
+    try:
+        direccion, valor, pk = signing.loads(cursor, salt=SALT_CURSOR)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if direccion not in (SIGUIENTE, ANTERIOR):
+        return None
+    return direccion, valor, pk
+
+
+class PaginaCursor:
+    """
+    Página obtenida por cursor. Expone la parte de la interfaz de
+    django.core.paginator.Page que usan los templates (iteración, len,
+    has_next, has_previous, has_other_pages) y los cursores de navegación.
+    """
+
+    es_cursor = True
+
+    def __init__(self, object_list, cursor_anterior, cursor_siguiente, cursor_ultima, parametros_url):
+        self.object_list = object_list
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_ultima = cursor_ultima
+        # Querystring de los filtros activos, sin el cursor (para armar los enlaces)
+        self.parametros_url = parametros_url
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _condicion_despues_de(campo, valor, pk, descendente):
+    """Filas que van después de (valor, pk) en el orden de la paginación."""
+    operador = 'lt' if descendente else 'gt'
+    return Q(**{f'{campo}__{operador}': valor}) | Q(**{campo: valor, f'pk__{operador}': pk})
+
+
+def _clave(objeto, campo):
+    valor = getattr(objeto, campo)
+    return valor.isoformat() if hasattr(valor, 'isoformat') else valor, objeto.pk
+
+
+def paginar_por_cursor(request, objetos, campo, elementos_por_pagina=5, descendente=True):
+    """
+    Pagina el queryset `objetos` por (campo, pk) usando el cursor de request.GET.
+
+    parámetros:
+        campo: campo de orden, no nulo (ej: 'fecha_lectura')
+        descendente: True para mostrar primero los más recientes
+
+    retorna:
+        PaginaCursor
+    """
+    prefijo = '-' if descendente else ''
+    prefijo_inverso = '' if descendente else '-'
+    modelo_campo = objetos.model._meta.get_field(campo)
+
+    datos_cursor = decodificar_cursor(request.GET.get(PARAMETRO_CURSOR, ''))
+    direccion, valor, pk = datos_cursor or (SIGUIENTE, None, None)
+    if valor is not None:
+        try:
+            valor = modelo_campo.to_python(valor)
+        except ValidationError:
+            direccion, valor, pk = SIGUIENTE, None, None
+
+    if direccion == SIGUIENTE:
+        consulta = objetos.order_by(f'{prefijo}{campo}', f'{prefijo}pk')
+        if valor is not None:
+            consulta = consulta.filter(_condicion_despues_de(campo, valor, pk, descendente))
+    else:
+        # Hacia atrás: se recorre en el orden inverso y luego se da vuelta la página
+        consulta = objetos.order_by(f'{prefijo_inverso}{campo}', f'{prefijo_inverso}pk')
+        if valor is not None:
+            consulta = consulta.filter(_condicion_despues_de(campo, valor, pk, not descendente))
+
+    filas = list(consulta[:elementos_por_pagina + 1])
+    hay_mas = len(filas) > elementos_por_pagina
+    filas = filas[:elementos_por_pagina]
+    if direccion == ANTERIOR:
+        filas.reverse()
+
+    if direccion == SIGUIENTE:
+        tiene_anterior = valor is not None
+        tiene_siguiente = hay_mas
+    else:
+        tiene_anterior = hay_mas
+        tiene_siguiente = valor is not None
+
+    cursor_anterior = codificar_cursor(ANTERIOR, *_clave(filas[0], campo)) if filas and tiene_anterior else None
+    cursor_siguiente = codificar_cursor(SIGUIENTE, *_clave(filas[-1], campo)) if filas and tiene_siguiente else None
+    cursor_ultima = codificar_cursor(ANTERIOR) if tiene_siguiente else None
+
+    parametros = request.GET.copy()
+    parametros.pop(PARAMETRO_CURSOR, None)
+    parametros.pop('page', None)
+
+    return PaginaCursor(filas, cursor_anterior, cursor_siguiente, cursor_ultima, parametros.urlencode())
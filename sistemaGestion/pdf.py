@@ -0,0 +1,50 @@
+"""
+CONVERSIÓN DE HTML A PDF
+========================
+
+Convierte los documentos ya renderizados (HTML) a PDF con xhtml2pdf.
+
+Este módulo no importa Django: los procesos de impresión masiva
+(impresion.py) lo cargan sin configurar Django ni abrir conexiones a la base
+de datos (en Windows y macOS los procesos hijos parten de cero). xhtml2pdf se
+importa en el primer uso.
+"""
+
+import time
+from io import BytesIO
+
+
+class ErrorPDF(Exception):
+    """xhtml2pdf no pudo generar el documento."""
+
+
+def html_a_pdf(html):
+    """
+    Convierte un documento HTML (str) a PDF.
+
+    retorna:
+        bytes: Contenido del PDF
+    """
+    from xhtml2pdf import pisa
+
+    resultado = BytesIO()
+    documento = pisa.pisaDocument(BytesIO(html.encode('UTF-8')), resultado)
+    if documento.err:
+        raise ErrorPDF(f'xhtml2pdf informó {documento.err} errores')
+    return resultado.getvalue()
+
+
+def convertir_trabajo(trabajo):
+    """
+    Convierte un trabajo (clave, html) en un proceso de impresión.
+
+    retorna:
+        (clave, pdf o None, mensaje de error o None, segundos de CPU usados)
+    """
+    clave, html = trabajo
+    inicio = time.process_time()
+    try:
+        pdf, error = html_a_pdf(html), None
+    except Exception as excepcion:
+        pdf, error = None, str(excepcion) or excepcion.__class__.__name__
+    return clave, pdf, error, time.process_time() - inicio
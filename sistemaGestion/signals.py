@@ -0,0 +1,91 @@
+"""
+SEÑALES DEL SISTEMA DE GESTIÓN ELÉCTRICA
+========================================
+
+Mantienen datos desnormalizados sincronizados con las escrituras de los modelos.
+
+- Pago (crear / editar / eliminar) → Boleta.total_pagado, Boleta.saldo_pendiente y Boleta.estado
+- Boleta o Pago (cualquier escritura) → invalida las estadísticas cacheadas de boletas
+- Pago (crear / editar / eliminar) → borra los PDF en caché de su boleta
+- Altas/bajas de Cliente, Contrato, Medidor, Lectura, Boleta y Pago → contadores del dashboard
+- Lectura eliminada → consumo_energetico de la lectura siguiente del medidor
+"""
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import cache_pdf
+from .contadores import CONTADOR_POR_MODELO, incrementar_contador
+from .estadisticas import invalidar_estadisticas_boletas
+from .models import Boleta, Lectura, Pago
+
+
+# Se guarda el estado original para detectar pagos que cambian de boleta
+# o de estado al editarse
+@receiver(post_init, sender=Pago)
+def recordar_estado_original(sender, instance, **kwargs):
+    instance._boleta_id_original = instance.boleta_id
+    instance._estado_pago_original = instance.estado_pago if instance.pk else None
+
+
+@receiver(post_save, sender=Pago)
+def actualizar_totales_al_guardar_pago(sender, instance, **kwargs):
+    boleta_ids = {instance.boleta_id, instance._boleta_id_original}
+    Boleta.recalcular_totales(boleta_ids)
+    Boleta.recalcular_estados(boleta_ids)
+    invalidar_estadisticas_boletas()
+    cache_pdf.invalidar(boleta_ids)
+
+    # Contador de pagos realizados (solo cuenta los que están en estado 'Pagado')
+    era_pagado = instance._estado_pago_original == 'Pagado'
+    es_pagado = instance.estado_pago == 'Pagado'
+    if era_pagado != es_pagado:
+        incrementar_contador('pagos_realizados', 1 if es_pagado else -1)
+
+    instance._boleta_id_original = instance.boleta_id
+    instance._estado_pago_original = instance.estado_pago
+
+
+@receiver(post_delete, sender=Pago)
+def actualizar_totales_al_eliminar_pago(sender, instance, **kwargs):
+    boleta_ids = {instance.boleta_id, instance._boleta_id_original}
+    Boleta.recalcular_totales(boleta_ids)
+    Boleta.recalcular_estados(boleta_ids)
+    invalidar_estadisticas_boletas()
+    cache_pdf.invalidar(boleta_ids)
+    if instance._estado_pago_original == 'Pagado':
+        incrementar_contador('pagos_realizados', -1)
+
+
+@receiver(post_save, sender=Boleta)
+@receiver(post_delete, sender=Boleta)
+def invalidar_estadisticas_al_cambiar_boleta(sender, **kwargs):
+    invalidar_estadisticas_boletas()
+
+
+# Al eliminar una lectura intermedia, la siguiente pasa a medirse desde la anterior.
+# En borrados en cascada (ej: se elimina el medidor) no hay nada que recalcular.
+@receiver(post_delete, sender=Lectura)
+def recalcular_consumo_al_eliminar_lectura(sender, instance, origin=None, **kwargs):
+    if origin is not instance or not instance.medidor_id:
+        return
+    anterior = instance.lectura_anterior()
+    if anterior is not None:
+        anterior.recalcular_consumo_siguiente()
+
+
+# Solo en los modelos con contador: un receptor sin sender se ejecutaría para
+# todos los modelos (sesiones, TrabajoPDF, log del admin) y un post_delete global
+# desactiva el borrado rápido en cascada de Django en todo el proyecto
+def incrementar_contador_al_crear(sender, instance, created, **kwargs):
+    if created:
+        incrementar_contador(CONTADOR_POR_MODELO[sender], 1)
+
+
+def decrementar_contador_al_eliminar(sender, instance, **kwargs):
+    incrementar_contador(CONTADOR_POR_MODELO[sender], -1)
+
+
+for modelo in CONTADOR_POR_MODELO:
+    post_save.connect(incrementar_contador_al_crear, sender=modelo, dispatch_uid=f'contador_alta_{modelo.__name__}')
+    post_delete.connect(decrementar_contador_al_eliminar, sender=modelo, dispatch_uid=f'contador_baja_{modelo.__name__}')
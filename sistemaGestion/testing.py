@@ -0,0 +1,147 @@
+"""
+UTILIDADES PARA PRUEBAS DE PRESUPUESTO DE CONSULTAS
+===================================================
+
+Permite verificar en los tests que cada vista de lista/detalle se mantiene
+dentro del presupuesto de consultas definido en settings.PRESUPUESTO_CONSULTAS,
+usando datos sembrados con más filas que una página para que un N+1
+(en la vista, en el template o en un __str__) haga fallar la prueba.
+
+Ejemplo:
+
+    class PresupuestoVistasTest(PresupuestoConsultasMixin, TestCase):
+        @classmethod
+        def setUpTestData(cls):
+            cls.datos = sembrar_datos_presupuesto()
+
+        def test_presupuestos(self):
+            self.iniciar_sesion()
+            self.assertPresupuestosVistas(kwargs_por_vista(self.datos))
+"""
+
+from datetime import date, timedelta
+
+from django.urls import reverse
+
+from .middleware import ContadorConsultas, presupuesto_para
+from .models import (
+    Boleta, Cliente, Contrato, Lectura, Medidor, NotificacionLectura, NotificacionPago,
+    Pago, Tarifa, Tarifa_has_Contrato, Usuario
+)
+from .urls import app_name, urlpatterns
+
+
+def nombres_vistas(prefijos=('lista_', 'detalle_')):
+    """Retorna los nombres de URL de sistemaGestion que comienzan con los prefijos."""
+    return sorted({
+        patron.name for patron in urlpatterns
+        if patron.name and patron.name.startswith(prefijos)
+    })
+
+
+def sembrar_datos_presupuesto(cantidad=12):
+    """
+    Crea una cadena Cliente → Contrato → Medidor → Lectura → Boleta → Pago
+    (más notificaciones) por cada i en range(cantidad). Con más filas que la
+    paginación, los N+1 se notan en el conteo de consultas.
+
+    retorna:
+        dict: el primer objeto creado de cada modelo
+    """
+    hoy = date.today()
+    tarifa = Tarifa.objects.create(fecha_vigencia=hoy - timedelta(days=365), precio=150)
+    primeros = {'tarifa': tarifa}
+    for i in range(cantidad):
+        cliente = Cliente.objects.create(
+            numero_cliente=f'CLI-P{i:04d}', nombre=f'Cliente {i}',
+            email=f'cliente{i}@prueba.cl', telefono='+56912345678'
+        )
+        contrato = Contrato.objects.create(
+            cliente=cliente, fecha_inicio=hoy - timedelta(days=90),
+            fecha_fin=hoy + timedelta(days=365), numero_contrato=f'CON-P{i:04d}'
+        )
+        Tarifa_has_Contrato.objects.create(tarifa=tarifa, contrato=contrato)
+        medidor = Medidor.objects.create(
+            contrato=contrato, numero_medidor=f'MED-P{i:04d}',
+            fecha_instalacion=hoy - timedelta(days=90), ubicacion=f'Calle {i}'
+        )
+        lectura = Lectura.objects.create(
+            medidor=medidor, fecha_lectura=hoy - timedelta(days=i),
+            consumo_energetico=100 + i, lectura_actual=1000 + i
+        )
+        boleta = Boleta.objects.create(
+            lectura=lectura, fecha_emision=hoy, fecha_vencimiento=hoy + timedelta(days=30),
+            monto_total=15000, consumo_energetico=str(100 + i)
+        )
+        pago = Pago.objects.create(
+            boleta=boleta, fecha_pago=hoy, monto_pagado=5000,
+            metodo_pago='Efectivo', numero_referencia=f'REF-P{i:04d}'
+        )
+        notificacion_lectura = NotificacionLectura.objects.create(lectura=lectura, registro_consumo='Consumo sobre el promedio')
+        notificacion_pago = NotificacionPago.objects.create(pago=pago, deuda_pendiente='Saldo pendiente de la boleta')
+        for nombre, objeto in (
+            ('cliente', cliente), ('contrato', contrato), ('medidor', medidor), ('lectura', lectura),
+            ('boleta', boleta), ('pago', pago), ('notificacion_lectura', notificacion_lectura),
+            ('notificacion_pago', notificacion_pago),
+        ):
+            primeros.setdefault(nombre, objeto)
+    return primeros
+
+
+def kwargs_por_vista(datos, usuario=None):
+    """Arma los kwargs de reverse() de cada vista de detalle a partir de sembrar_datos_presupuesto()."""
+    kwargs = {
+        'detalle_cliente': {'cliente_id': datos['cliente'].id},
+        'detalle_contrato': {'contrato_id': datos['contrato'].id},
+        'detalle_medidor': {'medidor_id': datos['medidor'].id},
+        'detalle_lectura': {'lectura_id': datos['lectura'].id},
+        'detalle_boleta': {'boleta_id': datos['boleta'].id},
+        'detalle_pago': {'pago_id': datos['pago'].id},
+        'detalle_tarifa': {'tarifa_id': datos['tarifa'].id},
+        'detalle_notificacion_lectura': {'notificacion_id': datos['notificacion_lectura'].id},
+        'detalle_notificacion_pago': {'notificacion_id': datos['notificacion_pago'].id},
+    }
+    if usuario is not None:
+        kwargs['detalle_usuario'] = {'usuario_id': usuario.id}
+    return kwargs
+
+
+class PresupuestoConsultasMixin:
+    """Mixin para django.test.TestCase con aserciones de presupuesto de consultas."""
+
+    def iniciar_sesion(self, rol='Administrador'):
+        """Crea un usuario con el rol indicado e inicia sesión con self.client."""
+        self.usuario = Usuario.objects.create(
+            username=f'presupuesto_{rol.lower()}', password='clave123',
+            email='presupuesto@prueba.cl', telefono='+56900000000', rol=rol
+        )
+        self.client.post(reverse(f'{app_name}:login'), {'username': self.usuario.username, 'password': 'clave123'})
+        return self.usuario
+
+    def assertPresupuestoConsultas(self, nombre_url, kwargs=None, query=None):
+        """
+        Verifica que un GET a la vista no supere su presupuesto de consultas.
+        Se mide el segundo GET: el primero carga las cachés (estadisticas.py), como en
+        producción, donde casi todos los requests las encuentran cargadas.
+        """
+        url = reverse(f'{app_name}:{nombre_url}', kwargs=kwargs)
+        self.client.get(url, query or {})
+        contador = ContadorConsultas()
+        with contador.registrar():
+            response = self.client.get(url, query or {})
+        self.assertEqual(response.status_code, 200, f"{nombre_url} respondió {response.status_code}")
+        presupuesto = presupuesto_para(nombre_url)
+        self.assertLessEqual(
+            contador.cantidad, presupuesto,
+            f"{nombre_url} ejecutó {contador.cantidad} consultas ({contador.segundos * 1000:.1f} ms), "
+            f"presupuesto: {presupuesto}"
+        )
+        return contador
+
+    def assertPresupuestosVistas(self, kwargs_vistas):
+        """Verifica el presupuesto de todas las vistas de lista y detalle."""
+        for nombre_url in nombres_vistas():
+            if nombre_url.startswith('detalle_') and nombre_url not in kwargs_vistas:
+                continue
+            with self.subTest(vista=nombre_url):
+                self.assertPresupuestoConsultas(nombre_url, kwargs_vistas.get(nombre_url))
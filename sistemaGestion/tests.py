@@ -1,3 +1,101 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .importacion import guardar_lecturas, opciones_upsert
+from .ingesta import RUTA_INGESTA, AplicacionIngesta
+from .models import Lectura, Medidor
+from .testing import PresupuestoConsultasMixin, kwargs_por_vista, sembrar_datos_presupuesto
+
+
+class PresupuestoVistasTest(PresupuestoConsultasMixin, TestCase):
+    """Las vistas de lista y detalle no superan su presupuesto de consultas (settings.PRESUPUESTO_CONSULTAS)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = sembrar_datos_presupuesto()
+
+    def test_presupuestos_vistas(self):
+        usuario = self.iniciar_sesion()
+        self.assertPresupuestosVistas(kwargs_por_vista(self.datos, usuario))
+
+
+class UpsertLecturasTest(TestCase):
+    """guardar_lecturas es idempotente: reenviar las mismas lecturas no las duplica."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.medidor = sembrar_datos_presupuesto(cantidad=1)['medidor']
+
+    def lecturas(self, registros):
+        hoy = date.today()
+        return [
+            Lectura(medidor_id=self.medidor.id, fecha_lectura=hoy - timedelta(days=dias),
+                    tipo_lectura='Digital', lectura_actual=registro, consumo_energetico=None)
+            for dias, registro in registros
+        ]
+
+    def test_guardar_dos_veces(self):
+        registros = [(10, 1200), (5, 1350)]
+        total = Lectura.objects.count()
+        self.assertEqual(guardar_lecturas(self.lecturas(registros)), {'creadas': 2, 'actualizadas': 0, 'sin_cambios': 0})
+        self.assertEqual(guardar_lecturas(self.lecturas(registros)), {'creadas': 0, 'actualizadas': 0, 'sin_cambios': 2})
+        self.assertEqual(Lectura.objects.count(), total + 2)
+
+        # Una corrección del registro pasa por el upsert (conflicto en la restricción única)
+        self.assertEqual(guardar_lecturas(self.lecturas([(5, 1400)])), {'creadas': 0, 'actualizadas': 1, 'sin_cambios': 0})
+        self.assertEqual(Lectura.objects.count(), total + 2)
+        self.assertEqual(
+            Lectura.objects.get(medidor=self.medidor, fecha_lectura=date.today() - timedelta(days=5)).lectura_actual, 1400
+        )
+
+    def test_opciones_upsert_sin_restriccion(self):
+        # MySQL no acepta unique_fields (supports_update_conflicts_with_target = False)
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.assertNotIn('unique_fields', opciones_upsert(['medidor'], ['lectura_actual']))
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', True):
+            self.assertEqual(opciones_upsert(['medidor'], ['lectura_actual'])['unique_fields'], ['medidor'])
+
+
+@override_settings(INGESTA_LECTURAS={'TOKENS': {'headend': 'token-prueba'}, 'ARCHIVO_DESCARTES': None})
+class IngestaLecturasTest(TransactionTestCase):
+    """Un lote enviado al endpoint de ingesta queda guardado en la base de datos (no descartado)."""
+
+    async def enviar(self, aplicacion, datos):
+        mensajes = []
+
+        async def recibir():
+            return {'type': 'http.request', 'body': json.dumps(datos).encode(), 'more_body': False}
+
+        async def enviar(mensaje):
+            mensajes.append(mensaje)
+
+        scope = {'type': 'http', 'path': RUTA_INGESTA, 'method': 'POST',
+                 'headers': [(b'authorization', b'Bearer token-prueba')]}
+        await aplicacion(scope, recibir, enviar)
+        # El guardado es asíncrono: detener() espera a que se guarde lo pendiente
+        await aplicacion.buffer.detener()
+        return mensajes[0]['status']
+
+    def test_lote_guardado(self):
+        hoy = date.today()
+        medidor = Medidor.objects.create(numero_medidor='MED-ING1', fecha_instalacion=hoy - timedelta(days=90),
+                                         ubicacion='Calle 1')
+        datos = {'lecturas': [
+            {'numero_medidor': 'MED-ING1', 'fecha_lectura': str(hoy - timedelta(days=dias)), 'lectura_actual': registro}
+            for dias, registro in ((3, 100), (2, 150), (1, 230))
+        ]}
+        aplicacion = AplicacionIngesta(aplicacion_django=None)
+
+        self.assertEqual(asyncio.run(self.enviar(aplicacion, datos)), 202)
+        self.assertEqual(aplicacion.buffer.estadisticas['creadas'], 3)
+        self.assertEqual(aplicacion.buffer.estadisticas['descartadas'], 0)
+        self.assertEqual(aplicacion.buffer.estadisticas['errores_bd'], 0)
+        self.assertEqual(
+            list(Lectura.objects.filter(medidor=medidor).order_by('fecha_lectura').values_list('lectura_actual', flat=True)),
+            [100, 150, 230],
+        )
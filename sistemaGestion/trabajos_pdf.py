@@ -0,0 +1,228 @@
+"""
+GENERACIÓN DE PDF EN SEGUNDO PLANO
+==================================
+
+Generar un PDF con xhtml2pdf toma cientos de milisegundos de CPU. Hecho
+dentro del request ocupa un worker web todo ese tiempo y una ráfaga de
+descargas deja sin workers al resto de las páginas. Por eso la generación
+es un trabajo encolado (modelo TrabajoPDF) que atiende un proceso aparte:
+
+    python manage.py procesar_trabajos_pdf
+
+FLUJO:
+- generar_pdf_boleta: si el PDF de la versión actual de la boleta está en la
+  caché en disco (cache_pdf.py) se entrega de inmediato; si no, se encola un
+  trabajo (o se reutiliza el que ya está en cola para esa boleta) y se
+  muestra una página que consulta el estado
+- estado_trabajo_pdf (JSON): pendiente / procesando / listo / error, con la
+  posición en la cola y, al terminar, la URL de descarga
+- descargar_trabajo_pdf: lee el archivo generado desde la caché
+- El worker toma los trabajos en orden con un UPDATE condicional
+  (estado='pendiente' → 'procesando'): se pueden ejecutar varios workers sin
+  que dos generen el mismo trabajo. Los trabajos que quedan en 'procesando'
+  por un worker que murió vuelven a la cola después de MINUTOS_ABANDONO, y los
+  terminados se borran después de HORAS_RETENCION. En el mismo mantenimiento
+  se poda la caché en disco (cache_pdf.podar)
+
+CONFIGURACIÓN (settings.TRABAJOS_PDF): ASINCRONO (False genera el PDF dentro
+del request, sin worker), INTERVALO_SEGUNDOS, MINUTOS_ABANDONO, HORAS_RETENCION.
+El worker entrega los PDF a través de la caché en disco: con la caché
+desactivada (CACHE_PDF_BOLETAS['DIRECTORIO'] = None) el PDF se genera dentro
+del request aunque ASINCRONO sea True.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import cache_pdf
+from .impresion import TEMPLATE_BOLETA, contexto_boleta
+from .models import Boleta, Pago, Tarifa_has_Contrato, TrabajoPDF
+from .pdf import html_a_pdf
+
+
+CONFIGURACION_POR_DEFECTO = {
+    'ASINCRONO': True,
+    'INTERVALO_SEGUNDOS': 1.0,   # espera del worker cuando la cola está vacía
+    'MINUTOS_ABANDONO': 10,      # 'procesando' por más tiempo → vuelve a la cola
+    'HORAS_RETENCION': 24,       # trabajos terminados que se conservan
+}
+ESTADOS_ACTIVOS = ('pendiente', 'procesando')
+
+
+def configuracion():
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'TRABAJOS_PDF', {})}
+
+
+def asincrono():
+    """True si los PDF se generan en el worker (ASINCRONO y caché en disco activa)."""
+    return configuracion()['ASINCRONO'] and cache_pdf.habilitada()
+
+
+def cargar_contexto(boleta_id, fecha_generacion=None):
+    """
+    Contexto del template de la boleta: la boleta con lectura, medidor,
+    contrato y cliente en una consulta, sus pagos y su tarifa.
+    Lanza Boleta.DoesNotExist si no existe.
+    """
+    boleta = (
+        Boleta.objects
+        .select_related('lectura__medidor__contrato__cliente')
+        .prefetch_related(Prefetch('pagos', queryset=Pago.objects.order_by('fecha_pago')))
+        .get(id=boleta_id)
+    )
+    medidor = boleta.lectura.medidor if boleta.lectura else None
+    tarifa = None
+    if medidor and medidor.contrato_id:
+        tarifa_contrato = (
+            Tarifa_has_Contrato.objects.filter(contrato_id=medidor.contrato_id).select_related('tarifa').first()
+        )
+        if tarifa_contrato:
+            tarifa = tarifa_contrato.tarifa
+    return contexto_boleta(boleta, tarifa, fecha_generacion or datetime.now())
+
+
+def pdf_en_cache(boleta_id):
+    """
+    retorna:
+        (contexto, versión actual del PDF, contenido en caché o None)
+    """
+    contexto = cargar_contexto(boleta_id)
+    version = cache_pdf.version_boleta(contexto, TEMPLATE_BOLETA)
+    return contexto, version, cache_pdf.obtener(boleta_id, version)
+
+
+def generar_pdf(boleta_id):
+    """
+    PDF de la versión actual de la boleta: desde la caché o generándolo (y
+    guardándolo en ella). Lanza pdf.ErrorPDF si xhtml2pdf falla.
+
+    retorna:
+        (versión, contenido)
+    """
+    contexto, version, contenido = pdf_en_cache(boleta_id)
+    if contenido is None:
+        contenido = html_a_pdf(render_to_string(TEMPLATE_BOLETA, contexto))
+        cache_pdf.guardar(boleta_id, version, contenido)
+    return version, contenido
+
+
+def solicitar(boleta_id):
+    """Trabajo en cola de la boleta o, si no hay, uno nuevo."""
+    trabajo = TrabajoPDF.objects.filter(boleta_id=boleta_id, estado__in=ESTADOS_ACTIVOS).order_by('id').first()
+    return trabajo or TrabajoPDF.objects.create(boleta_id=boleta_id)
+
+
+def estado(trabajo):
+    """
+    Estado del trabajo para la consulta del navegador. Si estaba listo pero
+    su PDF ya no está en la caché (podado o invalidado por un pago) vuelve a
+    la cola.
+
+    retorna:
+        dict: trabajo, boleta, estado, en_cola (trabajos antes que este), error
+    """
+    if trabajo.estado == 'listo' and not cache_pdf.existe(trabajo.boleta_id, trabajo.version):
+        TrabajoPDF.objects.filter(id=trabajo.id).update(estado='pendiente', version='', iniciado=None, terminado=None)
+        trabajo.estado = 'pendiente'
+    datos = {
+        'trabajo': trabajo.id,
+        'boleta': trabajo.boleta_id,
+        'estado': trabajo.estado,
+        'en_cola': 0,
+        'error': trabajo.error,
+    }
+    if trabajo.estado == 'pendiente':
+        datos['en_cola'] = TrabajoPDF.objects.filter(estado='pendiente', id__lt=trabajo.id).count()
+    return datos
+
+
+def tomar_siguiente():
+    """Reserva el siguiente trabajo pendiente para este worker, o None si la cola está vacía."""
+    candidatos = TrabajoPDF.objects.filter(estado='pendiente').order_by('id').values_list('id', flat=True)[:10]
+    for trabajo_id in candidatos:
+        # Solo uno de los workers que compiten logra el cambio de estado
+        if TrabajoPDF.objects.filter(id=trabajo_id, estado='pendiente').update(
+            estado='procesando', iniciado=timezone.now()
+        ):
+            return TrabajoPDF.objects.get(id=trabajo_id)
+    return None
+
+
+def procesar(trabajo):
+    """Genera el PDF del trabajo y registra el resultado. Retorna el estado final."""
+    if not cache_pdf.habilitada():
+        # Sin caché el PDF no tendría dónde quedar para la descarga
+        TrabajoPDF.objects.filter(id=trabajo.id).update(
+            estado='error', error='La caché de PDF está desactivada', terminado=timezone.now()
+        )
+        return 'error'
+    try:
+        version, _ = generar_pdf(trabajo.boleta_id)
+    except Exception as error:
+        TrabajoPDF.objects.filter(id=trabajo.id).update(
+            estado='error', error=(str(error) or error.__class__.__name__)[:500], terminado=timezone.now()
+        )
+        return 'error'
+    TrabajoPDF.objects.filter(id=trabajo.id).update(estado='listo', version=version, error='', terminado=timezone.now())
+    return 'listo'
+
+
+def mantener_cola(minutos_abandono=None, horas_retencion=None):
+    """
+    Devuelve a la cola los trabajos abandonados y borra los terminados antiguos.
+
+    retorna:
+        (trabajos recuperados, trabajos borrados)
+    """
+    opciones = configuracion()
+    ahora = timezone.now()
+    recuperados = TrabajoPDF.objects.filter(
+        estado='procesando',
+        iniciado__lt=ahora - timedelta(minutes=minutos_abandono or opciones['MINUTOS_ABANDONO']),
+    ).update(estado='pendiente', iniciado=None)
+    borrados, _ = TrabajoPDF.objects.filter(
+        estado__in=('listo', 'error'),
+        terminado__lt=ahora - timedelta(hours=horas_retencion or opciones['HORAS_RETENCION']),
+    ).delete()
+    return recuperados, borrados
+
+
+def trabajar(una_vez=False, reportar=None):
+    """
+    Ciclo del worker: procesa los trabajos pendientes en orden de llegada.
+    Con una_vez=True termina cuando la cola queda vacía.
+
+    parámetros:
+        reportar: función opcional que recibe (trabajo, estado final, segundos)
+
+    retorna:
+        dict: listos, con_error
+    """
+    opciones = configuracion()
+    resumen = {'listos': 0, 'con_error': 0}
+    ultimo_mantenimiento = 0.0
+    while True:
+        close_old_connections()
+        if time.monotonic() - ultimo_mantenimiento > 60:
+            mantener_cola()
+            cache_pdf.podar()
+            ultimo_mantenimiento = time.monotonic()
+
+        trabajo = tomar_siguiente()
+        if trabajo is None:
+            if una_vez:
+                return resumen
+            time.sleep(opciones['INTERVALO_SEGUNDOS'])
+            continue
+
+        inicio = time.monotonic()
+        resultado = procesar(trabajo)
+        resumen['listos' if resultado == 'listo' else 'con_error'] += 1
+        if reportar:
+            reportar(trabajo, resultado, time.monotonic() - inicio)
@@ -35,6 +35,8 @@ urlpatterns = [
     # Lecturas
     path('lecturas/', views.lista_lecturas, name='lista_lecturas'), # Página de lista de lecturas
     path('lecturas/crear/', views.crear_lectura, name='crear_lectura'), # Página para crear una nueva lectura
+    path('lecturas/importar/', views.importar_lecturas, name='importar_lecturas'), # Carga masiva de lecturas (CSV/JSONL)
+    path('lecturas/exportar/', views.exportar_lecturas, name='exportar_lecturas'), # Descarga CSV de las lecturas filtradas
     path('lecturas/<int:lectura_id>/', views.detalle_lectura, name='detalle_lectura'), # Detalle de lectura
     path('lecturas/eliminar/<int:lectura_id>/', views.eliminar_lectura, name='eliminar_lectura'), # Eliminar lectura
     path('lecturas/editar/<int:lectura_id>/', views.editar_lectura, name='editar_lectura'), # Editar lectura
@@ -42,6 +44,7 @@ urlpatterns = [
     # Boletas
     path('boletas/', views.lista_boletas, name='lista_boletas'), # Página de lista de boletas
     path('boletas/crear/', views.crear_boleta, name='crear_boleta'), # Página para crear una nueva boleta
+    path('boletas/exportar/', views.exportar_boletas, name='exportar_boletas'), # Descarga CSV de las boletas filtradas
     path('boletas/<int:boleta_id>/', views.detalle_boleta, name='detalle_boleta'), # Detalle de boleta
     path('boletas/eliminar/<int:boleta_id>/', views.eliminar_boleta, name='eliminar_boleta'), # Eliminar boleta
     path('boletas/editar/<int:boleta_id>/', views.editar_boleta, name='editar_boleta'), # Editar boleta
@@ -49,6 +52,8 @@ urlpatterns = [
     # Pagos
     path('pagos/', views.lista_pagos, name='lista_pagos'), # Página de lista de pagos
     path('pagos/crear/', views.crear_pago, name='crear_pago'),  # Página para crear un nuevo pago
+    path('pagos/conciliar/', views.conciliar_pagos, name='conciliar_pagos'), # Carga de la cartola bancaria (CSV)
+    path('pagos/exportar/', views.exportar_pagos, name='exportar_pagos'), # Descarga CSV de los pagos filtrados
     path('pagos/<int:pago_id>/', views.detalle_pago, name='detalle_pago'), # Detalle de pago
     path('pagos/eliminar/<int:pago_id>/', views.eliminar_pago, name='eliminar_pago'), # Eliminar pago
     path('pagos/editar/<int:pago_id>/', views.editar_pago, name='editar_pago'), # Editar pago
@@ -85,4 +90,7 @@ urlpatterns = [
     
     # Reportes PDF
     path('boletas/<int:boleta_id>/pdf/', views.generar_pdf_boleta, name='pdf_boleta'), # Generar PDF de boleta
+    path('boletas/<int:boleta_id>/pdf/trabajo/', views.solicitar_pdf_boleta, name='solicitar_pdf_boleta'), # Encolar PDF (JSON)
+    path('pdf/trabajos/<int:trabajo_id>/', views.estado_trabajo_pdf, name='estado_trabajo_pdf'), # Estado del trabajo (JSON)
+    path('pdf/trabajos/<int:trabajo_id>/descargar/', views.descargar_trabajo_pdf, name='descargar_trabajo_pdf'), # Descargar PDF generado
 ]
\ No newline at end of file
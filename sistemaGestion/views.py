@@ -5,21 +5,29 @@ usuarios y notificaciones con un sistema de autenticación por roles.
 """
 
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.db.models import CharField, F, Value
 from django.http import JsonResponse, HttpResponse
-from django.template.loader import render_to_string
-from xhtml2pdf import pisa
-from io import BytesIO
+from io import TextIOWrapper
 from datetime import datetime
-from .models import Cliente, Contrato, Tarifa, Medidor, Lectura, Boleta, Pago, Usuario, NotificacionPago, NotificacionLectura, Tarifa_has_Contrato
-from .forms import ClienteForm, ContratoForm, MedidorForm, LecturaForm, BoletaForm, PagoForm, TarifaForm, UsuarioForm, NotificacionLecturaForm, NotificacionPagoForm
+from .models import Cliente, Contrato, Tarifa, Medidor, Lectura, Boleta, Pago, Usuario, NotificacionPago, NotificacionLectura, Tarifa_has_Contrato, TrabajoPDF
+from .forms import ClienteForm, ContratoForm, MedidorForm, LecturaForm, ImportarLecturasForm, BoletaForm, PagoForm, ConciliarPagosForm, TarifaForm, UsuarioForm, NotificacionLecturaForm, NotificacionPagoForm
+from .contadores import leer_contadores
+from .estadisticas import estadisticas_boletas
+from . import cache_pdf, conciliacion, exportacion, importacion, trabajos_pdf
+from .pdf import ErrorPDF
+from .paginacion import paginar_por_cursor
 
 
 # ============================================================================
 # CONFIGURACIÓN DEL SISTEMA
 # ============================================================================
 
+# Cantidad máxima de filas rechazadas que se muestran al importar lecturas o conciliar pagos
+MAXIMO_ERRORES_IMPORTACION = 100
+
 # Diccionario que define qué módulos puede acceder cada rol de usuario
 PERMISOS_ROL = {
     'Administrador': ['medidores', 'lecturas', 'clientes', 'contratos', 'tarifas', 'boletas', 'pagos', 'usuarios', 'notificaciones'],
@@ -44,10 +52,14 @@ def tiene_permiso(request, modulo):
 
 #esto permite paginar los objetos en las vistas
 #es decir, dividir la lista de objetos en varias paginas
-def paginar_objetos(request, objetos, elementos_por_pagina=5):
+def paginar_objetos(request, objetos, elementos_por_pagina=5, orden_cursor=None):
     """
-    Función auxiliar para paginar objetos
+    Función auxiliar para paginar objetos.
+    Con orden_cursor (ej: 'fecha_lectura') se usa paginación por cursor,
+    sin COUNT(*) ni OFFSET (ver paginacion.py); el orden queda (campo, id) descendente.
     """
+    if orden_cursor:
+        return paginar_por_cursor(request, objetos, orden_cursor, elementos_por_pagina)
     paginator = Paginator(objetos, elementos_por_pagina)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -143,13 +155,15 @@ def dashboard(request):
     notificaciones = notificaciones[:5]  # Solo 5 más recientes
     
     # Obtener estadísticas clave para el dashboard
+    # (contadores mantenidos incrementalmente, se leen en una sola consulta)
+    contadores = leer_contadores()
     datos = {
-        'total_clientes': Cliente.objects.count(),
-        'total_contratos': Contrato.objects.count(),
-        'total_medidores': Medidor.objects.count(),
-        'lecturas_pendientes': Lectura.objects.count(), 
-        'boletas_emitidas': Boleta.objects.count(),
-        'pagos_realizados': Pago.objects.filter(estado_pago='Pagado').count(),
+        'total_clientes': contadores['total_clientes'],
+        'total_contratos': contadores['total_contratos'],
+        'total_medidores': contadores['total_medidores'],
+        'lecturas_pendientes': contadores['lecturas_pendientes'], 
+        'boletas_emitidas': contadores['boletas_emitidas'],
+        'pagos_realizados': contadores['pagos_realizados'],
         'notificaciones': notificaciones,
         'total_notificaciones': len(notificaciones),
     }
@@ -725,17 +739,16 @@ def ubicacion_medidor(request, medidor_id):
 # VISTAS PARA GESTIÓN DE LECTURAS
 # ============================================================================
 
-def lista_lecturas(request):
-    if not usuario_logueado(request):
-        return redirect('sistemaGestion:login')
+def filtrar_lecturas(request):
+    """
+    Aplica los filtros de búsqueda de la lista de lecturas (parámetros GET).
+    La usan lista_lecturas y exportar_lecturas.
 
-    if not tiene_permiso(request, 'lecturas'):
-        messages.error(request, 'No tienes permisos para acceder a esta sección')
-        return redirect('sistemaGestion:dashboard')
-    
+    retorna:
+        (queryset sin orden, valores de los filtros para el template)
+    """
     from datetime import datetime, timedelta
-    
-    # Obtener todas las lecturas inicialmente
+
     lecturas = Lectura.objects.all()
     
     # Filtros de búsqueda
@@ -782,34 +795,60 @@ def lista_lecturas(request):
     if medidor_id:
         lecturas = lecturas.filter(medidor_id=medidor_id)
     
-    # Ordenar los resultados
-    lecturas = lecturas.order_by('-fecha_lectura')
+    filtros = {
+        'search_fecha': search_fecha,
+        'search_tipo': search_tipo,
+        'search_consumo_min': search_consumo_min,
+        'search_consumo_max': search_consumo_max,
+        'periodo_actual': periodo,
+        'año_actual': año,
+        'mes_actual': mes,
+        'medidor_actual': medidor_id,
+    }
+    return lecturas, filtros
+
+def lista_lecturas(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'lecturas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+    
+    lecturas, filtros = filtrar_lecturas(request)
+    
+    # Ordenar los resultados (la paginación por cursor ordena por fecha e id); el medidor se muestra en cada fila
+    lecturas = lecturas.select_related('medidor').order_by('-fecha_lectura')
     
     # Obtener años y medidores disponibles para los filtros
     años_disponibles = Lectura.objects.dates('fecha_lectura', 'year', order='DESC')
     medidores_disponibles = Medidor.objects.all()
     
-    page_obj = paginar_objetos(request, lecturas)
+    page_obj = paginar_objetos(request, lecturas, orden_cursor='fecha_lectura')
     
     datos = {
         'username': request.session.get('username'),
         'nombre': request.session.get('nombre'),
         'lecturas': page_obj,
         'page_obj': page_obj,
-        'search_fecha': search_fecha,
-        'search_tipo': search_tipo,
-        'search_consumo_min': search_consumo_min,
-        'search_consumo_max': search_consumo_max,
-        'periodo_actual': periodo,
-        'año_actual': año,
-        'mes_actual': mes,
-        'medidor_actual': medidor_id,
+        **filtros,
         'años_disponibles': años_disponibles,
         'medidores_disponibles': medidores_disponibles,
-        'total_lecturas': lecturas.count(),
     }
     return render(request, 'lecturas/lista_lecturas.html', datos)
 
+#exportar lecturas
+def exportar_lecturas(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'lecturas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    lecturas, _ = filtrar_lecturas(request)
+    return exportacion.respuesta_csv(lecturas, exportacion.COLUMNAS_LECTURAS, 'lecturas')
+
 #crear lectura
 def crear_lectura(request):
     if not usuario_logueado(request):
@@ -933,19 +972,67 @@ def detalle_lectura(request, lectura_id):
     }
     return render(request, 'lecturas/detalle_lectura.html', datos)
 
-# ============================================================================
-# VISTAS PARA GESTIÓN DE BOLETAS
-# ============================================================================
-
-def lista_boletas(request):
+#importar lecturas desde archivo (CSV o JSONL)
+def importar_lecturas(request):
+    """Vista para la carga masiva de lecturas (ver importacion.py)"""
     if not usuario_logueado(request):
         return redirect('sistemaGestion:login')
     
-    if not tiene_permiso(request, 'boletas'):
+    if not tiene_permiso(request, 'lecturas'):
         messages.error(request, 'No tienes permisos para acceder a esta sección')
         return redirect('sistemaGestion:dashboard')
     
-    # Obtener todas las boletas inicialmente
+    resumen = None
+    errores = []
+    if request.method == 'POST':
+        form = ImportarLecturasForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            
+            # Solo se muestran las primeras filas rechazadas; el total queda en el resumen
+            def reportar_error(linea, mensaje):
+                if len(errores) < MAXIMO_ERRORES_IMPORTACION:
+                    errores.append({'linea': linea, 'mensaje': mensaje})
+            
+            try:
+                # Se lee el archivo subido de forma incremental, sin cargarlo completo en memoria
+                texto = TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+                resumen = importacion.importar_lecturas(
+                    texto, importacion.detectar_formato(archivo.name), reportar_error=reportar_error
+                )
+            except (importacion.ErrorImportacion, UnicodeDecodeError) as error:
+                messages.error(request, f'No se pudo importar el archivo: {error}')
+            else:
+                messages.success(
+                    request,
+                    f"{resumen['creadas']} lecturas nuevas y {resumen['actualizadas']} actualizadas de {resumen['leidas']} filas"
+                )
+                if resumen['con_error']:
+                    messages.warning(request, f"{resumen['con_error']} filas rechazadas")
+    else:
+        form = ImportarLecturasForm()
+    
+    datos = {
+        'username': request.session.get('username'),
+        'nombre': request.session.get('nombre'),
+        'form': form,
+        'resumen': resumen,
+        'errores': errores,
+    }
+    return render(request, 'lecturas/importar_lecturas.html', datos)
+
+# ============================================================================
+# VISTAS PARA GESTIÓN DE BOLETAS
+# ============================================================================
+
+def filtrar_boletas(request):
+    """
+    Aplica los filtros de búsqueda de la lista de boletas (parámetros GET).
+    La usan lista_boletas y exportar_boletas.
+
+    retorna:
+        (queryset sin orden, valores de los filtros para el template)
+    """
     boletas = Boleta.objects.all()
     
     # Filtros de búsqueda
@@ -961,31 +1048,39 @@ def lista_boletas(request):
     if search_fecha_vencimiento:
         boletas = boletas.filter(fecha_vencimiento__lte=search_fecha_vencimiento)
     if search_estado:
-        boletas = boletas.filter(estado__icontains=search_estado)
+        # Se traduce a los estados que coinciden para que la consulta use el índice (estado, fecha_emision)
+        estados = [valor for valor, _ in Boleta.BOLETA_CHOICES if search_estado.lower() in valor.lower()]
+        boletas = boletas.filter(estado__in=estados or [search_estado])
     if search_monto_min:
         boletas = boletas.filter(monto_total__gte=search_monto_min)
     if search_monto_max:
         boletas = boletas.filter(monto_total__lte=search_monto_max)
     
+    filtros = {
+        'search_fecha_emision': search_fecha_emision,
+        'search_fecha_vencimiento': search_fecha_vencimiento,
+        'search_estado': search_estado,
+        'search_monto_min': search_monto_min,
+        'search_monto_max': search_monto_max,
+    }
+    return boletas, filtros
+
+def lista_boletas(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+    
+    if not tiene_permiso(request, 'boletas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+    
+    boletas, filtros = filtrar_boletas(request)
+    
     # Ordenar los resultados
     boletas = boletas.order_by('-fecha_emision')
     page_obj = paginar_objetos(request, boletas)
     
-    # Estadísticas usando información de boletas
-    todas_boletas = Boleta.objects.all()
-    # Calcular total pagado sumando todos los pagos
-    total_pagado_manual = sum(
-        sum(pago.monto_pagado for pago in boleta.pagos.all())
-        for boleta in todas_boletas
-    )
-    
-    estadisticas = {
-        'total_servicios': todas_boletas.count(),
-        'servicios_pagados': todas_boletas.filter(estado='Pagado').count(),
-        'servicios_pendientes': todas_boletas.exclude(estado='Pagado').count(),
-        'gasto_total_presupuestado': sum(boleta.monto_total for boleta in todas_boletas),
-        'total_pagado': total_pagado_manual,
-    }
+    # Estadísticas de todas las boletas (una consulta agregada, cacheada)
+    estadisticas = estadisticas_boletas()
     
     datos = {
         'username': request.session.get('username'),
@@ -993,14 +1088,22 @@ def lista_boletas(request):
         'boletas': page_obj,
         'page_obj': page_obj,
         'estadisticas': estadisticas,
-        'search_fecha_emision': search_fecha_emision,
-        'search_fecha_vencimiento': search_fecha_vencimiento,
-        'search_estado': search_estado,
-        'search_monto_min': search_monto_min,
-        'search_monto_max': search_monto_max,
+        **filtros,
     }
     return render(request, 'boletas/lista_boletas.html', datos)
 
+#exportar boletas
+def exportar_boletas(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+    
+    if not tiene_permiso(request, 'boletas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+    
+    boletas, _ = filtrar_boletas(request)
+    return exportacion.respuesta_csv(boletas, exportacion.COLUMNAS_BOLETAS, 'boletas')
+
 #crear boleta
 def crear_boleta(request):
     if not usuario_logueado(request):
@@ -1118,10 +1221,6 @@ def detalle_boleta(request, boleta_id):
     # Obtener pagos asociados
     pagos = boleta.pagos.all() if hasattr(boleta, 'pagos') else []
     
-    # Calcular totales manualmente
-    total_pagado = sum(pago.monto_pagado for pago in pagos)
-    saldo_pendiente = boleta.monto_total - total_pagado
-    
     datos = {
         'rol': request.session.get('rol'),
         'nombre': request.session.get('nombre'),
@@ -1131,8 +1230,8 @@ def detalle_boleta(request, boleta_id):
         'contrato': contrato,
         'cliente': cliente,
         'pagos': pagos,
-        'total_pagado': total_pagado,
-        'saldo_pendiente': saldo_pendiente
+        'total_pagado': boleta.total_pagado,
+        'saldo_pendiente': boleta.saldo_pendiente
     }
     return render(request, 'boletas/detalle_boleta.html', datos)
 
@@ -1453,15 +1552,14 @@ def detalle_usuario(request, usuario_id):
 # VISTAS PARA GESTIÓN DE PAGOS
 # ============================================================================
 
-def lista_pagos(request):
-    if not usuario_logueado(request):
-        return redirect('sistemaGestion:login')
-    
-    if not tiene_permiso(request, 'pagos'):
-        messages.error(request, 'No tienes permisos para acceder a esta sección')
-        return redirect('sistemaGestion:dashboard')
-    
-    # Obtener todos los pagos inicialmente
+def filtrar_pagos(request):
+    """
+    Aplica los filtros de búsqueda de la lista de pagos (parámetros GET).
+    La usan lista_pagos y exportar_pagos.
+
+    retorna:
+        (queryset sin orden, valores de los filtros para el template)
+    """
     pagos = Pago.objects.all()
     
     # Filtros de búsqueda
@@ -1486,24 +1584,51 @@ def lista_pagos(request):
     if search_monto_max:
         pagos = pagos.filter(monto_pagado__lte=search_monto_max)
     
-    # Ordenar los resultados
+    filtros = {
+        'search_fecha': search_fecha,
+        'search_metodo': search_metodo,
+        'search_estado': search_estado,
+        'search_referencia': search_referencia,
+        'search_monto_min': search_monto_min,
+        'search_monto_max': search_monto_max,
+    }
+    return pagos, filtros
+
+def lista_pagos(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+    
+    if not tiene_permiso(request, 'pagos'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+    
+    pagos, filtros = filtrar_pagos(request)
+    
+    # Ordenar los resultados (la paginación por cursor ordena por fecha e id)
     pagos = pagos.order_by('-fecha_pago')
-    page_obj = paginar_objetos(request, pagos)
+    page_obj = paginar_objetos(request, pagos, orden_cursor='fecha_pago')
     
     datos = {
         'username': request.session.get('username'),
         'nombre': request.session.get('nombre'),
         'pagos': page_obj,
         'page_obj': page_obj,
-        'search_fecha': search_fecha,
-        'search_metodo': search_metodo,
-        'search_estado': search_estado,
-        'search_referencia': search_referencia,
-        'search_monto_min': search_monto_min,
-        'search_monto_max': search_monto_max,
+        **filtros,
     }
     return render(request, 'pagos/lista_pagos.html', datos)
 
+#exportar pagos
+def exportar_pagos(request):
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+    
+    if not tiene_permiso(request, 'pagos'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+    
+    pagos, _ = filtrar_pagos(request)
+    return exportacion.respuesta_csv(pagos, exportacion.COLUMNAS_PAGOS, 'pagos')
+
 #crear pago
 def crear_pago(request):
     if not usuario_logueado(request):
@@ -1562,18 +1687,13 @@ def editar_pago(request, pago_id):
         
         # Mostrar información de la boleta asociada
         if pago.boleta:
-            from django.db.models import Sum
             boleta = pago.boleta
             
-            # Calcular total pagado manualmente
-            total_pagado = boleta.pagos.aggregate(Sum('monto_pagado'))['monto_pagado__sum'] or 0
-            saldo_pendiente = boleta.monto_total - total_pagado
-            
             info_text = f"""Boleta ID: {boleta.id}
 Cliente: {boleta.get_cliente().nombre}
 Monto Total: ${boleta.monto_total:,}
-Total Pagado: ${total_pagado:,}
-Saldo Pendiente: ${saldo_pendiente:,}
+Total Pagado: ${boleta.total_pagado:,}
+Saldo Pendiente: ${boleta.saldo_pendiente:,}
 Estado Actual: {boleta.estado}"""
             form.fields['info_boleta'].initial = info_text
         # ============================================================
@@ -1640,6 +1760,55 @@ def detalle_pago(request, pago_id):
     return render(request, 'pagos/detalle_pago.html', datos)
 
 
+#conciliar pagos desde la cartola bancaria (CSV)
+def conciliar_pagos(request):
+    """Vista para registrar los pagos de una cartola bancaria (ver conciliacion.py)"""
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+    
+    if not tiene_permiso(request, 'pagos'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+    
+    resumen = None
+    observadas = []
+    if request.method == 'POST':
+        form = ConciliarPagosForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            
+            # Solo se muestran las primeras filas que requieren revisión; el total queda en el resumen
+            def reportar(entrada):
+                if entrada['resultado'] != 'conciliado' and len(observadas) < MAXIMO_ERRORES_IMPORTACION:
+                    observadas.append(entrada)
+            
+            try:
+                texto = TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+                resumen = conciliacion.conciliar_pagos(
+                    texto, solo_verificar=form.cleaned_data['solo_verificar'], reportar=reportar
+                )
+            except (importacion.ErrorImportacion, UnicodeDecodeError) as error:
+                messages.error(request, f'No se pudo procesar la cartola: {error}')
+            else:
+                pagos = resumen['conciliado'] + resumen['exceso']
+                if form.cleaned_data['solo_verificar']:
+                    messages.info(request, f"{pagos} pagos por registrar de {resumen['leidas']} filas (no se registró nada)")
+                else:
+                    messages.success(request, f"{pagos} pagos registrados de {resumen['leidas']} filas")
+                if resumen['sin_coincidencia'] or resumen['duplicado'] or resumen['rechazado']:
+                    messages.warning(request, f"{resumen['leidas'] - pagos} filas no se registraron")
+    else:
+        form = ConciliarPagosForm()
+    
+    datos = {
+        'username': request.session.get('username'),
+        'nombre': request.session.get('nombre'),
+        'form': form,
+        'resumen': resumen,
+        'observadas': observadas,
+    }
+    return render(request, 'pagos/conciliar_pagos.html', datos)
+
 # ============================================================================
 # VISTAS PARA SISTEMA DE NOTIFICACIONES
 # ============================================================================
@@ -1657,9 +1826,21 @@ def lista_notificaciones(request):
     search_mensaje = request.GET.get('mensaje', '')
     search_estado = request.GET.get('estado', '')
     
-    # Obtener notificaciones de ambos tipos con filtros
-    notificaciones_lectura = NotificacionLectura.objects.all().order_by('-fecha_notificacion')
-    notificaciones_pago = NotificacionPago.objects.all().order_by('-fecha_notificacion')
+    # Feed unificado: ambos tipos se combinan con UNION ALL en la base de datos,
+    # que ordena y pagina; solo se traen las filas de la página visible.
+    # Cada rama expone las mismas columnas que usa el template.
+    notificaciones_lectura = NotificacionLectura.objects.annotate(
+        tipo=Value('Lectura', output_field=CharField()),
+        titulo=Value('Notificación de Lectura', output_field=CharField()),
+        mensaje=F('registro_consumo'),
+        fecha=F('fecha_notificacion'),
+    )
+    notificaciones_pago = NotificacionPago.objects.annotate(
+        tipo=Value('Pago', output_field=CharField()),
+        titulo=Value('Notificación de Pago', output_field=CharField()),
+        mensaje=F('deuda_pendiente'),
+        fecha=F('fecha_notificacion'),
+    )
     
     # Aplicar filtros de texto en el mensaje
     if search_mensaje:
@@ -1674,40 +1855,22 @@ def lista_notificaciones(request):
         notificaciones_lectura = notificaciones_lectura.filter(revisada=True)
         notificaciones_pago = notificaciones_pago.filter(revisada=True)
     
-    # Combinar ambos tipos de notificaciones con su ID para acciones CRUD
-    notificaciones = []
-    
-    # Agregar notificaciones de lectura si no se filtra por tipo o si es "Lectura"
+    # Solo las ramas del tipo filtrado ("Lectura", "Pago" o ambas)
+    columnas = ('id', 'revisada', 'tipo', 'titulo', 'mensaje', 'fecha')
+    ramas = []
     if not search_tipo or search_tipo == 'Lectura':
-        for notif in notificaciones_lectura:
-            notificaciones.append({
-                'id': notif.id,
-                'tipo': 'Lectura',
-                'titulo': 'Notificación de Lectura',
-                'mensaje': notif.registro_consumo,
-                'fecha': notif.fecha_notificacion,
-                'revisada': notif.revisada,
-                'url_detalle': f'/notificaciones/lectura/{notif.id}/',
-                'url_editar': f'/notificaciones/lectura/editar/{notif.id}/',
-                'url_eliminar': f'/notificaciones/lectura/eliminar/{notif.id}/'
-            })
-    
-    # Agregar notificaciones de pago si no se filtra por tipo o si es "Pago"
+        ramas.append(notificaciones_lectura.order_by().values(*columnas))
     if not search_tipo or search_tipo == 'Pago':
-        for notif in notificaciones_pago:
-            notificaciones.append({
-                'id': notif.id,
-                'tipo': 'Pago',
-                'titulo': 'Notificación de Pago',
-                'mensaje': notif.deuda_pendiente,
-                'fecha': notif.fecha_notificacion,
-                'revisada': notif.revisada,
-                'url_detalle': f'/notificaciones/pago/{notif.id}/',
-                'url_editar': f'/notificaciones/pago/editar/{notif.id}/',
-                'url_eliminar': f'/notificaciones/pago/eliminar/{notif.id}/'
-            })
+        ramas.append(notificaciones_pago.order_by().values(*columnas))
     
-    # Paginar la lista combinada de notificaciones
+    if not ramas:
+        notificaciones = NotificacionLectura.objects.none()
+    elif len(ramas) == 1:
+        notificaciones = ramas[0].order_by('-fecha', '-id')
+    else:
+        notificaciones = ramas[0].union(ramas[1], all=True).order_by('-fecha', '-id')
+    
+    # Paginar en la base de datos (COUNT + LIMIT/OFFSET sobre la unión)
     page_obj = paginar_objetos(request, notificaciones)
     
     datos = {
@@ -2085,66 +2248,121 @@ def marcar_notificacion_revisada(request, tipo, notificacion_id):
 # GENERACIÓN DE REPORTES EN PDF
 # ============================================================================
 
+def _respuesta_pdf(boleta_id, contenido):
+    response = HttpResponse(contenido, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="boleta_{boleta_id}.pdf"'
+    return response
+
+
+def _sin_permiso_json(request, modulo):
+    """Respuesta JSON 401/403 si el usuario no puede acceder al módulo, o None."""
+    if not usuario_logueado(request):
+        return JsonResponse({'error': 'Debes iniciar sesión'}, status=401)
+    if not tiene_permiso(request, modulo):
+        return JsonResponse({'error': 'No tienes permisos para acceder a esta sección'}, status=403)
+    return None
+
+
+def _datos_trabajo_pdf(trabajo):
+    """Estado del trabajo (trabajos_pdf.estado) con las URLs para consultar y descargar."""
+    datos = trabajos_pdf.estado(trabajo)
+    datos['url_estado'] = reverse('sistemaGestion:estado_trabajo_pdf', args=[trabajo.id])
+    datos['url_descarga'] = (
+        reverse('sistemaGestion:descargar_trabajo_pdf', args=[trabajo.id]) if datos['estado'] == 'listo' else None
+    )
+    return datos
+
+
 def generar_pdf_boleta(request, boleta_id):
     """
     Genera un PDF de una boleta específica
-    Utiliza xhtml2pdf para convertir templates HTML a PDF
+    Utiliza xhtml2pdf para convertir templates HTML a PDF.
+    Si el PDF de la versión actual está en la caché en disco se entrega de
+    inmediato. Si no, se encola un trabajo para el worker
+    (procesar_trabajos_pdf) y se muestra una página que espera el resultado,
+    sin ocupar este worker web durante la generación (ver trabajos_pdf.py).
     """
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'boletas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
     try:
-        boleta = Boleta.objects.get(id=boleta_id)
-        
-        # Obtener información relacionada
-        lectura = boleta.lectura if boleta.lectura else None
-        medidor = lectura.medidor if lectura and lectura.medidor else None
-        contrato = medidor.contrato if medidor and medidor.contrato else None
-        cliente = contrato.cliente if contrato and contrato.cliente else None
-        
-        # Obtener tarifa aplicada (si existe relación)
-        tarifa = None
-        if contrato:
-            tarifa_contrato = Tarifa_has_Contrato.objects.filter(contrato=contrato).first()
-            if tarifa_contrato:
-                tarifa = tarifa_contrato.tarifa
-        
-        # Obtener pagos realizados
-        pagos = boleta.pagos.all().order_by('fecha_pago') if hasattr(boleta, 'pagos') else []
-        
-        # Calcular totales manualmente
-        total_pagado = sum(pago.monto_pagado for pago in pagos)
-        saldo_pendiente = boleta.monto_total - total_pagado
-        
-        # Contexto para el template
-        context = {
-            'boleta': boleta,
-            'lectura': lectura,
-            'medidor': medidor,
-            'contrato': contrato,
-            'cliente': cliente,
-            'tarifa': tarifa,
-            'pagos': pagos,
-            'total_pagado': total_pagado,
-            'saldo_pendiente': saldo_pendiente,
-            'fecha_generacion': datetime.now(),
-        }
-        
-        # Renderizar el template HTML
-        html_string = render_to_string('reportes/boleta_pdf.html', context)
-        
-        # Generar PDF con xhtml2pdf
-        result = BytesIO()
-        pdf = pisa.pisaDocument(BytesIO(html_string.encode("UTF-8")), result)
-        
-        if not pdf.err:
-            response = HttpResponse(result.getvalue(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="boleta_{boleta.id}.pdf"'
-            return response
-        else:
-            return HttpResponse("Error al generar PDF", status=500)
+        _, _, contenido = trabajos_pdf.pdf_en_cache(boleta_id)
+        if contenido is None:
+            if trabajos_pdf.asincrono():
+                trabajo = trabajos_pdf.solicitar(boleta_id)
+                datos = {
+                    'boleta_id': boleta_id,
+                    'trabajo': _datos_trabajo_pdf(trabajo),
+                }
+                return render(request, 'reportes/generando_pdf.html', datos)
+            _, contenido = trabajos_pdf.generar_pdf(boleta_id)
+        return _respuesta_pdf(boleta_id, contenido)
         
     except Boleta.DoesNotExist:
         return HttpResponse("Boleta no encontrada", status=404)
+    except ErrorPDF:
+        return HttpResponse("Error al generar PDF", status=500)
     except Exception as e:
         return HttpResponse(f"Error al generar PDF: {str(e)}", status=500)
-    except Exception as e:
-        messages.error(request, f'Error: {str(e)}')
-        return redirect('sistemaGestion:lista_notificaciones')
+
+
+def solicitar_pdf_boleta(request, boleta_id):
+    """
+    Encola la generación del PDF de una boleta (POST) y retorna el trabajo en
+    JSON (202): trabajo, estado, en_cola, url_estado y url_descarga (al terminar).
+    """
+    sin_permiso = _sin_permiso_json(request, 'boletas')
+    if sin_permiso:
+        return sin_permiso
+    if request.method != 'POST':
+        respuesta = JsonResponse({'error': 'Método no permitido'}, status=405)
+        respuesta['Allow'] = 'POST'
+        return respuesta
+    if not trabajos_pdf.asincrono():
+        # Sin worker: el PDF se descarga directamente (se genera en el request)
+        return JsonResponse({
+            'error': 'La generación en segundo plano está desactivada',
+            'url_pdf': reverse('sistemaGestion:pdf_boleta', args=[boleta_id]),
+        }, status=409)
+    if not Boleta.objects.filter(id=boleta_id).exists():
+        return JsonResponse({'error': 'Boleta no encontrada'}, status=404)
+    trabajo = trabajos_pdf.solicitar(boleta_id)
+    return JsonResponse(_datos_trabajo_pdf(trabajo), status=202)
+
+
+def estado_trabajo_pdf(request, trabajo_id):
+    """Estado de un trabajo de PDF en JSON, para la consulta periódica del navegador"""
+    sin_permiso = _sin_permiso_json(request, 'boletas')
+    if sin_permiso:
+        return sin_permiso
+    try:
+        trabajo = TrabajoPDF.objects.get(id=trabajo_id)
+    except TrabajoPDF.DoesNotExist:
+        return JsonResponse({'error': 'Trabajo no encontrado'}, status=404)
+    return JsonResponse(_datos_trabajo_pdf(trabajo))
+
+
+def descargar_trabajo_pdf(request, trabajo_id):
+    """
+    Entrega el PDF generado por un trabajo. Si aún no termina o el archivo
+    ya no está en la caché, vuelve a la página de espera de la boleta.
+    """
+    if not usuario_logueado(request):
+        return redirect('sistemaGestion:login')
+
+    if not tiene_permiso(request, 'boletas'):
+        messages.error(request, 'No tienes permisos para acceder a esta sección')
+        return redirect('sistemaGestion:dashboard')
+
+    try:
+        trabajo = TrabajoPDF.objects.get(id=trabajo_id)
+    except TrabajoPDF.DoesNotExist:
+        return HttpResponse("Trabajo no encontrado", status=404)
+    contenido = cache_pdf.obtener(trabajo.boleta_id, trabajo.version) if trabajo.estado == 'listo' else None
+    if contenido is None:
+        return redirect('sistemaGestion:pdf_boleta', boleta_id=trabajo.boleta_id)
+    return _respuesta_pdf(trabajo.boleta_id, contenido)